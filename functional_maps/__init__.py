@@ -0,0 +1,3 @@
+from . spectral_basis import Spectral_Basis
+from . functional_map import Functional_Map
+from . collection import Collection_Correspondence, Map_Store
\ No newline at end of file
@@ -0,0 +1,170 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+'''
+
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from six.moves import cPickle
+
+from . spectral_basis import Spectral_Basis
+from . functional_map import Functional_Map
+from .. laplacians.laplace_beltrami import Laplace_Beltrami
+
+
+class Map_Store(object):
+    '''Keeps the maps computed between (some) pairs of shapes of a collection. For every pair (i, j) it stores the
+    point-to-point map (the vertex of shape i matched with every vertex of shape j) and the functional map.
+    '''
+
+    def __init__(self):
+        self.p2p = dict()
+        self.fmaps = dict()
+
+    def __str__(self):
+        return 'Map Store with %d maps.' % (len(self), )
+
+    def __len__(self):
+        return len(self.p2p)
+
+    def __contains__(self, pair):
+        return tuple(pair) in self.p2p
+
+    def __getitem__(self, pair):
+        return self.p2p[tuple(pair)]
+
+    def add(self, source_id, target_id, p2p, C=None):
+        self.p2p[(source_id, target_id)] = np.asarray(p2p, dtype=np.int32)
+        if C is not None:
+            self.fmaps[(source_id, target_id)] = np.asarray(C, dtype=np.float32)
+
+    def pairs(self):
+        return sorted(self.p2p.keys())
+
+    def functional_map(self, source_id, target_id):
+        return self.fmaps[(source_id, target_id)]
+
+    def save(self, file_out):
+        with open(file_out, "wb") as f_out:
+            cPickle.dump(self, f_out, protocol=2)
+
+    @staticmethod
+    def load(in_file):
+        with open(in_file, 'rb') as f_in:
+            res = cPickle.load(f_in)
+        return res
+
+
+def _basis_and_descriptors(args):
+    in_mesh, k, area_type, n_hks, n_wks = args
+    basis = Spectral_Basis.from_laplace_beltrami(Laplace_Beltrami(in_mesh), k, area_type)
+    return basis, basis.descriptors(n_hks, n_wks)
+
+
+class Collection_Correspondence(object):
+    '''Computes correspondences between many pairs of shapes of a collection. The spectral basis, the descriptors
+    and their projections are computed once per shape and cached. Thus, every requested pair costs only the solve
+    of its functional map and the refinement of it, and the total cost grows with num_shapes + num_pairs.
+    '''
+
+    def __init__(self, meshes, k_basis=60, k_init=20, area_type='barycentric', n_hks=100, n_wks=100,
+                 commutativity_weight=10e-3, zoom_out_step=1):
+        '''
+        Constructor.
+            Args:
+                meshes (list of Mesh): the shapes of the collection.
+                k_basis (int): size of the spectral bases, i.e., of the final (ZoomOut refined) functional maps.
+                k_init (int): size of the functional maps that are solved from the descriptors.
+        '''
+        if k_init > k_basis:
+            raise ValueError('k_init cannot be larger than k_basis.')
+        self.meshes = meshes
+        self.k_basis = k_basis
+        self.k_init = k_init
+        self.area_type = area_type
+        self.n_hks = n_hks
+        self.n_wks = n_wks
+        self.commutativity_weight = commutativity_weight
+        self.zoom_out_step = zoom_out_step
+        self.bases = [None] * len(meshes)
+        self.projections = [None] * len(meshes)
+
+    def __str__(self):
+        return 'Collection Correspondence over %d shapes (%d prepared).' % (self.num_shapes(), len(self.prepared()))
+
+    def num_shapes(self):
+        return len(self.meshes)
+
+    def prepared(self):
+        return [i for i, b in enumerate(self.bases) if b is not None]
+
+    def prepare(self, shape_ids=None, n_workers=1):
+        '''Computes (once) the spectral basis and the projected descriptors of the given shapes.
+        If n_workers > 1 the shapes are processed by a pool of processes.
+        '''
+        if shape_ids is None:
+            shape_ids = range(self.num_shapes())
+        todo = sorted(set(i for i in shape_ids if self.bases[i] is None))
+        if not todo:
+            return self
+
+        jobs = [(self.meshes[i], self.k_basis, self.area_type, self.n_hks, self.n_wks) for i in todo]
+        if n_workers > 1:
+            pool = Pool(n_workers)
+            try:
+                results = pool.map(_basis_and_descriptors, jobs)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [_basis_and_descriptors(job) for job in jobs]
+
+        for i, (basis, descriptors) in zip(todo, results):
+            self.bases[i] = basis
+            self.projections[i] = basis.project(descriptors, self.k_init)
+        return self
+
+    def match_pair(self, source_id, target_id):
+        '''Returns the (ZoomOut refined) Functional_Map and the point-to-point map between two prepared shapes.
+        '''
+        source = self.bases[source_id]
+        target = self.bases[target_id]
+        if source is None or target is None:
+            raise ValueError('Shapes must be prepared before they are matched.')
+        fmap = Functional_Map.from_projected_descriptors(source, target, self.projections[source_id],
+                                                          self.projections[target_id], self.commutativity_weight)
+        p2p = fmap.zoom_out(self.k_basis, step=self.zoom_out_step)
+        return fmap, p2p
+
+    def match(self, pairs, n_workers=1, store=None):
+        '''Computes the maps of all the requested (source_id, target_id) pairs.
+        The shapes involved are prepared first. Then, the pairs are scheduled over a pool of n_workers threads
+        (the heavy lifting happens inside numpy, which releases the GIL) that share the cached bases.
+        Returns:
+            Map_Store with the maps of the pairs. If a store is given, the pairs it already contains are skipped
+            and the new maps are added to it.
+        '''
+        if store is None:
+            store = Map_Store()
+        pairs = [tuple(p) for p in pairs if tuple(p) not in store]
+        self.prepare(set(i for p in pairs for i in p), n_workers=n_workers)
+
+        def job(pair):
+            fmap, p2p = self.match_pair(pair[0], pair[1])
+            return pair, fmap.C, p2p
+
+        if n_workers > 1:
+            pool = ThreadPool(n_workers)
+            try:
+                results = pool.map(job, pairs)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = [job(p) for p in pairs]
+
+        for (source_id, target_id), C, p2p in results:
+            store.add(source_id, target_id, p2p, C)
+        return store
@@ -0,0 +1,138 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+DOI: M. Ovsjanikov, M. Ben-Chen, J. Solomon, A. Butscher, L. Guibas.
+Functional Maps: A Flexible Representation of Maps Between Shapes. ACM Trans. on Graphics, 2012.
+
+DOI: S. Melzi, J. Ren, E. Rodola, A. Sharma, P. Wonka, M. Ovsjanikov.
+ZoomOut: Spectral Upsampling for Efficient Shape Correspondence. ACM Trans. on Graphics, 2019.
+'''
+
+import numpy as np
+
+
+class Functional_Map(object):
+    '''A linear map C between the functional spaces of two shapes. C maps the coefficients of a function on the
+    (truncated) Spectral_Basis of the source shape to the coefficients of its image on the basis of the target.
+    '''
+
+    def __init__(self, C, source, target):
+        '''
+        Constructor.
+            Args:
+                C (k_target x k_source numpy array).
+                source, target (Spectral_Basis) of the two shapes.
+        '''
+        if C.shape[0] > target.size() or C.shape[1] > source.size():
+            raise ValueError('The functional map is larger than the bases it connects.')
+        self.C = C
+        self.source = source
+        self.target = target
+
+    def __str__(self):
+        return 'Functional Map of size %d x %d.' % self.C.shape
+
+    def transfer(self, functions):
+        '''Transfers functions (num_source_vertices x m) from the source to the target shape.
+        '''
+        k_target, k_source = self.C.shape
+        coeffs = self.source.project(functions, k_source)
+        return self.target.reconstruct(self.C.dot(coeffs))
+
+    def to_point_to_point(self, chunk_size=4096):
+        '''Converts the functional map into a point-to-point map, by matching every target vertex with its nearest
+        source vertex in the (aligned) spectral embeddings.
+        Returns:
+            (num_target_vertices numpy array) the source vertex matched with every target vertex.
+        '''
+        k_target, k_source = self.C.shape
+        source_embedding = self.source.evecs[:, :k_source].dot(self.C.T)
+        target_embedding = self.target.evecs[:, :k_target]
+        return nearest_neighbors_in_embedding(target_embedding, source_embedding, chunk_size=chunk_size)[0]
+
+    def zoom_out(self, k_final, step=1, chunk_size=4096):
+        '''Refines the functional map with ZoomOut, i.e., by alternating between converting the map to a
+        point-to-point one and back, while increasing the size of the map by step at each iteration.
+        The map is updated in place.
+        Returns:
+            (num_target_vertices numpy array) the point-to-point map of the final iteration.
+        '''
+        k_final = min(k_final, self.source.size(), self.target.size())
+        p2p = self.to_point_to_point(chunk_size=chunk_size)
+        k = max(self.C.shape)
+        while k < k_final:
+            k = min(k + step, k_final)
+            self.C = Functional_Map.from_point_to_point(p2p, self.source, self.target, k, k).C
+            p2p = self.to_point_to_point(chunk_size=chunk_size)
+        return p2p
+
+    @staticmethod
+    def from_point_to_point(p2p, source, target, k_source, k_target):
+        '''Builds the functional map induced by a point-to-point map: C = Phi_target^T M_target Pi Phi_source.
+        Args:
+            p2p (num_target_vertices numpy array) the source vertex matched with every target vertex.
+        '''
+        target_evecs = target.evecs[:, :k_target] * target.mass[:, np.newaxis]
+        C = target_evecs.T.dot(source.evecs[p2p, :k_source])
+        return Functional_Map(C, source, target)
+
+    @staticmethod
+    def from_descriptors(source, target, source_desc, target_desc, k_source, k_target, commutativity_weight=10e-3):
+        '''Computes the functional map that best preserves the descriptors of the two shapes and commutes with
+        their LB operators, i.e., the minimizer of:
+            ||C A - B||^2 + commutativity_weight * ||C Lambda_source - Lambda_target C||^2
+        where A, B are the projections of the descriptors on the two bases.
+
+        Args:
+            source_desc (num_source_vertices x d), target_desc (num_target_vertices x d): corresponding
+            descriptors of the vertices, e.g., HKS/WKS (see Spectral_Basis.descriptors).
+
+        Notes: the eigenvalues are divided by the largest of them, so that commutativity_weight is scale invariant.
+        Since the commutativity term is diagonal, the rows of C are decoupled and solved as one batch of
+        k_target (k_source x k_source) linear systems.
+        '''
+        if source_desc.shape[1] != target_desc.shape[1]:
+            raise ValueError('The two shapes must have the same number of descriptors.')
+        A = source.project(source_desc, k_source)
+        B = target.project(target_desc, k_target)
+        return Functional_Map.from_projected_descriptors(source, target, A, B, commutativity_weight)
+
+    @staticmethod
+    def from_projected_descriptors(source, target, A, B, commutativity_weight=10e-3):
+        '''Same as from_descriptors, but the descriptors are given already projected on the two bases, i.e.,
+        A is (k_source x d) and B is (k_target x d). Useful when the projections are cached and reused.
+        '''
+        k_source = A.shape[0]
+        k_target = B.shape[0]
+        source_evals = source.evals[:k_source]
+        target_evals = target.evals[:k_target]
+        scale = max(np.max(np.abs(source_evals)), np.max(np.abs(target_evals)), 10e-8)
+        D = np.square(target_evals[:, np.newaxis] - source_evals[np.newaxis, :]) / scale ** 2
+
+        systems = np.tile(A.dot(A.T), (k_target, 1, 1))
+        diag = np.arange(k_source)
+        systems[:, diag, diag] += commutativity_weight * D
+        C = np.linalg.solve(systems, B.dot(A.T)[:, :, np.newaxis])[:, :, 0]
+        return Functional_Map(C, source, target)
+
+
+def nearest_neighbors_in_embedding(queries, data, chunk_size=4096):
+    '''Brute force (exact) nearest neighbor search, suited for the high dimensional spectral embeddings. The
+    queries are processed in chunks, so that the memory stays bounded by chunk_size x len(data).
+    Returns:
+        indices, distances (len(queries) numpy arrays) of the nearest data point of each query.
+    '''
+    n = len(queries)
+    indices = np.empty(n, dtype=np.int64)
+    distances = np.empty(n, dtype=queries.dtype)
+    data_sq_norms = np.sum(np.square(data), axis=1)
+    for start in range(0, n, chunk_size):
+        q = queries[start: start + chunk_size]
+        sq_dists = data_sq_norms[np.newaxis, :] - 2 * q.dot(data.T)
+        best = np.argmin(sq_dists, axis=1)
+        indices[start: start + chunk_size] = best
+        best_sq = sq_dists[np.arange(len(q)), best] + np.sum(np.square(q), axis=1)
+        distances[start: start + chunk_size] = np.sqrt(np.maximum(best_sq, 0))
+    return indices, distances
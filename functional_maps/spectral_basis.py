@@ -0,0 +1,86 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+'''
+
+import numpy as np
+
+from .. signatures import node_signatures as ns
+
+
+class Spectral_Basis(object):
+    '''A truncated eigen-basis of the Laplace Beltrami operator of a shape, along with the (lumped) mass of its
+    vertices. It is the common ground of the functional-map computations: functions on the vertices are projected
+    on it and reconstructed from it.
+    '''
+
+    def __init__(self, evals, evecs, mass):
+        '''
+        Constructor.
+            Args:
+                evals (k numpy array): eigenvalues in increasing order.
+                evecs (num_vertices x k numpy array): the M-orthonormal eigenvectors.
+                mass (num_vertices numpy array): the diagonal of the mass matrix M.
+        '''
+        if evecs.shape[1] != len(evals) or evecs.shape[0] != len(mass):
+            raise ValueError('Eigen-pairs and mass have inconsistent dimensions.')
+        self.evals = evals
+        self.evecs = evecs
+        self.mass = mass
+
+    def __str__(self):
+        return 'Spectral Basis with %d eigen-pairs over %d vertices.' % (self.size(), self.num_vertices())
+
+    def size(self):
+        return len(self.evals)
+
+    def num_vertices(self):
+        return self.evecs.shape[0]
+
+    def project(self, functions, k=None):
+        '''Returns the coefficients (k x m) of the m functions (num_vertices x m) on the first k basis elements.
+        '''
+        evecs = self.evecs if k is None else self.evecs[:, :k]
+        functions = np.asarray(functions)
+        if functions.ndim == 1:
+            return evecs.T.dot(self.mass * functions)
+        return evecs.T.dot(self.mass[:, np.newaxis] * functions)
+
+    def reconstruct(self, coeffs):
+        '''Inverse of project: synthesizes the functions on the vertices from their (k x m) coefficients.
+        '''
+        return self.evecs[:, :len(coeffs)].dot(coeffs)
+
+    def descriptors(self, n_hks=100, n_wks=100, wks_variance=7, normalize=True):
+        '''Computes the Heat and the Wave Kernel Signatures of the vertices with the eigen-pairs of the basis.
+        Returns:
+            (num_vertices x (n_hks + n_wks)) numpy array. If normalize is True every descriptor (column) has unit
+            norm w.r.t. the mass of the vertices.
+        '''
+        positive = self.evals > 10e-8    # The (near-) zero eigenvalue(s) carry no information.
+        evals = self.evals[positive]
+        evecs = self.evecs[:, positive].T
+        if len(evals) < 2:
+            raise ValueError('At least two positive eigenvalues are needed to compute descriptors.')
+
+        res = []
+        if n_hks > 0:
+            time_points = ns.hks_time_sample_generator(evals[0], evals[-1], n_hks)
+            res.append(ns.heat_kernel_signature(evals, evecs, time_points))
+        if n_wks > 0:
+            energies, sigma = ns.wks_energy_generator(evals[0], evals[-1], n_wks, padding=wks_variance)
+            res.append(ns.wave_kernel_signature(evals, evecs, energies, sigma=sigma))
+        res = np.hstack(res)
+
+        if normalize:
+            norms = np.sqrt(self.mass.dot(np.square(res)))
+            norms[norms == 0] = 1
+            res /= norms
+        return res
+
+    @staticmethod
+    def from_laplace_beltrami(in_lb, k, area_type='barycentric'):
+        evals, evecs = in_lb.spectra(k, area_type)
+        mass = in_lb.M.area_of_vertices(area_type)[:, 0]
+        return Spectral_Basis(evals, evecs, mass)
@@ -1,2 +1,5 @@
 from . graph import Graph
-from . cuboid import Cuboid
\ No newline at end of file
+from . cuboid import Cuboid
+from . box_sets import Cuboid_Set, Rectangle_Set
+from . box_index import Box_Grid_Index
+from . oriented_box import Oriented_Box, Oriented_Box_Set, pca_boxes, min_volume_boxes
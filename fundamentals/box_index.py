@@ -0,0 +1,157 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+A uniform grid index over many axis aligned boxes (cuboids or rectangles), answering batched point-in-box and
+box-overlap queries. Every box is registered in the grid cells it overlaps (kept in compressed, CSR like arrays), thus
+a query only tests the boxes registered in the cells it touches, instead of all the boxes.
+'''
+
+import numpy as np
+
+
+def _expand_ranges(first, last):
+    '''Expands the (K x d) inclusive integer ranges [first, last] (of grid cells) to all the cells they contain.
+    Returns the (M) index of the range of each cell and the (M x d) cells.
+    '''
+    sizes = last - first + 1
+    counts = np.prod(sizes, axis=1)
+    owner = np.repeat(np.arange(len(first)), counts)
+    local = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+    cells = np.empty((len(owner), first.shape[1]), dtype=np.int64)
+    for k in range(first.shape[1] - 1, -1, -1):
+        cells[:, k] = first[owner, k] + local % sizes[owner, k]
+        local //= sizes[owner, k]
+    return owner, cells
+
+
+class Box_Grid_Index(object):
+    '''
+    Uniform grid index of N boxes, given as (N x 2d) extrema [mins, maxs], e.g., [xmin, ymin, zmin, xmax, ymax,
+    zmax] for cuboids.
+    '''
+
+    def __init__(self, extrema, resolution=None, max_cells=2 ** 21):
+        '''
+        Constructor.
+            resolution (int or d ints, optional): the number of cells along each axis. By default, the cells are
+            about as large as the median box (but no more than 256 per axis, nor max_cells in total).
+        '''
+        self.extrema = np.asarray(extrema, dtype=np.float64)
+        n_boxes, d = self.extrema.shape[0], self.extrema.shape[1] // 2
+        self.d = d
+        if n_boxes == 0:
+            self.lo = np.zeros(d)
+            self.hi = np.zeros(d)
+        else:
+            self.lo = np.min(self.extrema[:, :d], axis=0)
+            self.hi = np.max(self.extrema[:, d:], axis=0)
+        extent = np.maximum(self.hi - self.lo, 10e-12)
+
+        if resolution is None:
+            sides = np.median(self.extrema[:, d:] - self.extrema[:, :d], axis=0) if n_boxes > 0 else extent
+            sides = np.maximum(sides, extent / 256.0)
+            resolution = np.clip(np.ceil(extent / sides), 1, 256).astype(np.int64)
+            while np.prod(resolution) > max_cells:
+                resolution = np.maximum(resolution // 2, 1)
+        self.resolution = np.broadcast_to(np.asarray(resolution, dtype=np.int64), (d, )).copy()
+        self.cell_size = extent / self.resolution
+
+        first = self._cells_of(self.extrema[:, :d])
+        last = self._cells_of(self.extrema[:, d:])
+        owner, cells = _expand_ranges(first, last)
+        linear = np.ravel_multi_index(cells.T, self.resolution)
+        order = np.argsort(linear, kind='stable')
+        self.box_ids = owner[order]     # The boxes of cell c are box_ids[offsets[c]: offsets[c + 1]].
+        self.offsets = np.zeros(np.prod(self.resolution) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(linear, minlength=np.prod(self.resolution)), out=self.offsets[1:])
+
+    def __str__(self):
+        cells = 'x'.join(str(r) for r in self.resolution)
+        return 'Grid index of %d boxes with %s cells.' % (len(self.extrema), cells)
+
+    def _cells_of(self, points):
+        cells = np.floor((points - self.lo) / self.cell_size).astype(np.int64)
+        return np.clip(cells, 0, self.resolution - 1)
+
+    def _candidates(self, linear_cells):
+        '''For (M) cells, the (index of the) cell and the box of all the (cell, box) registrations.
+        '''
+        start = self.offsets[linear_cells]
+        counts = self.offsets[linear_cells + 1] - start
+        owner = np.repeat(np.arange(len(linear_cells)), counts)
+        local = np.arange(len(owner)) - np.repeat(np.cumsum(counts) - counts, counts)
+        return owner, self.box_ids[start[owner] + local]
+
+    def boxes_containing(self, points, chunk_size=2 ** 16):
+        '''Finds all the pairs (point, box) such that the box contains the point (boundary included, as in
+        Cuboid.is_point_inside).
+        Args:
+            points (M x d numpy array).
+        Returns:
+            point_ids, box_ids (K numpy arrays) sorted by the point.
+        '''
+        d = self.d
+        point_ids, box_ids = [], []
+        for start in range(0, len(points), chunk_size):
+            p = np.asarray(points[start:start + chunk_size], dtype=np.float64)
+            in_grid = np.where(np.all((p >= self.lo) & (p <= self.hi), axis=1))[0]
+            linear = np.ravel_multi_index(self._cells_of(p[in_grid]).T, self.resolution)
+            owner, boxes = self._candidates(linear)
+            owner = in_grid[owner]
+            box = self.extrema[boxes]
+            inside = np.all((box[:, :d] <= p[owner]) & (p[owner] <= box[:, d:]), axis=1)
+            point_ids.append(start + owner[inside])
+            box_ids.append(boxes[inside])
+        if len(point_ids) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.hstack(point_ids), np.hstack(box_ids)
+
+    def assign_points(self, points, rule='smallest'):
+        '''Assigns every point to one of the boxes that contain it, e.g., the points of a Point_Cloud to the
+        bounding boxes of its parts.
+        Args:
+            rule (String): 'smallest' (volume) or 'first' (lowest index) of the containing boxes.
+        Returns:
+            (M) numpy array with the box of every point, -1 for the points that are in no box.
+        '''
+        point_ids, box_ids = self.boxes_containing(points)
+        if rule == 'smallest':
+            d = self.d
+            volumes = np.prod(self.extrema[box_ids, d:] - self.extrema[box_ids, :d], axis=1)
+            order = np.lexsort((box_ids, volumes, point_ids))
+        elif rule == 'first':
+            order = np.lexsort((box_ids, point_ids))
+        else:
+            raise ValueError('rule must be either \'smallest\', or \'first\'.')
+        point_ids, box_ids = point_ids[order], box_ids[order]
+        first = np.ones(len(point_ids), dtype=np.bool_)
+        first[1:] = point_ids[1:] != point_ids[:-1]
+        res = np.full(len(points), -1, dtype=np.int64)
+        res[point_ids[first]] = box_ids[first]
+        return res
+
+    def boxes_overlapping(self, query_extrema, strict=True):
+        '''Finds all the pairs (query box, box) that overlap.
+        Args:
+            query_extrema (Q x 2d numpy array).
+            strict (boolean): if True, the boxes must intersect with positive volume (as in
+                Cuboid.intersection_with), otherwise touching boxes also overlap.
+        Returns:
+            query_ids, box_ids (K numpy arrays) sorted by the query.
+        '''
+        d = self.d
+        q = np.asarray(query_extrema, dtype=np.float64).reshape(-1, 2 * d)
+        in_grid = np.where(np.all((q[:, :d] <= self.hi) & (q[:, d:] >= self.lo), axis=1))[0]
+        owner, cells = _expand_ranges(self._cells_of(q[in_grid, :d]), self._cells_of(q[in_grid, d:]))
+        cell_owner, boxes = self._candidates(np.ravel_multi_index(cells.T, self.resolution))
+        query_ids = in_grid[owner[cell_owner]]
+
+        n_boxes = max(len(self.extrema), 1)
+        pairs = np.unique(query_ids * n_boxes + boxes)   # A pair is found in every cell the two boxes share.
+        query_ids, boxes = pairs // n_boxes, pairs % n_boxes
+        a, b = q[query_ids], self.extrema[boxes]
+        sides = np.minimum(a[:, d:], b[:, d:]) - np.maximum(a[:, :d], b[:, :d])
+        overlap = np.all(sides > 0, axis=1) if strict else np.all(sides >= 0, axis=1)
+        return query_ids[overlap], boxes[overlap]
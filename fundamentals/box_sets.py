@@ -0,0 +1,222 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Sets of axis aligned boxes (cuboids and rectangles) kept as one (N x 2d) numpy array of [mins, maxs] rows, e.g.,
+[xmin, ymin, zmin, xmax, ymax, zmax] for cuboids, as in Cuboid and Rectangle. The intersection, IoU and overlap
+matrices between two sets are computed with broadcasting, in blocks of rows to bound the memory of the temporaries.
+'''
+
+import numpy as np
+
+from . cuboid import Cuboid
+from . rectangle import Rectangle
+from . box_index import Box_Grid_Index
+
+
+def intersection_matrix(boxes_a, boxes_b, block_size=None):
+    '''Volumes (areas) of the intersections of every box of (N x 2d) boxes_a with every box of (M x 2d) boxes_b.
+    Args:
+        block_size (int, optional): the number of rows of boxes_a processed at once. By default, such that a block
+            has about 2^22 pairs.
+    Returns:
+        (N x M) numpy array.
+    '''
+    d = boxes_a.shape[1] // 2
+    n, m = len(boxes_a), len(boxes_b)
+    if block_size is None:
+        block_size = max(1, 2 ** 22 // max(m, 1))
+    dtype = np.result_type(boxes_a.dtype, boxes_b.dtype)
+    res = np.empty((n, m), dtype=dtype)
+    for start in range(0, n, block_size):
+        a = boxes_a[start:start + block_size]
+        block = res[start:start + block_size]
+        for k in range(d):  # One (block x M) side at a time, which is faster than a (block x M x d) broadcast.
+            side = np.minimum(a[:, d + k, np.newaxis], boxes_b[:, d + k])
+            side -= np.maximum(a[:, k, np.newaxis], boxes_b[:, k])
+            np.maximum(side, 0, out=side)
+            if k == 0:
+                block[:] = side
+            else:
+                block *= side
+    return res
+
+
+def overlap_matrix(boxes_a, boxes_b, ratio_type='union', block_size=None):
+    '''The overlap ratios of every box of boxes_a with every box of boxes_b: their intersection divided by their
+    union (IoU) if ratio_type is 'union', or by the smallest of the two if it is 'min'. Pairs of degenerate boxes
+    (zero denominator) have zero overlap.
+    '''
+    d = boxes_a.shape[1] // 2
+    measure_a = np.prod(boxes_a[:, d:] - boxes_a[:, :d], axis=1)
+    measure_b = np.prod(boxes_b[:, d:] - boxes_b[:, :d], axis=1)
+    inter = intersection_matrix(boxes_a, boxes_b, block_size).astype(np.float64)
+    if ratio_type == 'union':
+        denominator = measure_a[:, np.newaxis] + measure_b[np.newaxis, :] - inter
+    elif ratio_type == 'min':
+        denominator = np.minimum(measure_a[:, np.newaxis], measure_b[np.newaxis, :]).astype(np.float64)
+    else:
+        raise ValueError('ratio_type must be either \'union\', or \'min\'.')
+    np.divide(inter, denominator, out=inter, where=denominator > 0)
+    inter[denominator <= 0] = 0
+    return inter
+
+
+def non_maximum_suppression(boxes, scores, threshold=0.5, ratio_type='union', labels=None, max_output=None):
+    '''Greedy non maximum suppression: the boxes are visited in decreasing score order and every box that is kept
+    suppresses the (not yet visited) boxes that overlap with it more than the threshold.
+    Args:
+        boxes (N x 2d numpy array), scores (N numpy array).
+        labels (N numpy array, optional): if given, only boxes with the same label suppress each other.
+        max_output (int, optional): stop after keeping this many boxes.
+    Returns:
+        the indices of the kept boxes, in decreasing score order.
+    '''
+    order = np.argsort(-np.asarray(scores), kind='stable')
+    boxes = np.asarray(boxes, dtype=np.float64)[order]
+    if labels is not None:
+        # Translate the boxes of every label far from the boxes of the other labels.
+        d = boxes.shape[1] // 2
+        span = np.max(boxes[:, d:]) - np.min(boxes[:, :d]) + 1 if len(boxes) > 0 else 0
+        _, label_ids = np.unique(np.asarray(labels)[order], return_inverse=True)
+        shift = np.ravel(label_ids)[:, np.newaxis] * span
+        boxes[:, :d] += shift
+        boxes[:, d:] += shift
+
+    n = len(boxes)
+    if max_output is None:
+        max_output = n
+    suppressed = np.zeros(n, dtype=np.bool_)
+    keep = []
+    for i in range(n):
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        if len(keep) == max_output:
+            break
+        rest = i + 1 + np.where(~suppressed[i + 1:])[0]
+        overlaps = overlap_matrix(boxes[i:i + 1], boxes[rest], ratio_type)[0]
+        suppressed[rest[overlaps > threshold]] = True
+    return order[np.array(keep, dtype=np.int64)]
+
+
+class _Box_Set(object):
+    '''Common functionality of Cuboid_Set and Rectangle_Set. Subclasses define the dimension d and the class of the
+    single boxes.
+    '''
+    d = None
+    box_class = None
+
+    def __init__(self, extrema):
+        extrema = np.asarray(extrema)
+        if extrema.ndim == 1 and len(extrema) == 0:
+            extrema = extrema.reshape(0, 2 * self.d)
+        if extrema.ndim != 2 or extrema.shape[1] != 2 * self.d:
+            raise ValueError('The extrema of the boxes must be an (N x %d) array.' % (2 * self.d, ))
+        if np.any(extrema[:, :self.d] > extrema[:, self.d:]):
+            raise ValueError('Check extrema of boxes: some minimums are larger than their maximums.')
+        self.extrema = extrema
+
+    @property
+    def extrema(self):
+        return self._extrema
+
+    @extrema.setter
+    def extrema(self, value):
+        self._extrema = value
+        self._index = None
+
+    def __len__(self):
+        return len(self.extrema)
+
+    def __getitem__(self, key):
+        '''A single box for an integer key, otherwise (slices, masks, index arrays) a set of the selected boxes.
+        '''
+        if isinstance(key, (int, np.integer)):
+            return self.box_class(self.extrema[key])
+        return self.__class__(self.extrema[key])
+
+    def measures(self):
+        '''Volumes (areas) of the boxes.
+        '''
+        return np.prod(self.extrema[:, self.d:] - self.extrema[:, :self.d], axis=1)
+
+    def barycenters(self):
+        return (self.extrema[:, :self.d] + self.extrema[:, self.d:]) / 2.0
+
+    def diagonal_lengths(self):
+        return np.sqrt(np.sum(np.square(self.extrema[:, self.d:] - self.extrema[:, :self.d]), axis=1))
+
+    def intersection_with(self, other, block_size=None):
+        '''(N x M) matrix of the intersections of the boxes of this set with those of another set, see
+        intersection_matrix.
+        '''
+        return intersection_matrix(self.extrema, other.extrema, block_size)
+
+    def union_with(self, other, block_size=None):
+        inter = self.intersection_with(other, block_size)
+        return self.measures()[:, np.newaxis] + other.measures()[np.newaxis, :] - inter
+
+    def iou_with(self, other, block_size=None):
+        return overlap_matrix(self.extrema, other.extrema, 'union', block_size)
+
+    def overlap_ratio_with(self, other, ratio_type='union', block_size=None):
+        '''(N x M) matrix of the overlap ratios of the boxes of this set with those of another set, see
+        overlap_matrix.
+        '''
+        return overlap_matrix(self.extrema, other.extrema, ratio_type, block_size)
+
+    def spatial_index(self):
+        '''The (cached) Box_Grid_Index of the boxes, for point-in-box and box-overlap queries.
+        '''
+        if self._index is None:
+            self._index = Box_Grid_Index(self.extrema)
+        return self._index
+
+    def non_maximum_suppression(self, scores, threshold=0.5, ratio_type='union', labels=None, max_output=None):
+        '''The indices of the boxes kept by non_maximum_suppression, in decreasing score order.
+        '''
+        return non_maximum_suppression(self.extrema, scores, threshold, ratio_type, labels, max_output)
+
+
+class Cuboid_Set(_Box_Set):
+    '''
+    A set of N 3D Cuboids, with (N x 6) extrema [xmin, ymin, zmin, xmax, ymax, zmax].
+    '''
+    d = 3
+    box_class = Cuboid
+
+    def __str__(self):
+        return 'Set of %d Cuboids.' % (len(self), )
+
+    def volumes(self):
+        return self.measures()
+
+    @staticmethod
+    def from_cuboids(cuboids):
+        return Cuboid_Set(np.array([c.extrema for c in cuboids]).reshape(-1, 6))
+
+    @staticmethod
+    def bounding_boxes_of_3d_points(point_sets):
+        '''The Cuboid_Set with the bounding boxes of a list of (N_i x 3) point sets.
+        '''
+        return Cuboid_Set(np.array([np.hstack([np.min(p, axis=0), np.max(p, axis=0)]) for p in point_sets]))
+
+
+class Rectangle_Set(_Box_Set):
+    '''
+    A set of N 2D Rectangles, with (N x 4) corners [xmin, ymin, xmax, ymax].
+    '''
+    d = 2
+    box_class = Rectangle
+
+    def __str__(self):
+        return 'Set of %d Rectangles.' % (len(self), )
+
+    def areas(self):
+        return self.measures()
+
+    @staticmethod
+    def from_rectangles(rectangles):
+        return Rectangle_Set(np.array([r.corners for r in rectangles]).reshape(-1, 4))
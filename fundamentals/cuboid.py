@@ -195,10 +195,4 @@ class Cuboid(object):
 
     @staticmethod
     def bounding_box_of_3d_points(points):
-        xmin = np.min(points[:, 0])
-        xmax = np.max(points[:, 0])
-        ymin = np.min(points[:, 1])
-        ymax = np.max(points[:, 1])
-        zmin = np.min(points[:, 2])
-        zmax = np.max(points[:, 2])
-        return Cuboid(np.array([xmin, ymin, zmin, xmax, ymax, zmax]))
+        return Cuboid(np.hstack([np.min(points, axis=0), np.max(points, axis=0)]))
@@ -8,6 +8,8 @@ Created on August 3, 2016
 
 import numpy as np
 from scipy import sparse as sparse
+from scipy.linalg import eigh
+from scipy.sparse.linalg import lobpcg, splu, LinearOperator
 from numpy.matlib import repmat
 
 from .. utils import linalg_utils as lu
@@ -17,6 +19,8 @@ class Graph(object):
     '''A class offering some basic graph-related functions. It uses mostly scipy modules.
     '''
 
+    dense_eig_max_nodes = 200    # Below this size, eigen-problems are solved with a dense solver.
+
     def __init__(self, adjacency, is_directed):
         '''
         Constructor
@@ -33,6 +37,40 @@ class Graph(object):
             E = sparse.triu(self.adjacency).nonzero()  # TODO: Assumes - sparse storage.
         return E
 
+    def laplacian_and_mass(self, normalized=True):
+        '''Returns the combinatorial laplacian of the (symmetrized) graph and the mass matrix of its generalized
+        eigen-problem. If normalized is True, the mass matrix is the degree matrix (normalized-cut problem).
+        Otherwise, it is the identity.
+        '''
+        A = self.adjacency
+        if self.is_directed:
+            A = (A + A.T) / 2.0
+        A = sparse.csr_matrix(A)
+        n = A.shape[0]
+        L = Graph.adjacency_to_laplacian(A, 'comb').tocsr()
+        if normalized:
+            M = sparse.diags(np.asarray(A.sum(axis=1)).ravel(), format='csr')
+        else:
+            M = sparse.identity(n, format='csr')
+        return L, M
+
+    def fiedler_vector(self, normalized=True, x0=None, tol=10e-6, max_iter=200):
+        '''Computes the Fiedler eigen-pair of the graph, i.e., the one with the smallest non-zero eigenvalue of
+        its laplacian. The graph is assumed to be connected.
+        Returns:
+            (float, numpy array of N floats) the Fiedler eigenvalue and eigenvector.
+        '''
+        L, M = self.laplacian_and_mass(normalized)
+        evals, evecs = Graph.fiedler_of_laplacian(L, M, x0=x0, tol=tol, max_iter=max_iter)
+        return evals[0], evecs[:, 0]
+
+    def spectral_partition(self, n_parts, normalized=True, split='median'):
+        '''Partitions the nodes of the graph in n_parts via recursive spectral bisection.
+        See Graph.spectral_partition_of_laplacian.
+        '''
+        L, M = self.laplacian_and_mass(normalized)
+        return Graph.spectral_partition_of_laplacian(L, n_parts, M, split=split)
+
     @staticmethod
     def connected_components(A):
         return sparse.csgraph.connected_components(A, directed=False)
@@ -46,7 +84,7 @@ class Graph(object):
             raise ValueError('threshold variable must be in (0,1].')
 
         unique_labels, counts = np.unique(node_labels, return_counts=True)
-        decreasing_index = [np.argsort(counts)[::-1]]
+        decreasing_index = np.argsort(counts)[::-1]
         counts = counts[decreasing_index]
         unique_labels = unique_labels[decreasing_index]
         cumulative = np.cumsum(counts, dtype=np.float32)
@@ -125,6 +163,118 @@ class Graph(object):
             raise ValueError('Please provide a valid argument for the type of laplacian.')
         return L
 
+    @staticmethod
+    def sub_laplacian(L, nodes):
+        '''Returns the laplacian of the sub-graph induced by the given nodes. The edges that connect the nodes
+        with the rest of the graph are dropped, i.e., the diagonal is recomputed so that every row sums to zero.
+        '''
+        sub = sparse.csr_matrix(L)[nodes][:, nodes]
+        off = sub - sparse.diags(sub.diagonal())
+        return (off - sparse.diags(np.asarray(off.sum(axis=1)).ravel())).tocsr()
+
+    @staticmethod
+    def fiedler_of_laplacian(L, M=None, x0=None, n_vecs=1, tol=10e-6, max_iter=200):
+        '''Computes the smallest non-trivial eigen-pairs of the generalized problem L x = lambda M x, where L is
+        the laplacian of a connected graph. The constant vector (the kernel of L) is deflated, thus the first
+        returned pair is the Fiedler one.
+
+         Args:    L       - (N x N) sparse symmetric PSD matrix whose rows sum to zero, e.g., a combinatorial or
+                            a cotangent laplacian.
+                  M       - (N x N, optional) sparse diagonal mass matrix with positive entries. Default = identity.
+                  x0      - (N x m, optional) initial guess for the eigenvectors, e.g., the solution of a related
+                            problem (warm-start).
+                  n_vecs  - (int, optional) number of eigen-pairs to compute. Default = 1.
+
+         Output:  evals   - (n_vecs) eigenvalues in increasing order.
+                  evecs   - (N x n_vecs) the corresponding M-orthonormal eigenvectors.
+
+         Notes:
+               LOBPCG is run in the M-orthogonal complement of the constant vector and it is preconditioned with
+               the sparse LU factorization of a slightly shifted L. Small problems are solved densely.
+        '''
+        n = L.shape[0]
+        if n < 2:
+            raise ValueError('The Fiedler vector is defined for graphs with at least two nodes.')
+        if M is None:
+            M = sparse.identity(n, format='csr')
+        n_vecs = min(n_vecs, n - 1)
+
+        if n <= Graph.dense_eig_max_nodes or n < 5 * (n_vecs + 1):
+            L = L.toarray() if sparse.issparse(L) else np.asarray(L)
+            M = M.toarray() if sparse.issparse(M) else np.asarray(M)
+            evals, evecs = eigh(L, M)
+            return evals[1: n_vecs + 1], evecs[:, 1: n_vecs + 1]
+
+        L = sparse.csc_matrix(L, dtype=np.float64)
+        M = sparse.csc_matrix(M, dtype=np.float64)
+        X = np.random.RandomState(0).rand(n, n_vecs) - 0.5
+        if x0 is not None:
+            x0 = np.asarray(x0, dtype=np.float64).reshape(n, -1)[:, :n_vecs]
+            X[:, :x0.shape[1]] = x0
+
+        shift = 10e-4 * L.diagonal().mean() / M.diagonal().mean()
+        lu = splu(L + shift * M)
+        precond = LinearOperator((n, n), matvec=lu.solve, matmat=lu.solve, dtype=np.float64)
+        constant = np.ones((n, 1))
+        evals, evecs = lobpcg(L, X, B=M, M=precond, Y=constant, tol=tol, maxiter=max_iter, largest=False)
+        index = np.argsort(evals)
+        return evals[index], evecs[:, index]
+
+    @staticmethod
+    def spectral_partition_of_laplacian(L, n_parts, M=None, split='median', tol=10e-6, max_iter=200):
+        '''Partitions the nodes of a graph in n_parts via recursive spectral bisection. Each connected component
+        starts as a separate part. Then, the largest part is repeatedly split in two according to the Fiedler
+        vector of its sub-graph.
+
+         Args:    L       - (N x N) sparse laplacian of the graph (see fiedler_of_laplacian).
+                  n_parts - (int) number of requested parts.
+                  M       - (N x N, optional) sparse diagonal mass matrix. Default = identity.
+                  split   - (String, optional) 'median' splits a part in two halves of equal size, 'sign'
+                            splits it according to the sign of its Fiedler vector. Default = 'median'.
+
+         Output:  labels  - (N) numpy array, labels[i] is the part (in [0, n_parts-1]) the i-th node belongs to.
+
+         Notes:
+               The second eigenvector of a bisected part, restricted to each of its children, is used to
+               warm-start the bisection of the children.
+        '''
+        n = L.shape[0]
+        if n_parts < 1 or n_parts > n:
+            raise ValueError('The number of parts must be in [1, %d].' % (n, ))
+        if split not in ('median', 'sign'):
+            raise ValueError('split must be either \'median\', or \'sign\'.')
+        if M is None:
+            M = sparse.identity(n, format='csr')
+        L = sparse.csr_matrix(L)
+        M = sparse.csr_matrix(M)
+
+        n_cc, cc_labels = Graph.connected_components(L)
+        if n_cc > n_parts:
+            raise ValueError('The graph has more connected components (%d) than the requested parts.' % (n_cc, ))
+        parts = [(np.where(cc_labels == i)[0], None) for i in range(n_cc)]
+
+        while len(parts) < n_parts:
+            largest = np.argmax([len(p[0]) for p in parts])
+            nodes, x0 = parts.pop(largest)
+            sub_L = Graph.sub_laplacian(L, nodes)
+            sub_M = M[nodes][:, nodes]
+            _, evecs = Graph.fiedler_of_laplacian(sub_L, sub_M, x0=x0, n_vecs=2, tol=tol, max_iter=max_iter)
+            fiedler = evecs[:, 0]
+            side = fiedler > 0
+            if split == 'median' or side.all() or not side.any():
+                side = np.zeros(len(nodes), dtype=np.bool_)
+                side[np.argsort(fiedler, kind='mergesort')[len(nodes) // 2:]] = True
+
+            next_guess = evecs[:, 1] if evecs.shape[1] > 1 else None
+            for mask in [~side, side]:
+                guess = next_guess[mask] if next_guess is not None else None
+                parts.append((nodes[mask], guess))
+
+        labels = np.empty(n, dtype=np.int32)
+        for i, (nodes, _) in enumerate(parts):
+            labels[nodes] = i
+        return labels
+
 if __name__ == '__main__':
     from geo_tool.solids import mesh_cleaning as cleaning
     from geo_tool.solids.mesh import Mesh
@@ -0,0 +1,463 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Oriented (non axis aligned) 3D bounding boxes. A box is given by its center, a (3 x 3) rotation whose rows are the
+(unit, right-handed) axes of the box and the half sizes of the box along them, thus a point p has box coordinates
+rotation.dot(p - center). Sets of boxes are kept as (N x 3), (N x 3 x 3) and (N x 3) arrays and are fitted to batches
+of point sets with PCA or with the (approximately) minimum volume boxes of their convex hulls. Two boxes are tested
+for intersection with the separating axis theorem and their intersection volume is the volume of the convex
+polytope that is common to both.
+'''
+
+import numpy as np
+from multiprocessing import Pool
+from scipy.spatial import ConvexHull
+
+from . cuboid import Cuboid
+
+# The corners, in the same order as in Cuboid, and the edges of the unit box.
+_corner_signs = np.array([[-1, -1, -1], [1, -1, -1], [1, 1, -1], [-1, 1, -1],
+                          [-1, -1, 1], [1, -1, 1], [1, 1, 1], [-1, 1, 1]], dtype=np.float64)
+_edges = np.array([[0, 1], [1, 2], [2, 3], [3, 0], [4, 5], [5, 6], [6, 7], [7, 4],
+                   [0, 4], [1, 5], [2, 6], [3, 7]])
+
+
+def _as_batch(point_sets):
+    '''Stacks a (B x N x 3) array, or a list of (N_i x 3) arrays, to a (B x max(N_i) x 3) array and a (B x max(N_i))
+    boolean mask of the real points.
+    '''
+    if isinstance(point_sets, np.ndarray) and point_sets.ndim == 3:
+        return point_sets.astype(np.float64), np.ones(point_sets.shape[:2], dtype=np.bool_)
+    n_max = max(len(p) for p in point_sets)
+    batch = np.zeros((len(point_sets), n_max, 3))
+    mask = np.zeros((len(point_sets), n_max), dtype=np.bool_)
+    for i, p in enumerate(point_sets):
+        batch[i, :len(p)] = p
+        mask[i, :len(p)] = True
+    return batch, mask
+
+
+def _canonical_directions(vectors, weights, decimals=3):
+    '''Groups unit vectors that are equal up to their sign (and up to about 10^-decimals), summing their weights.
+    Returns the (unit) representative of every group and the weight of the group, by decreasing weight.
+    '''
+    vectors = vectors / np.sqrt(np.sum(np.square(vectors), axis=1))[:, np.newaxis]
+    flip = vectors.dot([1, 10e-3, 10e-6]) < 0
+    vectors[flip] *= -1
+    _, first, groups = np.unique(np.round(vectors, decimals), axis=0, return_index=True, return_inverse=True)
+    weights = np.bincount(np.ravel(groups), weights=weights)
+    order = np.argsort(-weights, kind='stable')
+    return vectors[first[order]], weights[order]
+
+
+def _hull_edges(hull):
+    '''The (E x 2) edges of a 3D ConvexHull (pairs of indices of points) and the (E x 2) faces that share each one.
+    '''
+    faces = np.repeat(np.arange(len(hull.simplices)), 3)
+    opposite = np.tile(np.arange(3), len(hull.simplices))    # The edge that is opposite to the k-th vertex.
+    neighbors = hull.neighbors.ravel()
+    keep = faces < neighbors
+    faces, opposite, neighbors = faces[keep], opposite[keep], neighbors[keep]
+    edges = np.stack([hull.simplices[faces, (opposite + 1) % 3], hull.simplices[faces, (opposite + 2) % 3]], axis=1)
+    return edges, np.stack([faces, neighbors], axis=1)
+
+
+def _flush_rotations(points, hull, normals, max_block=2 ** 22):
+    '''For every normal, the rotation of the box that has a face perpendicular to the normal and the minimum area
+    rectangle of the projection of the hull (along the normal) as its cross section. The sides of the projection
+    of the hull are the projections of the silhouette edges, i.e., those between a face that faces the normal and
+    one that does not, thus the rectangle has a side parallel to (the projection of) one of them. The K silhouette
+    edges of all normals are compared at once (O(K^2) per normal), in blocks of normals.
+    Returns:
+        (F x 3 x 3) numpy array.
+    '''
+    edges, edge_faces = _hull_edges(hull)
+    facing = hull.equations[:, :3].dot(normals.T) > 0
+    normal_ids, edge_ids = np.nonzero((facing[edge_faces[:, 0]] != facing[edge_faces[:, 1]]).T)
+    counts = np.bincount(normal_ids, minlength=len(normals))
+    first = np.cumsum(counts) - counts
+    k = np.max(counts)
+    # Pad the silhouette of every normal to k edges by repeating its first edge (which changes no extent).
+    slots = first[:, np.newaxis] + np.minimum(np.arange(k), counts[:, np.newaxis] - 1)
+    silhouettes = edges[edge_ids[slots]]
+
+    res = np.empty((len(normals), 3, 3))
+    block = max(1, max_block // (4 * k * k))
+    for start in range(0, len(normals), block):
+        n = normals[start:start + block]
+        ends = points[silhouettes[start:start + block]]    # (B x k x 2 x 3)
+        sides = ends[:, :, 1] - ends[:, :, 0]
+        sides -= np.sum(sides * n[:, np.newaxis], axis=2)[:, :, np.newaxis] * n[:, np.newaxis]
+        lengths = np.sqrt(np.sum(np.square(sides), axis=2))
+        sides /= np.maximum(lengths, 10e-12)[:, :, np.newaxis]
+        across = np.cross(n[:, np.newaxis], sides)
+        corners = ends.reshape(len(n), 2 * k, 3).transpose(0, 2, 1)
+        along_extent = np.matmul(sides, corners)
+        across_extent = np.matmul(across, corners)
+        areas = (np.max(along_extent, axis=2) - np.min(along_extent, axis=2)) * \
+            (np.max(across_extent, axis=2) - np.min(across_extent, axis=2))
+        areas[lengths <= 10e-12] = np.inf
+        best = np.argmin(areas, axis=1)
+        rows = np.arange(len(n))
+        res[start:start + block] = np.stack([n, sides[rows, best], across[rows, best]], axis=1)
+    return res
+
+
+def _rotations_about_axes(angle):
+    '''The (6 x 3 x 3) rotations by +/- angle about each of the three coordinate axes.
+    '''
+    res = []
+    for k in range(3):
+        i, j = (k + 1) % 3, (k + 2) % 3
+        for sign in (-1, 1):
+            g = np.eye(3)
+            g[i, i] = g[j, j] = np.cos(angle)
+            g[i, j] = -sign * np.sin(angle)
+            g[j, i] = sign * np.sin(angle)
+            res.append(g)
+    return np.array(res)
+
+
+def _box_volumes(points, rotations):
+    local = np.matmul(rotations, points.T)
+    return np.prod(np.max(local, axis=2) - np.min(local, axis=2), axis=1)
+
+
+def _fit_to_rotations(points, rotations):
+    '''The boxes with the given (C x 3 x 3) rotations that bound the (N x 3) points, as (centers, half_sizes).
+    '''
+    local = np.matmul(rotations, points.T)   # (C x 3 x N)
+    lo, hi = np.min(local, axis=2), np.max(local, axis=2)
+    centers = np.matmul(((lo + hi) / 2.0)[:, np.newaxis], rotations)[:, 0]
+    return centers, (hi - lo) / 2.0
+
+
+def pca_boxes(point_sets):
+    '''Fits to every point set the bounding box whose axes are the principal directions of the points (in
+    decreasing variance).
+    Args:
+        point_sets (B x N x 3 numpy array, or list of (N_i x 3) numpy arrays).
+    Returns:
+        Oriented_Box_Set with B boxes.
+    '''
+    batch, mask = _as_batch(point_sets)
+    weights = mask[:, :, np.newaxis].astype(np.float64)
+    n_points = np.sum(weights, axis=1)
+    means = np.sum(batch * weights, axis=1) / n_points
+    centered = (batch - means[:, np.newaxis]) * weights
+    covariances = np.matmul(centered.transpose(0, 2, 1), centered) / n_points[:, :, np.newaxis]
+    _, eigenvectors = np.linalg.eigh(covariances)
+    rotations = eigenvectors.transpose(0, 2, 1)[:, ::-1].copy()
+    rotations[:, 2] *= np.sign(np.linalg.det(rotations))[:, np.newaxis]     # Right-handed.
+
+    local = np.matmul(centered, rotations.transpose(0, 2, 1))
+    lo = np.min(np.where(mask[:, :, np.newaxis], local, np.inf), axis=1)
+    hi = np.max(np.where(mask[:, :, np.newaxis], local, -np.inf), axis=1)
+    centers = means + np.matmul(((lo + hi) / 2.0)[:, np.newaxis], rotations)[:, 0]
+    return Oriented_Box_Set(centers, rotations, (hi - lo) / 2.0)
+
+
+def min_volume_box(points, max_normals=256, max_hull_vertices=2048, refine=True):
+    '''Fits a tight bounding box to a point set. For every (distinct) face normal of the convex hull of the points,
+    the box with a face perpendicular to the normal and the minimum area rectangle of the projection of the hull as
+    cross section is considered (see _flush_rotations). The smallest of these boxes (or the PCA box, if that is
+    smaller) is then refined by small rotations about its axes, as long as they shrink it. The boxes with a face
+    flush with a face of the hull include the optimal box for most shapes, e.g., for all boxes and polyhedra with a
+    face on the optimal box [O'Rourke 85].
+    Complexity: one 3D hull of the N points, O(N log N), then O(F * (h + K^2)) for F normals, the h vertices of the
+    hull and the K edges of the silhouettes (K is small, e.g., O(sqrt(h)) for smooth shapes). The normals are
+    grouped at an angular tolerance of about 10^-3 and only the max_normals of the largest (total) hull area are
+    tried, and hulls with more than max_hull_vertices vertices (e.g., of densely sampled curved shapes) are searched
+    (and refined) on the hull of a (fixed) random subset of max_hull_vertices of their vertices; the box is always
+    fitted to all the points.
+    Args:
+        points (N x 3 numpy array).
+        max_normals (int): the largest number of normals that are tried.
+        max_hull_vertices (int): the largest number of hull vertices that the search uses.
+        refine (boolean): if True, the box is refined by local rotations.
+    Returns:
+        center (3), rotation (3 x 3), half_sizes (3) numpy arrays.
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    best = pca_boxes(points[np.newaxis])
+    best_rotation, best_volume = best.rotations[0], best.volumes()[0]
+    try:
+        hull = ConvexHull(points)
+    except Exception:     # Too few, or coplanar, points: the PCA box is (near) optimal.
+        return best.centers[0], best.rotations[0], best.half_sizes[0]
+
+    hull_points = points[hull.vertices]
+    search_points = hull_points
+    if len(hull_points) > max_hull_vertices:
+        subset = np.random.RandomState(0).choice(len(hull_points), max_hull_vertices, replace=False)
+        search_points = hull_points[subset]
+        hull = ConvexHull(search_points)
+        best_volume = _box_volumes(search_points, best_rotation[np.newaxis])[0]
+
+    s = hull.simplices
+    p = hull.points
+    face_areas = np.sqrt(np.sum(np.square(np.cross(p[s[:, 1]] - p[s[:, 0]], p[s[:, 2]] - p[s[:, 0]])), axis=1))
+    normals, _ = _canonical_directions(hull.equations[:, :3], face_areas)
+    rotations = _flush_rotations(p, hull, normals[:max_normals])
+    volumes = _box_volumes(search_points, rotations)
+    i = np.argmin(volumes)
+    if volumes[i] < best_volume:
+        best_rotation, best_volume = rotations[i], volumes[i]
+
+    if refine:
+        angle = 0.05
+        for _ in range(200):
+            if angle < 10e-5:
+                break
+            rotations = np.matmul(_rotations_about_axes(angle), best_rotation)
+            volumes = _box_volumes(search_points, rotations)
+            i = np.argmin(volumes)
+            if volumes[i] < best_volume * (1 - 10e-9):
+                best_rotation, best_volume = rotations[i], volumes[i]
+            else:
+                angle /= 2.0
+
+    centers, half_sizes = _fit_to_rotations(hull_points, best_rotation[np.newaxis])
+    return centers[0], best_rotation, half_sizes[0]
+
+
+def min_volume_boxes(point_sets, n_workers=1):
+    '''Fits min_volume_box to every point set.
+    Args:
+        point_sets (B x N x 3 numpy array, or list of (N_i x 3) numpy arrays).
+        n_workers (int): if larger than 1, the point sets are processed by a pool of processes.
+    Returns:
+        Oriented_Box_Set with B boxes.
+    '''
+    if n_workers > 1 and len(point_sets) > 1:
+        pool = Pool(n_workers)
+        try:
+            boxes = pool.map(min_volume_box, point_sets)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        boxes = [min_volume_box(p) for p in point_sets]
+    centers, rotations, half_sizes = zip(*boxes)
+    return Oriented_Box_Set(np.array(centers), np.array(rotations), np.array(half_sizes))
+
+
+def _corners(centers, rotations, half_sizes):
+    return centers[:, np.newaxis] + np.matmul(_corner_signs * half_sizes[:, np.newaxis], rotations)
+
+
+def _separated(c_a, r_a, h_a, c_b, r_b, h_b):
+    '''Separating axis test of P pairs of boxes, on the 3 + 3 face normals and the 9 cross products of their axes.
+    Returns:
+        (P) boolean numpy array, True for the pairs that do not intersect.
+    '''
+    crosses = np.cross(r_a[:, :, np.newaxis], r_b[:, np.newaxis, :]).reshape(-1, 9, 3)
+    crosses[np.sum(np.square(crosses), axis=2) < 10e-12] = 0    # Parallel axes do not separate.
+    axes = np.concatenate([r_a, r_b, crosses], axis=1)    # (P x 15 x 3)
+    distance = np.abs(np.sum(axes * (c_b - c_a)[:, np.newaxis], axis=2))
+    radius_a = np.sum(np.abs(np.matmul(axes, r_a.transpose(0, 2, 1))) * h_a[:, np.newaxis], axis=2)
+    radius_b = np.sum(np.abs(np.matmul(axes, r_b.transpose(0, 2, 1))) * h_b[:, np.newaxis], axis=2)
+    return np.any(distance > radius_a + radius_b, axis=1)
+
+
+def _edge_face_points(corners_a, c_b, r_b, h_b):
+    '''The points where the edges of P boxes (given by their (P x 8 x 3) corners) cross the face planes of P other
+    boxes. Returns a (P x 72 x 3) numpy array, with NaN where an edge does not cross a plane.
+    '''
+    local = np.matmul(corners_a - c_b[:, np.newaxis], r_b.transpose(0, 2, 1))
+    start, delta = local[:, _edges[:, 0]], local[:, _edges[:, 1]] - local[:, _edges[:, 0]]    # (P x 12 x 3)
+    res = []
+    for sign in (-1, 1):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = (sign * h_b[:, np.newaxis] - start) / delta    # The k-th column crosses the plane of the k-th axis.
+        t[~((t >= 0) & (t <= 1))] = np.nan
+        crossing = start[:, :, np.newaxis] + t[:, :, :, np.newaxis] * delta[:, :, np.newaxis]
+        res.append(crossing.reshape(len(local), -1, 3))
+    res = np.concatenate(res, axis=1)
+    return c_b[:, np.newaxis] + np.matmul(res, r_b)
+
+
+def _inside(points, centers, rotations, half_sizes, tolerance):
+    local = np.matmul(points - centers[:, np.newaxis], rotations.transpose(0, 2, 1))
+    return np.all(np.abs(local) <= half_sizes[:, np.newaxis] + tolerance[:, np.newaxis, np.newaxis], axis=2)
+
+
+def _intersection_volumes(a, b):
+    '''Intersection volumes of P pairs of boxes given as (centers, rotations, half_sizes).
+    '''
+    res = np.zeros(len(a[0]))
+    corners_a, corners_b = _corners(*a), _corners(*b)
+    points = np.concatenate([corners_a, corners_b, _edge_face_points(corners_a, *b),
+                             _edge_face_points(corners_b, *a)], axis=1)
+    tolerance = 10e-10 * np.maximum(np.max(a[2], axis=1), np.max(b[2], axis=1))
+    finite = np.all(np.isfinite(points), axis=2)
+    points[~finite] = 0
+    valid = finite & _inside(points, a[0], a[1], a[2], tolerance) & _inside(points, b[0], b[1], b[2], tolerance)
+    for i in range(len(res)):
+        polytope = points[i, valid[i]]
+        if len(polytope) < 4:
+            continue
+        try:
+            res[i] = ConvexHull(polytope).volume
+        except Exception:   # Flat intersection (touching boxes).
+            pass
+    return res
+
+
+def pairwise_intersections(boxes_a, boxes_b, block_size=2 ** 14):
+    '''Volumes of the intersections of the P pairs of boxes (boxes_a[i], boxes_b[i]). Pairs that the separating
+    axis test finds disjoint are skipped, for the rest the intersection is the convex hull of the corners of each box
+    that are in the other and of the points where the edges of each box cross the faces of the other.
+    Args:
+        boxes_a, boxes_b (Oriented_Box_Set) of equal lengths.
+        block_size (int): the number of intersecting pairs processed at once.
+    Returns:
+        (P) numpy array.
+    '''
+    if len(boxes_a) != len(boxes_b):
+        raise ValueError('The two sets must have the same number of boxes.')
+    a = (boxes_a.centers, boxes_a.rotations, boxes_a.half_sizes)
+    b = (boxes_b.centers, boxes_b.rotations, boxes_b.half_sizes)
+    res = np.zeros(len(boxes_a))
+    candidates = np.where(~_separated(*(a + b)))[0]
+    if len(candidates) == 0:
+        return res
+    for start in range(0, len(candidates), block_size):
+        pairs = candidates[start:start + block_size]
+        res[pairs] = _intersection_volumes([x[pairs] for x in a], [x[pairs] for x in b])
+    return res
+
+
+class Oriented_Box(object):
+    '''
+    A 3D box with arbitrary orientation.
+    '''
+
+    def __init__(self, center, rotation, half_sizes):
+        '''
+        Constructor.
+            Args: center (3), rotation (3 x 3, rows are the axes of the box) and half_sizes (3) numpy arrays.
+        '''
+        self.center = np.asarray(center, dtype=np.float64)
+        self.rotation = np.asarray(rotation, dtype=np.float64)
+        self.half_sizes = np.asarray(half_sizes, dtype=np.float64)
+        if np.any(self.half_sizes < 0):
+            raise ValueError('The half sizes of a box must be non-negative.')
+
+    def __str__(self):
+        return 'Oriented Box with center = %s and sizes = %s.' % (str(self.center), str(2 * self.half_sizes))
+
+    def _as_set(self):
+        return Oriented_Box_Set(self.center[np.newaxis], self.rotation[np.newaxis], self.half_sizes[np.newaxis])
+
+    @property
+    def corners(self):
+        '''(8 x 3) numpy array, in the order of the corners of Cuboid.
+        '''
+        return self._as_set().corners()[0]
+
+    def volume(self):
+        return np.prod(2 * self.half_sizes)
+
+    def diagonal_length(self):
+        return 2 * np.sqrt(np.sum(np.square(self.half_sizes)))
+
+    def is_point_inside(self, points):
+        '''Boolean mask of the (N x 3) points that are in the box (boundary included).
+        '''
+        local = (np.asarray(points) - self.center).dot(self.rotation.T)
+        return np.all(np.abs(local) <= self.half_sizes, axis=-1)
+
+    def intersection_with(self, other):
+        return pairwise_intersections(self._as_set(), other._as_set())[0]
+
+    def union_with(self, other):
+        return self.volume() + other.volume() - self.intersection_with(other)
+
+    def iou_with(self, other):
+        return self._as_set().iou_with(other._as_set())[0, 0]
+
+    def axis_aligned_box(self):
+        '''The (axis aligned) Cuboid that bounds this box.
+        '''
+        return Cuboid.bounding_box_of_3d_points(self.corners)
+
+    @staticmethod
+    def from_cuboid(cuboid):
+        e = np.asarray(cuboid.extrema, dtype=np.float64)
+        return Oriented_Box((e[:3] + e[3:]) / 2.0, np.eye(3), (e[3:] - e[:3]) / 2.0)
+
+
+class Oriented_Box_Set(object):
+    '''
+    A set of N Oriented_Boxes, with (N x 3) centers, (N x 3 x 3) rotations and (N x 3) half_sizes.
+    '''
+
+    def __init__(self, centers, rotations, half_sizes):
+        self.centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        self.rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+        self.half_sizes = np.asarray(half_sizes, dtype=np.float64).reshape(-1, 3)
+        if not len(self.centers) == len(self.rotations) == len(self.half_sizes):
+            raise ValueError('The centers, rotations and half sizes must describe the same number of boxes.')
+
+    def __str__(self):
+        return 'Set of %d Oriented Boxes.' % (len(self), )
+
+    def __len__(self):
+        return len(self.centers)
+
+    def __getitem__(self, key):
+        '''A single box for an integer key, otherwise (slices, masks, index arrays) a set of the selected boxes.
+        '''
+        if isinstance(key, (int, np.integer)):
+            return Oriented_Box(self.centers[key], self.rotations[key], self.half_sizes[key])
+        return Oriented_Box_Set(self.centers[key], self.rotations[key], self.half_sizes[key])
+
+    def volumes(self):
+        return np.prod(2 * self.half_sizes, axis=1)
+
+    def corners(self):
+        '''(N x 8 x 3) numpy array.
+        '''
+        return _corners(self.centers, self.rotations, self.half_sizes)
+
+    def axis_aligned_boxes(self):
+        '''The (N x 6) extrema of the axis aligned boxes that bound the boxes, e.g., for a Cuboid_Set.
+        '''
+        reach = np.sum(np.abs(self.rotations) * self.half_sizes[:, :, np.newaxis], axis=1)
+        return np.hstack([self.centers - reach, self.centers + reach])
+
+    def _pairs(self, other):
+        ids_a, ids_b = np.meshgrid(np.arange(len(self)), np.arange(len(other)), indexing='ij')
+        return ids_a.ravel(), ids_b.ravel()
+
+    def intersects(self, other):
+        '''(N x M) boolean matrix of the pairs of boxes of this and another set that intersect.
+        '''
+        a, b = self._pairs(other)
+        separated = _separated(self.centers[a], self.rotations[a], self.half_sizes[a],
+                               other.centers[b], other.rotations[b], other.half_sizes[b])
+        return ~separated.reshape(len(self), len(other))
+
+    def intersection_with(self, other):
+        '''(N x M) matrix of the intersection volumes of the boxes of this set with those of another set.
+        '''
+        a, b = self._pairs(other)
+        return pairwise_intersections(self[a], other[b]).reshape(len(self), len(other))
+
+    def iou_with(self, other):
+        inter = self.intersection_with(other)
+        union = self.volumes()[:, np.newaxis] + other.volumes()[np.newaxis, :] - inter
+        np.divide(inter, union, out=inter, where=union > 0)
+        inter[union <= 0] = 0
+        return inter
+
+    @staticmethod
+    def from_cuboid_set(cuboids):
+        '''The Oriented_Box_Set of the boxes of a Cuboid_Set.
+        '''
+        e = np.asarray(cuboids.extrema, dtype=np.float64)
+        return Oriented_Box_Set((e[:, :3] + e[:, 3:]) / 2.0, np.tile(np.eye(3), (len(e), 1, 1)),
+                                (e[:, 3:] - e[:, :3]) / 2.0)
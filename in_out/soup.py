@@ -10,13 +10,9 @@ import os
 import warnings
 import re
 import numpy as np
-from glob import glob
 from .. external_code.python_plyfile.plyfile import PlyElement, PlyData
 
-try:
-    import cv2
-except:
-    warnings.warn('OpenCV library is not installed.')
+from . views import load_views, batch_whitening
 
 # TODO Break down in more in_out modules
 
@@ -50,54 +46,29 @@ def name_to_cam_position(file_name, cam_delim='-'):
 
 
 def read_triangle_file(file_name):
-    with open(file_name, 'r') as f_in:
-        all_lines = f_in.readlines()
-    n = len(all_lines)
-    triangles = np.empty((n, 3), dtype=np.int32)
-    pixels = np.empty((n, 2), dtype=np.int32)
-    hit_coords = np.empty((n, 3), dtype=np.float32)
-    for i in xrange(n):
-        tokens = all_lines[i].rstrip().split(' ')
-        pixels[i, :] = [int(tokens[0]), int(tokens[1])]
-        triangles[i, :] = [int(tokens[2]), int(tokens[3]), int(tokens[4])]
-        hit_coords[i, :] = [float(tokens[5]), float(tokens[6]), float(tokens[7])]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')     # Views that see no triangles have empty files.
+        data = np.loadtxt(file_name, ndmin=2).reshape(-1, 8)
+    pixels = data[:, 0:2].astype(np.int32)
+    triangles = data[:, 2:5].astype(np.int32)
+    hit_coords = data[:, 5:8].astype(np.float32)
     return pixels, triangles, hit_coords
 
 
-def load_views_of_shape(view_folder, file_format, shape_views=None, reshape_to=None):
-    view_list = []
-    cam_pos = []
-    view_mask = []
-
-    searh_pattern = os.path.join(view_folder, '*.' + file_format)
-    for view in glob(searh_pattern):
-        image = cv2.imread(view, 0)     # Convert to Gray-Scale
-        if reshape_to is not None:
-            image = cv2.resize(image, reshape_to)
-
-        reshape_to = image.shape
-        view_mask.append(image != 0)  # Compute mask before whiten is applied.
-        # if whiten:
-        #   image = per_image_whitening(image)
-        view_list.append(image)
-        cam_pos.append(name_to_cam_position(view))
-
-    if shape_views and len(view_list) != shape_views:
-        raise IOError('Number of view files (%d) doesn\'t match the expected ones (%d)' % (len(view_list), shape_views))
-    elif len(view_list) == 0:
-        raise IOError('There are no files of given format in this folder.')
-    else:
-        shape_views = len(view_list)
-
-    views_tensor = np.reshape(view_list, (shape_views, reshape_to[0], reshape_to[1]))
-    return views_tensor, cam_pos, np.array(view_mask)
+def load_views_of_shape(view_folder, file_format, shape_views=None, reshape_to=None, n_threads=4, cache_file=None):
+    '''Returns the (V x H x W) tensor with the views of a shape, the list of their [vertex_id, twist_id] and their
+    (non-zero pixel) masks. See views.load_views.
+    '''
+    views_tensor, cam_pos, view_mask = load_views(view_folder, file_format, shape_views, reshape_to, n_threads,
+                                                  cache_file)
+    return views_tensor, cam_pos.tolist(), view_mask
 
 
 def format_image_tensor_for_tf(im_tensor, whiten=True):
-    new_tensor = np.zeros(im_tensor.shape, dtype=np.float32)
     if whiten:
-        for ind, im in enumerate(im_tensor):
-            new_tensor[ind, :, :] = per_image_whitening(im)
+        new_tensor = batch_whitening(im_tensor)
+    else:
+        new_tensor = np.array(im_tensor, dtype=np.float32)
     return np.expand_dims(new_tensor, 3)             # Add singleton trailing dimension.
 
 
@@ -0,0 +1,153 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Loading of the rendered (gray-scale) views of shapes into (V x H x W) tensors. The images of a shape are decoded by a
+pool of threads (OpenCV releases the GIL while decoding and resizing) straight into a preallocated buffer, and the
+decoded tensors can be cached on disk (one compressed .npz per shape), so that a dataset is decoded only once.
+'''
+
+import os
+import re
+import warnings
+import numpy as np
+from glob import glob
+from multiprocessing.pool import ThreadPool
+
+try:
+    import cv2
+except:
+    warnings.warn('OpenCV library is not installed.')
+
+_cam_regex = dict()
+
+
+def cam_positions_of_files(file_names, cam_delim='-'):
+    '''The (n_files x 2) numpy array with the (vertex_id, twist_id) of each rendered view file, see
+    soup.name_to_cam_position.
+    '''
+    if cam_delim not in _cam_regex:
+        _cam_regex[cam_delim] = re.compile(r'%s?(\d+)%s(\d+)' % (cam_delim, cam_delim))
+    regex = _cam_regex[cam_delim]
+    res = np.empty((len(file_names), 2), dtype=np.int32)
+    for i, f in enumerate(file_names):
+        match = regex.search(os.path.basename(f))
+        res[i] = match.group(1), match.group(2)
+    return res
+
+
+def batch_whitening(im_tensor):
+    '''Linearly scales every image of a (V x H x W) tensor to have zero mean and unit (variance) norm, see
+    soup.per_image_whitening. Returns a new float32 tensor.
+    '''
+    res = np.array(im_tensor, dtype=np.float32)
+    n_elems = np.prod(res.shape[1:])
+    res -= np.mean(res, axis=(1, 2), keepdims=True)
+    res /= np.maximum(np.std(res, axis=(1, 2), keepdims=True), 1.0 / np.sqrt(n_elems))  # Cap stdev away from zero.
+    return res
+
+
+def _map_in_threads(job, n_jobs, n_threads):
+    if n_threads > 1 and n_jobs > 1:
+        pool = ThreadPool(min(n_threads, n_jobs))
+        try:
+            pool.map(job, range(n_jobs))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for i in range(n_jobs):
+            job(i)
+
+
+def resize_views(im_tensor, reshape_to, n_threads=4):
+    '''Resizes every image of a (V x H x W) tensor to reshape_to = (width, height) (the cv2.resize convention).
+    The images are resized in parallel into one preallocated (V x height x width) tensor.
+    '''
+    res = np.empty((len(im_tensor), reshape_to[1], reshape_to[0]), dtype=im_tensor.dtype)
+
+    def job(i):
+        res[i] = cv2.resize(im_tensor[i], tuple(reshape_to))
+
+    _map_in_threads(job, len(im_tensor), n_threads)
+    return res
+
+
+def decode_views(file_names, reshape_to=None, n_threads=4):
+    '''Decodes (as gray-scale) and optionally resizes (reshape_to = (width, height)) a list of image files of equal
+    size into a (V x H x W) uint8 tensor.
+    '''
+    first = cv2.imread(file_names[0], 0)
+    if first is None:
+        raise IOError('Cannot decode image %s.' % (file_names[0], ))
+    if reshape_to is not None:
+        first = cv2.resize(first, tuple(reshape_to))
+    res = np.empty((len(file_names), ) + first.shape, dtype=first.dtype)
+    res[0] = first
+
+    def job(i):
+        if i == 0:
+            return
+        image = cv2.imread(file_names[i], 0)
+        if image is None:
+            raise IOError('Cannot decode image %s.' % (file_names[i], ))
+        if reshape_to is not None:
+            image = cv2.resize(image, tuple(reshape_to))
+        if image.shape != first.shape:
+            raise IOError('The views have different sizes: %s (%s vs. %s).' % (file_names[i], image.shape, first.shape))
+        res[i] = image
+
+    _map_in_threads(job, len(file_names), n_threads)
+    return res
+
+
+def _cache_is_fresh(cache_file, file_names, reshape_to):
+    if not os.path.isfile(cache_file):
+        return False
+    if max(os.path.getmtime(f) for f in file_names) > os.path.getmtime(cache_file):
+        return False
+    with np.load(cache_file) as data:
+        cached_files = [str(f) for f in data['file_names']]
+        cached_reshape = tuple(data['reshape_to'])
+    wanted_reshape = () if reshape_to is None else tuple(reshape_to)
+    return cached_files == [os.path.basename(f) for f in file_names] and cached_reshape == wanted_reshape
+
+
+def load_views(view_folder, file_format, shape_views=None, reshape_to=None, n_threads=4, cache_file=None):
+    '''Loads the rendered views of a shape, in increasing (vertex_id, twist_id) order.
+    Args:
+        shape_views (int, optional) the expected number of views.
+        reshape_to ((width, height), optional) the size to which the views are resized.
+        n_threads (int) the number of threads decoding the images.
+        cache_file (String, optional) a .npz file with the decoded views. If it exists and is newer than all the
+            view files (and was made with the same reshape_to), the views are read from it. Otherwise, it is
+            (re)written after decoding.
+    Returns:
+        views (V x H x W uint8 numpy array), cam_pos (V x 2 numpy array) their (vertex_id, twist_id) and
+        masks (V x H x W boolean numpy array) the non-zero pixels of the views.
+    '''
+    file_names = glob(os.path.join(view_folder, '*.' + file_format))
+    if shape_views and len(file_names) != shape_views:
+        raise IOError('Number of view files (%d) doesn\'t match the expected ones (%d)' % (len(file_names), shape_views))
+    elif len(file_names) == 0:
+        raise IOError('There are no files of given format in this folder.')
+
+    cam_pos = cam_positions_of_files(file_names)
+    order = np.lexsort((cam_pos[:, 1], cam_pos[:, 0]))
+    file_names = [file_names[i] for i in order]
+    cam_pos = cam_pos[order]
+
+    if cache_file is not None and not cache_file.endswith('.npz'):
+        cache_file += '.npz'    # As np.savez does.
+
+    if cache_file is not None and _cache_is_fresh(cache_file, file_names, reshape_to):
+        with np.load(cache_file) as data:
+            views = data['views']
+    else:
+        views = decode_views(file_names, reshape_to, n_threads)
+        if cache_file is not None:
+            np.savez_compressed(cache_file, views=views, cam_pos=cam_pos,
+                                file_names=np.array([os.path.basename(f) for f in file_names]),
+                                reshape_to=np.array([] if reshape_to is None else reshape_to, dtype=np.int64))
+    return views, cam_pos, views != 0
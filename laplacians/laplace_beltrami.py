@@ -96,6 +96,61 @@ class Laplace_Beltrami(object):
                 E.append([])
         return E, cc_at_thres
 
+    def fiedler_vectors(self, area_type='barycentric', thres=1, min_nodes=None, tol=10e-6, max_iter=200):
+        '''Computes the Fiedler eigen-pair of the LB operator of each connected component of the mesh.
+        Unlike multi_component_spectra, no copy of the mesh is made per component: the stiffness and the mass
+        matrices are restricted on the component and a constant-deflated LOBPCG is used (see
+        Graph.fiedler_of_laplacian). Each solve is warm-started with the principal coordinate of the vertices
+        of the component, which approximates well the Fiedler vector of elongated parts.
+
+        Returns:
+            F (list) F[i] is the (eval, evec) Fiedler pair of the i-th component, or [] if it was skipped.
+            cc_at_thres (list) the vertices of each component (see Graph.largest_connected_components_at_thres).
+        '''
+        _, node_labels = self.M.connected_components()
+        cc_at_thres = Graph.largest_connected_components_at_thres(node_labels, thres)
+        W = sparse.csr_matrix(self.W)
+        A = self.mass_of_vertices(area_type)
+        F = list()
+        for nodes in cc_at_thres:
+            if len(nodes) < 3 or (min_nodes is not None and len(nodes) < min_nodes):
+                F.append([])
+                continue
+            x0 = Laplace_Beltrami.principal_coordinate(self.M.vertices[nodes])
+            evals, evecs = Graph.fiedler_of_laplacian(W[nodes][:, nodes], sparse.diags(A[nodes]), x0=x0,
+                                                      tol=tol, max_iter=max_iter)
+            F.append((evals[0], evecs[:, 0]))
+        return F, cc_at_thres
+
+    def spectral_partition(self, n_parts, area_type='barycentric', split='median'):
+        '''Partitions the vertices of the mesh in n_parts via recursive spectral bisection with the LB operator.
+        Every connected component of the mesh is (at least) one part. See Graph.spectral_partition_of_laplacian.
+        Returns:
+            (num_vertices numpy array) with the part id of each vertex.
+        '''
+        A = self.mass_of_vertices(area_type)
+        return Graph.spectral_partition_of_laplacian(self.W, n_parts, sparse.diags(A), split=split)
+
+    def mass_of_vertices(self, area_type='barycentric'):
+        '''The diagonal of the (lumped) mass matrix. Non positive areas are replaced by the smallest positive one
+        to keep the mass matrix positive definite.
+        '''
+        A = self.M.area_of_vertices(area_type)[:, 0]
+        bad = A <= 0
+        if bad.any():
+            warnings.warn('Vertices with non positive area were found. Their area is set to the smallest positive one.')
+            A = A.copy()
+            A[bad] = np.min(A[~bad])
+        return A
+
+    @staticmethod
+    def principal_coordinate(points):
+        '''Projects the (centered) points on their direction of largest variance.
+        '''
+        centered = points - np.mean(points, axis=0)
+        _, _, v = np.linalg.svd(centered, full_matrices=False)
+        return centered.dot(v[0])
+
     @staticmethod
     def cotangent_laplacian(in_mesh):
         '''Computes the cotangent laplacian weight matrix. Also known as the stiffness matrix.
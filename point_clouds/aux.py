@@ -3,20 +3,24 @@ Created on Aug 21, 2017
 
 @author: optas
 '''
-import warnings
 import numpy as np
-from sklearn.neighbors import NearestNeighbors
-from scipy.sparse.linalg import eigs
+from scipy.spatial import cKDTree
 from numpy.linalg import norm
 
-from .. fundamentals import Graph
-from .. utils.linalg_utils import l2_norm
+from . point_cloud import Point_Cloud
+from . import spectral
 
-def greedy_match_pc_to_pc(from_pc, to_pc):
-    '''map from_pc points to to_pc by minimizing the from-to-to euclidean distance.'''
-    nn = NearestNeighbors(n_neighbors=1).fit(to_pc)
-    distances, indices = nn.kneighbors(from_pc)
-    return indices, distances
+
+def greedy_match_pc_to_pc(from_pc, to_pc, workers=-1):
+    '''map from_pc points to to_pc by minimizing the from-to-to euclidean distance.
+    The inputs are (N x 3) numpy arrays or Point_Clouds. If to_pc is a Point_Cloud its cached spatial index is used.
+    '''
+    if isinstance(from_pc, Point_Cloud):
+        from_pc = from_pc.points
+    if isinstance(to_pc, Point_Cloud):
+        return to_pc.query_nearest_neighbors(from_pc, k=1, workers=workers)
+    distances, indices = cKDTree(to_pc).query(from_pc, k=1, workers=workers)
+    return indices.reshape(-1, 1), distances.reshape(-1, 1)
 
 
 def chamfer_pseudo_distance(pc1, pc2):
@@ -27,25 +31,10 @@ def chamfer_pseudo_distance(pc1, pc2):
 
 def laplacian_spectrum(pc, n_evecs, k=6):
     ''' k: (int) number of nearest neighbors each point is connected with in the constructed Adjacency
-    matrix that will be used to derive the Laplacian.
+    matrix that will be used to derive the Laplacian. See spectral.laplacian_spectrum, which also handles graphs
+    with more than one connected component.
     '''
-    neighbors_ids, distances = pc.k_nearest_neighbors(k)
-    A = Graph.knn_to_adjacency(neighbors_ids, distances)
-    if Graph.connected_components(A)[0] != 1:
-        raise ValueError('Graph has more than one connected component, increase k.')
-    A = (A + A.T) / 2.0
-    L = Graph.adjacency_to_laplacian(A, 'norm').astype('f4')
-    evals, evecs = eigs(L, n_evecs + 1, sigma=-10e-1, which='LM')
-    if np.any(l2_norm(evecs.imag, axis=0) / l2_norm(evecs.real, axis=0) > 1.0 / 100):
-        warnings.warn('Produced eigen-vectors are complex and contain significant mass on the imaginary part.')
-
-    evecs = evecs.real   # eigs returns complex values by default.
-    evals = evals.real
-
-    index = np.argsort(evals)  # Sort evals from smallest to largest
-    evals = evals[index]
-    evecs = evecs[:, index]
-    return evals, evecs
+    return spectral.laplacian_spectrum(pc, n_evecs, k=k, laplacian_type='norm', weighting='distance')
 
 
 def unit_cube_grid_point_cloud(resolution, clip_sphere=False):
@@ -55,12 +44,10 @@ def unit_cube_grid_point_cloud(resolution, clip_sphere=False):
     '''
     grid = np.ndarray((resolution, resolution, resolution, 3), np.float32)
     spacing = 1.0 / float(resolution - 1)
-    for i in xrange(resolution):
-        for j in xrange(resolution):
-            for k in xrange(resolution):
-                grid[i, j, k, 0] = i * spacing - 0.5
-                grid[i, j, k, 1] = j * spacing - 0.5
-                grid[i, j, k, 2] = k * spacing - 0.5
+    axis = np.arange(resolution) * spacing - 0.5
+    grid[..., 0] = axis[:, np.newaxis, np.newaxis]
+    grid[..., 1] = axis[np.newaxis, :, np.newaxis]
+    grid[..., 2] = axis[np.newaxis, np.newaxis, :]
 
     if clip_sphere:
         grid = grid.reshape(-1, 3)
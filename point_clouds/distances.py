@@ -0,0 +1,217 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Distances between (batches of) point-clouds: Chamfer and (an entropic approximation of) the Earth Mover's.
+The pairwise matrices are computed over tiles of pairs, thus the memory stays bounded regardless of the number of
+clouds, and the tiles are processed by a pool of threads (the heavy lifting happens in cKDTree and numpy, which
+release the GIL).
+
+DOI: P. Achlioptas, O. Diamanti, I. Mitliagkas, L. Guibas.
+Learning Representations and Generative Models for 3D Point Clouds. ICML, 2018.
+'''
+
+import warnings
+import numpy as np
+from multiprocessing.pool import ThreadPool
+from scipy.spatial import cKDTree
+
+
+def _reduce(distances, reduce, squared):
+    if squared:
+        distances = np.square(distances)
+    if reduce == 'mean':
+        return np.mean(distances)
+    elif reduce == 'sum':
+        return np.sum(distances)
+    else:
+        raise ValueError('reduce must be either \'mean\', or \'sum\'.')
+
+
+def _run(job, items, n_workers):
+    if n_workers > 1:
+        pool = ThreadPool(n_workers)
+        try:
+            return pool.map(job, items)
+        finally:
+            pool.close()
+            pool.join()
+    return [job(item) for item in items]
+
+
+def chamfer_distance(pc_a, pc_b, reduce='mean', squared=False):
+    '''Chamfer distance between two point-clouds ((N x 3) and (M x 3) numpy arrays), i.e., the sum of the
+    (reduced) distances of every point of one cloud to its nearest point in the other, in both directions.
+    Args:
+        reduce (String) 'mean' or 'sum' of the point distances, per direction.
+        squared (boolean) if True, the squared euclidean distances are reduced.
+    '''
+    d_ab = cKDTree(pc_b).query(pc_a, k=1)[0]
+    d_ba = cKDTree(pc_a).query(pc_b, k=1)[0]
+    return _reduce(d_ab, reduce, squared) + _reduce(d_ba, reduce, squared)
+
+
+def chamfer_distance_matrix(clouds_a, clouds_b=None, reduce='mean', squared=False, n_workers=1):
+    '''Chamfer distances between all pairs of two sets of point-clouds.
+    Args:
+        clouds_a (list of (N_i x 3) numpy arrays, or B1 x N x 3 numpy array).
+        clouds_b (list or numpy array, optional) if None, the (symmetric) all-vs-all matrix of clouds_a is computed.
+        n_workers (int) number of threads. Each one processes a row of the matrix.
+    Returns:
+        (B1 x B2) numpy array.
+    Notes: the KD-tree of every cloud is built once and it is reused for all the pairs it participates in.
+    '''
+    symmetric = clouds_b is None
+    trees_a = _run(cKDTree, clouds_a, n_workers)
+    if symmetric:
+        clouds_b = clouds_a
+        trees_b = trees_a
+    else:
+        trees_b = _run(cKDTree, clouds_b, n_workers)
+    n_a = len(clouds_a)
+    n_b = len(clouds_b)
+
+    def row(i):
+        res = np.zeros(n_b)
+        start = i + 1 if symmetric else 0
+        for j in range(start, n_b):
+            d_ab = trees_b[j].query(clouds_a[i], k=1)[0]
+            d_ba = trees_a[i].query(clouds_b[j], k=1)[0]
+            res[j] = _reduce(d_ab, reduce, squared) + _reduce(d_ba, reduce, squared)
+        return res
+
+    D = np.vstack(_run(row, range(n_a), n_workers))
+    if symmetric:
+        D = D + D.T
+    return D
+
+
+def _soft_min(potentials, C, eps, buf):
+    '''-eps * log(sum_j exp((potentials_j - C_ij) / eps)) for every row i of the (P x N x M) C, computed stably
+    (log-sum-exp) in the preallocated buffer buf.
+    '''
+    np.subtract(potentials[:, np.newaxis, :], C, out=buf)
+    buf /= eps[:, np.newaxis, np.newaxis]
+    largest = np.max(buf, axis=2)
+    buf -= largest[:, :, np.newaxis]
+    np.exp(buf, out=buf)
+    return -eps[:, np.newaxis] * (largest + np.log(np.sum(buf, axis=2)))
+
+
+def sinkhorn_emd(clouds_a, clouds_b, epsilon=10e-3, n_iter=1000, reduce='mean', tolerance=10e-4, check_every=10):
+    '''Approximates the Earth Mover's distances between pairs of point-clouds with entropy regularized optimal
+    transport (Sinkhorn iterations), using uniform masses on the points and euclidean ground distances. The
+    iterations update the dual potentials in the log domain (in double precision), thus they do not underflow for
+    small epsilon.
+    Args:
+        clouds_a (P x N x 3 numpy array), clouds_b (P x M x 3 numpy array): the P pairs of clouds.
+        epsilon (float) the regularization, relative to the largest ground distance of each pair. Smaller values
+            approximate the EMD better (the cost of a converged plan is at least the EMD and at most about
+            epsilon * log(N * M) times the largest distance above it), but need more iterations to converge.
+        n_iter (int) the maximum number of iterations.
+        reduce (String) 'mean' gives the average distance a point travels, 'sum' gives that times N.
+        tolerance (float) the iterations stop when, for every pair, the masses that the transport plan moves out
+            of the points of clouds_a differ from the uniform ones by less than this (L1 norm, the total mass is 1).
+            If that does not happen in n_iter iterations, a warning is issued: the costs of the unconverged pairs
+            can be far from the EMD. Increase n_iter, or epsilon.
+        check_every (int) the iterations between two checks of the convergence.
+    Returns:
+        (P) numpy array with the transport cost of each pair.
+    '''
+    if reduce not in ('mean', 'sum'):
+        raise ValueError('reduce must be either \'mean\', or \'sum\'.')
+    a = np.asarray(clouds_a, dtype=np.float64)
+    b = np.asarray(clouds_b, dtype=np.float64)
+    n = a.shape[1]
+    m = b.shape[1]
+
+    # The ground distances are computed in place. C and buf are the only (P x N x M) arrays of the iterations.
+    C = np.matmul(a, b.transpose(0, 2, 1))
+    C *= -2
+    C += np.sum(np.square(a), axis=2)[:, :, np.newaxis]
+    C += np.sum(np.square(b), axis=2)[:, np.newaxis, :]
+    np.maximum(C, 0, out=C)
+    np.sqrt(C, out=C)
+    eps = epsilon * np.max(C, axis=(1, 2))
+    eps[eps == 0] = 1
+
+    # The dual potentials f (of clouds_a) and g (of clouds_b): the transport plan is exp((f_i + g_j - C_ij) / eps).
+    buf = np.empty_like(C)
+    C_t = C.transpose(0, 2, 1)
+    buf_t = buf.transpose(0, 2, 1)
+    log_a = np.log(1.0 / n)
+    log_b = np.log(1.0 / m)
+    f = np.zeros((len(a), n))
+    g = np.zeros((len(a), m))
+    error = np.full(len(a), np.inf)
+    for i in range(n_iter):
+        f = _soft_min(g, C, eps, buf) + eps[:, np.newaxis] * log_a
+        g = _soft_min(f, C_t, eps, buf_t) + eps[:, np.newaxis] * log_b
+        if (i + 1) % check_every == 0 or i == n_iter - 1:
+            # g was just updated, thus the masses moved into clouds_b are exact; check those moved out of clouds_a.
+            row_mass = np.exp(f / eps[:, np.newaxis] - _soft_min(g, C, eps, buf) / eps[:, np.newaxis])
+            error = np.sum(np.abs(row_mass - 1.0 / n), axis=1)
+            if np.all(error < tolerance):
+                break
+
+    if np.any(error >= tolerance):
+        warnings.warn('Sinkhorn did not converge for %d of %d pairs (largest marginal error %.3g): their costs can be '
+                      'far from the EMD. Increase n_iter, or epsilon.' % (np.sum(error >= tolerance), len(a),
+                                                                           np.max(error)))
+    np.add(f[:, :, np.newaxis], g[:, np.newaxis, :], out=buf)
+    buf -= C
+    buf /= eps[:, np.newaxis, np.newaxis]
+    np.exp(buf, out=buf)
+    buf *= C
+    cost = np.sum(buf, axis=(1, 2))
+    if reduce == 'sum':
+        cost *= n
+    return cost
+
+
+def emd_distance_matrix(clouds_a, clouds_b=None, epsilon=10e-3, n_iter=1000, reduce='mean', n_workers=1,
+                        max_memory=2 ** 28):
+    '''Approximate Earth Mover's distances (see sinkhorn_emd) between all pairs of two sets of point-clouds.
+    Args:
+        clouds_a (B1 x N x 3 numpy array).
+        clouds_b (B2 x M x 3 numpy array, optional) if None, the (symmetric) all-vs-all matrix of clouds_a is
+            computed.
+        max_memory (int) bytes used (roughly) by each thread; it decides how many pairs are processed per tile. Each
+            pair needs 2 * 8 * N * M bytes (the ground distances and one buffer of the log-domain iterations).
+    Returns:
+        (B1 x B2) numpy array.
+    '''
+    symmetric = clouds_b is None
+    if symmetric:
+        clouds_b = clouds_a
+    n_a, n = clouds_a.shape[:2]
+    n_b, m = clouds_b.shape[:2]
+
+    if symmetric:
+        rows, cols = np.triu_indices(n_a, k=1)
+    else:
+        rows, cols = np.unravel_index(np.arange(n_a * n_b), (n_a, n_b))
+    pairs_per_tile = max(1, max_memory // (2 * 8 * n * m))   # sinkhorn_emd keeps two N x M float64 arrays per pair.
+    tiles = [slice(s, s + pairs_per_tile) for s in range(0, len(rows), pairs_per_tile)]
+
+    def job(tile):
+        return sinkhorn_emd(clouds_a[rows[tile]], clouds_b[cols[tile]], epsilon, n_iter, reduce)
+
+    D = np.zeros((n_a, n_b))
+    if len(rows) > 0:
+        D[rows, cols] = np.hstack(_run(job, tiles, n_workers))
+    if symmetric:
+        D = D + D.T
+    return D
+
+
+def minimum_matching_distance_and_coverage(sample_ref_distances):
+    '''Given the (S x R) distances between S generated (sample) and R reference clouds, returns:
+        mmd: the average distance of every reference cloud to its closest sample.
+        coverage: the fraction of reference clouds that are the closest reference of some sample.
+    '''
+    mmd = np.mean(np.min(sample_ref_distances, axis=0))
+    matched = np.unique(np.argmin(sample_ref_distances, axis=1))
+    coverage = len(matched) / float(sample_ref_distances.shape[1])
+    return mmd, coverage
@@ -2,36 +2,107 @@
 Created on Jun 30, 2018
 
 @author: optas
+
+Normalizations of batches of point-clouds, i.e., of (B x N x 3) numpy arrays. All the clouds of a batch are
+transformed at once and the transformations happen in place. Batches of clouds with different sizes can be padded to
+a common size and be accompanied by a (B x N) boolean mask, which is True for the real points. The padded entries do
+not affect the statistics (centers, extents) of their clouds, but they are transformed along with them.
 '''
 
 import numpy as np
-from . point_cloud import Point_Cloud
 
 
-def zero_mean_in_unit_sphere(in_pclouds):
-    ''' Zero MEAN + Max_dist = 0.5
+def _check_input(pclouds, mask):
+    if pclouds.ndim != 3:
+        raise ValueError('A (B x N x D) array of point-clouds is expected.')
+    if mask is not None and mask.shape != pclouds.shape[:2]:
+        raise ValueError('The mask must have the (B x N) shape of the point-clouds.')
+
+
+def bounding_box_extrema(pclouds, mask=None):
+    '''Returns the (B x D) minima and maxima of the coordinates of each point-cloud. The extrema of the clouds
+    without any (real) point are zero.
+    '''
+    _check_input(pclouds, mask)
+    if mask is None:
+        return np.min(pclouds, axis=1), np.max(pclouds, axis=1)
+    m = mask[:, :, np.newaxis]
+    empty = ~np.any(mask, axis=1)
+    lo = np.min(np.where(m, pclouds, np.inf), axis=1)
+    hi = np.max(np.where(m, pclouds, -np.inf), axis=1)
+    lo[empty] = 0
+    hi[empty] = 0
+    return lo.astype(pclouds.dtype), hi.astype(pclouds.dtype)
+
+
+def max_radii(pclouds, mask=None):
+    '''Returns the (B) distances of the farthest point of each point-cloud from the origin.
     '''
-    pclouds = in_pclouds.copy()
-    pclouds = pclouds - np.expand_dims(np.mean(pclouds, axis=1), 1)
-    dist = np.max(np.sqrt(np.sum(pclouds ** 2, axis=2)), 1)
-    dist = np.expand_dims(np.expand_dims(dist, 1), 2)
-    pclouds = pclouds / (dist * 2.0)
+    _check_input(pclouds, mask)
+    radii = np.sqrt(np.einsum('bnd,bnd->bn', pclouds, pclouds))
+    if mask is not None:
+        radii[~mask] = 0
+    return np.max(radii, axis=1)
+
+
+def center_bounding_box(pclouds, mask=None):
+    '''Translates every point-cloud so that its bounding box is centered at the origin.
+    '''
+    lo, hi = bounding_box_extrema(pclouds, mask)
+    pclouds -= ((lo + hi) / 2)[:, np.newaxis, :]
     return pclouds
 
 
-def center_in_unit_sphere(pclouds):
-    for i, pc in enumerate(pclouds):
-        pc, _ = Point_Cloud(pc).center_axis()
-        pclouds[i] = pc.points
+def center_mean(pclouds, mask=None):
+    '''Translates every point-cloud so that the mean of its points is the origin.
+    '''
+    _check_input(pclouds, mask)
+    if mask is None:
+        means = np.mean(pclouds, axis=1)
+    else:
+        counts = np.maximum(np.sum(mask, axis=1), 1)
+        means = np.einsum('bn,bnd->bd', mask.astype(pclouds.dtype), pclouds) / counts[:, np.newaxis]
+    pclouds -= means[:, np.newaxis, :].astype(pclouds.dtype)
+    return pclouds
+
 
-    dist = np.max(np.sqrt(np.sum(pclouds ** 2, axis=2)), 1)
-    dist = np.expand_dims(np.expand_dims(dist, 1), 2)
-    pclouds = pclouds / (dist * 2.0)
+def scale_in_unit_sphere(pclouds, mask=None):
+    '''Uniformly scales every point-cloud so that its farthest point from the origin lies at distance 0.5.
+    '''
+    radii = max_radii(pclouds, mask)
+    radii[radii == 0] = 0.5
+    pclouds /= (2.0 * radii)[:, np.newaxis, np.newaxis].astype(pclouds.dtype)
+    return pclouds
 
-    for i, pc in enumerate(pclouds):
-        pc, _ = Point_Cloud(pc).center_axis()
-        pclouds[i] = pc.points
 
-    dist = np.max(np.sqrt(np.sum(pclouds ** 2, axis=2)), 1)
-    assert(np.all(abs(dist - 0.5) < 0.0001))
+def scale_in_unit_cube(pclouds, mask=None):
+    '''Uniformly scales every point-cloud so that the diagonal of its bounding box has unit length. If the cloud is
+    centered, it then lies in the unit cube.
+    '''
+    lo, hi = bounding_box_extrema(pclouds, mask)
+    diagonals = np.sqrt(np.sum(np.square(hi - lo), axis=1))
+    diagonals[diagonals == 0] = 1
+    pclouds /= diagonals[:, np.newaxis, np.newaxis].astype(pclouds.dtype)
     return pclouds
+
+
+def center_in_unit_sphere(pclouds, mask=None):
+    ''' Bounding box centered at the origin + Max_dist = 0.5. In place.
+    '''
+    center_bounding_box(pclouds, mask)
+    return scale_in_unit_sphere(pclouds, mask)
+
+
+def center_in_unit_cube(pclouds, mask=None):
+    ''' Bounding box centered at the origin + Bounding box diagonal = 1. In place.
+    '''
+    center_bounding_box(pclouds, mask)
+    return scale_in_unit_cube(pclouds, mask)
+
+
+def zero_mean_in_unit_sphere(in_pclouds, mask=None):
+    ''' Zero MEAN + Max_dist = 0.5
+    '''
+    pclouds = np.array(in_pclouds, dtype=np.result_type(in_pclouds.dtype, np.float32))
+    center_mean(pclouds, mask)
+    return scale_in_unit_sphere(pclouds, mask)
@@ -11,15 +11,11 @@ import copy
 import warnings
 import numpy as np
 import matplotlib.cm as cm 
-from scipy.linalg import eigh
-from numpy.matlib import repmat
+from scipy import sparse
+from scipy.sparse.csgraph import minimum_spanning_tree, connected_components, dijkstra
+from scipy.spatial import cKDTree
 from six.moves import cPickle
 
-try:
-    from sklearn.neighbors import NearestNeighbors
-except:
-    warnings.warn('Sklearn library is not installed.')
-
 try:
     import matplotlib.pyplot as plt
     from mpl_toolkits.mplot3d import Axes3D
@@ -29,7 +25,9 @@ except:
 from .. external_code.python_plyfile.plyfile import PlyElement, PlyData
 from .. in_out import soup as io
 from .. utils import linalg_utils as utils
-from .. fundamentals import Cuboid
+from .. fundamentals import Cuboid, Oriented_Box
+from .. fundamentals.oriented_box import pca_boxes, min_volume_box
+from . sampling import farthest_point_sampling
 
 l2_norm = utils.l2_norm
 
@@ -57,6 +55,12 @@ class Point_Cloud(object):
     def points(self, value):
         self._points = value
         self.num_points = len(self._points)
+        self._index = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_index'] = None  # The spatial index is not saved, it is rebuilt on demand.
+        return state
 
     def __str__(self):
         return 'Point Cloud with %d points.' % (self.num_points)
@@ -83,11 +87,30 @@ class Point_Cloud(object):
         rindex = np.random.choice(self.num_points, n_samples, replace=replacement)
         return Point_Cloud(points=self.points[rindex, :]), rindex
 
+    def farthest_point_sample(self, n_samples, first_index=None, seed=None):
+        '''Returns a Point_Cloud with n_samples points picked via farthest point sampling, and their indices.
+        See point_clouds.sampling.farthest_point_sampling.
+        '''
+        indices, _ = farthest_point_sampling(self.points, n_samples, first_index=first_index, seed=seed)
+        return Point_Cloud(points=self.points[indices, :]), indices
+
     def apply_mask(self, bool_mask):
         return Point_Cloud(self.points[bool_mask, :])
 
-    def bounding_box(self):
-        return Cuboid.bounding_box_of_3d_points(self.points)
+    def bounding_box(self, oriented=None):
+        '''The bounding box of the points.
+        Args:
+            oriented (String, optional): None for the axis aligned Cuboid, 'pca' or 'min_volume' for the
+                Oriented_Box fitted with pca_boxes or min_volume_box, respectively.
+        '''
+        if oriented is None:
+            return Cuboid.bounding_box_of_3d_points(self.points)
+        elif oriented == 'pca':
+            return pca_boxes(self.points[np.newaxis])[0]
+        elif oriented == 'min_volume':
+            return Oriented_Box(*min_volume_box(self.points))
+        else:
+            raise ValueError('oriented must be None, \'pca\' or \'min_volume\'.')
 
     def center_in_unit_sphere(self):
         self.points = Point_Cloud.center_points(self.points, center='unit_sphere')
@@ -120,37 +143,153 @@ class Point_Cloud(object):
         self.points = self.points[lex_indices, :]
         return self, lex_indices
 
-    def k_nearest_neighbors(self, k):
-        #     TODO: Add kwargs of sklearn function
-        nn = NearestNeighbors(n_neighbors=k + 1).fit(self.points)
-        distances, indices = nn.kneighbors(self.points)
+    def spatial_index(self, leafsize=16):
+        '''Returns a KD-tree over the points. The tree is built on the first call and is cached until the points
+        change, either via the points setter or via the (in place) transformations of this class. If the points array
+        is modified in place by other means, call invalidate_index().
+        '''
+        if getattr(self, '_index', None) is None:
+            self._index = cKDTree(self.points, leafsize=leafsize)
+        return self._index
+
+    def invalidate_index(self):
+        self._index = None
+
+    def k_nearest_neighbors(self, k, workers=-1):
+        '''Returns the indices and the distances ((num_points x k) numpy arrays) of the k nearest neighbors of every
+        point (the point itself is excluded). workers: number of threads used for the queries, -1 uses all CPUs.
+        '''
+        distances, indices = self.spatial_index().query(self.points, k=k + 1, workers=workers)
         return indices[:, 1:], distances[:, 1:]
 
-    def normals_lsq(self, k, unit_norm=False):
+    def query_nearest_neighbors(self, query_points, k=1, workers=-1):
+        '''Returns the indices and the distances ((M x k) numpy arrays) of the k nearest points of the point-cloud to
+        each of the M query points.
+        '''
+        distances, indices = self.spatial_index().query(query_points, k=k, workers=workers)
+        n_queries = len(query_points)
+        return indices.reshape(n_queries, k), distances.reshape(n_queries, k)
+
+    def radius_neighbors(self, radius, query_points=None, workers=-1, return_distances=False):
+        '''Returns for every query point (default: every point of the point-cloud) a numpy array with the indices
+        of the points that lie within the given radius from it. If return_distances is True, the corresponding
+        distances are returned too.
+        '''
+        if query_points is None:
+            query_points = self.points
+        neighbors = self.spatial_index().query_ball_point(query_points, radius, workers=workers)
+        neighbors = [np.array(n, dtype=np.int64) for n in neighbors]
+        if not return_distances:
+            return neighbors
+        distances = [l2_norm(self.points[n] - q, axis=1) for n, q in zip(neighbors, query_points)]
+        return neighbors, distances
+
+    def normals_lsq(self, k, unit_norm=False, radius=None, weighting=None, orient=False, chunk_size=50000):
         '''Least squares normal estimation from point clouds using PCA.
         Args:
                 k  (int) indicating how many neighbors the normal estimation is based upon.
+                radius (float, optional) if given, only the neighbors (among the k nearest) that lie within this
+                    distance from a point are used.
+                weighting (String, optional) None for uniform weights, or 'gaussian' for weights exp(-d^2 / h^2), where
+                    d is the distance of a neighbor and h the distance of the farthest neighbor of the point.
+                orient (boolean, optional) if True, the normals are consistently oriented by propagating the
+                    orientation of the highest point (set to point upwards) along the minimum spanning tree of the
+                    k-nn graph, weighted by 1 - |n_i . n_j|.
+                chunk_size (int, optional) the points are processed in chunks of this size to bound the memory.
+        Returns:
+                (num_points x 3) numpy array with the normals. Points with less than 3 neighbors get a zero normal.
+
+        Notes: all the covariance matrices of a chunk are formed with one gather and their 3x3 eigen-problems are
+        solved as one batch.
 
         DOI: H. Hoppe, T. DeRose, T. Duchamp, J. McDonald, and W. Stuetzle.
         Surface reconstruction from unorganized points. In Proceedings of ACM Siggraph, pages 71:78, 1992.
         '''
-        neighbors, _ = self.k_nearest_neighbors(k)
+        if weighting not in (None, 'gaussian'):
+            raise ValueError('weighting must be either None, or \'gaussian\'.')
+
         points = self.points
         n_points = self.num_points
+        index = self.spatial_index()
+        upper_bound = np.inf if radius is None else radius
         N = np.zeros([n_points, 3])
-        for i in xrange(n_points):
-            x = points[neighbors[i], :]
-            p_bar = (1.0 / k) * np.sum(x, axis=0)
-            P = (x - repmat(p_bar, k, 1))
-            P = (P.T).dot(P)
-            [L, E] = eigh(P)
-            idx = np.argmin(L)
-            N[i, :] = E[:, idx]
+        n_degenerate = 0
+
+        for start in range(0, n_points, chunk_size):
+            chunk = points[start: start + chunk_size]
+            distances, neighbors = index.query(chunk, k=k + 1, distance_upper_bound=upper_bound)
+            distances = distances[:, 1:]
+            neighbors = neighbors[:, 1:]
+            valid = np.isfinite(distances)  # Missing neighbors (outside the radius) have infinite distance.
+            neighbors[~valid] = 0
+            distances[~valid] = 0
+
+            if weighting == 'gaussian':
+                h = np.max(distances, axis=1, keepdims=True)
+                h[h == 0] = 1
+                w = np.exp(-np.square(distances / h))
+            else:
+                w = np.ones(distances.shape)
+            w[~valid] = 0
+
+            x = points[neighbors]
+            w_sum = np.sum(w, axis=1)
+            w_sum[w_sum == 0] = 1
+            p_bar = np.einsum('ck,ckd->cd', w, x) / w_sum[:, np.newaxis]
+            x = x - p_bar[:, np.newaxis, :]
+            P = np.einsum('ck,ckd,cke->cde', w, x, x)
+            _, E = np.linalg.eigh(P)  # Eigenvalues in ascending order.
+            normals = E[:, :, 0]
+            degenerate = np.sum(valid, axis=1) < 3
+            normals[degenerate] = 0
+            n_degenerate += np.sum(degenerate)
+            N[start: start + chunk_size] = normals
+
+        if n_degenerate > 0:
+            warnings.warn('%d points have less than 3 neighbors. Their normals are set to zero.' % (n_degenerate, ))
+
         if unit_norm:
             row_norms = np.linalg.norm(N, axis=1)
+            row_norms[row_norms == 0] = 1
             N = (N.T / row_norms).T
+
+        if orient:
+            N = self.orient_normals(N, k)
         return N
 
+    def orient_normals(self, normals, k):
+        '''Flips the normals so that they are consistently oriented: the orientation of the highest point of each
+        connected component of the k-nn graph is set to point upwards and it is propagated along the minimum spanning
+        tree of the graph, weighted by 1 - |n_i . n_j|.
+        The propagation is computed without a traversal: the tree edges that require a flip get a weight larger than
+        the total weight of all other edges, so that the number of flips on the path from the root to each point can
+        be read from its shortest-path distance.
+        '''
+        n = self.num_points
+        neighbors, _ = self.k_nearest_neighbors(k)
+        i = np.repeat(np.arange(n), neighbors.shape[1])
+        j = neighbors.ravel()
+        cosines = np.sum(normals[i] * normals[j], axis=1)
+        weights = 1.0 - np.abs(cosines) + 10e-8  # Keep the weights positive, zeros are not edges.
+        G = sparse.csr_matrix((weights, (i, j)), shape=(n, n))
+        G = G.maximum(G.T)
+        tree = minimum_spanning_tree(G).tocoo()
+
+        flip = np.sum(normals[tree.row] * normals[tree.col], axis=1) < 0
+        tree_weights = np.where(flip, n + 1.0, 1.0)
+        tree = sparse.csr_matrix((tree_weights, (tree.row, tree.col)), shape=(n, n))
+
+        n_cc, labels = connected_components(tree, directed=False)
+        order = np.lexsort((self.points[:, 2], labels))   # Sorted by component and then by height.
+        last_of_component = np.r_[np.where(np.diff(labels[order]) != 0)[0], n - 1]
+        roots = order[last_of_component]
+
+        distances = dijkstra(tree, directed=False, indices=roots, min_only=True)
+        n_flips = np.floor(distances / (n + 1.0)).astype(np.int64)
+        root_sign = np.where(normals[roots, 2] < 0, -1.0, 1.0)
+        signs = np.where(n_flips % 2 == 1, -1.0, 1.0) * root_sign[labels]
+        return normals * signs[:, np.newaxis]
+
     def rotate_z_axis_by_degrees(self, theta, clockwise=True):
         theta = np.deg2rad(theta)
         cos_t = np.cos(theta)
@@ -166,6 +305,13 @@ class Point_Cloud(object):
 
     def translate(self, trans_vector):
         self.points += trans_vector
+        self.invalidate_index()
+        return self
+
+    def apply_rigid_transform(self, R, t):
+        '''Maps every point p to R p + t, e.g., with the motion found by registration.icp.
+        '''
+        self.points = self.points.dot(R.T) + t
         return self
 
     def align_to_other_pc(self, other_pc):
@@ -180,6 +326,7 @@ class Point_Cloud(object):
         self.points[:, 0] *= x_ratio
         self.points[:, 1] *= y_ratio
         self.points[:, 2] *= z_ratio
+        self.invalidate_index()
         a_xmin, a_ymin, a_zmin, a_xmax, a_ymax, a_zmax = self.bounding_box().extrema
         trans_vector = np.array([(b_xmin - a_xmin), (b_ymin - a_ymin), (b_zmin - a_zmin)])
         return self.translate(trans_vector)
@@ -197,6 +344,7 @@ class Point_Cloud(object):
             r_min = np.min(self.points[:, axis])
             gap = (r_max + r_min) / 2.0
             self.points[:, axis] -= gap
+            self.invalidate_index()
             return self, gap
 
     def save_as_ply(self, file_out, normals=None, color=None, binary=True):
@@ -221,25 +369,27 @@ class Point_Cloud(object):
             center: 'unit_sphere' or 'unit_cube'
             force_scaling: boolean, if True, then even if the points are already inside the unit sphere/cube it will stretch them so that the (maximum) anti-diametric points lie exactly on the boundary.
         '''
-        pc = Point_Cloud(points)
+        if center not in ('unit_sphere', 'unit_cube'):
+            raise ValueError()
 
-        if not pc.is_centered_in_origin(epsilon=epsilon):
-            pc.center_axis()
+        r_min = np.min(points, axis=0)
+        r_max = np.max(points, axis=0)
+        if not np.all(abs(r_max + r_min) < epsilon):
+            gap = (r_max + r_min) / 2.0
+            points -= gap
+            r_min -= gap
+            r_max -= gap
 
         if center == 'unit_sphere':
-            if not pc.is_in_unit_sphere(epsilon=epsilon) or force_scaling:
-                max_dist = np.max(l2_norm(points, axis=1))  # Make max distance equal to one.
-                pc.points /= (max_dist * 2.0)
+            max_dist = np.max(l2_norm(points, axis=1))
+            if max_dist > 0.5 + epsilon or force_scaling:
+                points /= (max_dist * 2.0)   # Make max distance equal to one half.
 
         elif center == 'unit_cube':
-            if not pc.is_in_unit_cube(epsilon=epsilon) or force_scaling:
-                cb = Cuboid.bounding_box_of_3d_points(pc.points)
-                max_dist = cb.diagonal_length()
-                pc.points /= max_dist
-        else:
-            raise ValueError()
+            if max(np.max(abs(r_min)), np.max(abs(r_max))) > 0.5 + epsilon or force_scaling:
+                points /= l2_norm(r_max - r_min)   # Make the diagonal of the bounding box equal to one.
 
-        return pc.points
+        return points
 
     @staticmethod
     def plot_3d_point_cloud(x, y, z, show=True, show_axis=True, in_u_sphere=False, marker='.', s=8, alpha=.8,
@@ -0,0 +1,218 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Rigid registration of point-clouds with the Iterative Closest Point (ICP) algorithm. Many source clouds can be
+registered to the same target at once: their correspondences are found with one query of the (cached) KD-tree of
+the target and their rigid motions are solved as one batch of 3x3 SVDs (point-to-point) or 6x6 linear systems
+(point-to-plane). A rigid motion (R, t) maps a point p to R p + t.
+
+DOI: P. Besl, N. McKay. A Method for Registration of 3-D Shapes. IEEE PAMI, 1992.
+DOI: Y. Chen, G. Medioni. Object Modelling by Registration of Multiple Range Images. Image and Vision Computing, 1992.
+DOI: S. Umeyama. Least-Squares Estimation of Transformation Parameters Between Two Point Patterns. IEEE PAMI, 1991.
+'''
+
+import numpy as np
+
+from . point_cloud import Point_Cloud
+from . sampling import batched_farthest_point_sampling
+
+
+def transform_points(points, R, t):
+    '''Applies rigid motions to (batches of) points: (B x N x 3), (B x 3 x 3), (B x 3), or without the batch axis.
+    '''
+    return np.matmul(points, np.swapaxes(R, -1, -2)) + t[..., np.newaxis, :]
+
+
+def rigid_transform(source, target, weights=None):
+    '''Least squares rigid motions that map the (B x N x 3) source points to their corresponding target points, i.e.,
+    the minimizers of sum_i w_i ||R s_i + t - d_i||^2, found from the SVD of the weighted cross-covariances.
+    Args:
+        weights (B x N numpy array, optional) non-negative weights of the correspondences.
+    Returns:
+        R (B x 3 x 3), t (B x 3) numpy arrays.
+    '''
+    if weights is None:
+        weights = np.ones(source.shape[:2])
+    w = weights / np.maximum(np.sum(weights, axis=1, keepdims=True), 10e-12)
+    mu_s = np.einsum('bn,bnd->bd', w, source)
+    mu_d = np.einsum('bn,bnd->bd', w, target)
+    cov = np.einsum('bn,bni,bnj->bij', w, target - mu_d[:, np.newaxis], source - mu_s[:, np.newaxis])
+    U, _, Vt = np.linalg.svd(cov)
+    D = np.ones((len(source), 3))
+    D[:, 2] = np.sign(np.linalg.det(np.matmul(U, Vt)))   # Reflections are not rigid motions.
+    R = np.matmul(U * D[:, np.newaxis, :], Vt)
+    t = mu_d - np.einsum('bij,bj->bi', R, mu_s)
+    return R, t
+
+
+def _rotation_of_vectors(a):
+    '''Rodrigues formula for a (B x 3) batch of axis-angle vectors.
+    '''
+    theta = np.sqrt(np.sum(np.square(a), axis=1))
+    axis = a / np.maximum(theta, 10e-12)[:, np.newaxis]
+    K = np.zeros((len(a), 3, 3))
+    K[:, 0, 1] = -axis[:, 2]
+    K[:, 0, 2] = axis[:, 1]
+    K[:, 1, 0] = axis[:, 2]
+    K[:, 1, 2] = -axis[:, 0]
+    K[:, 2, 0] = -axis[:, 1]
+    K[:, 2, 1] = axis[:, 0]
+    s = np.sin(theta)[:, np.newaxis, np.newaxis]
+    c = np.cos(theta)[:, np.newaxis, np.newaxis]
+    return np.eye(3) + s * K + (1 - c) * np.matmul(K, K)
+
+
+def point_to_plane_transform(source, target, normals, weights=None):
+    '''Rigid motions that minimize sum_i w_i ((R s_i + t - d_i) . n_i)^2, for small rotations (linearized), i.e.,
+    the solutions of a batch of (6 x 6) normal equations.
+    Args:
+        normals (B x N x 3 numpy array) the normals at the target points.
+    Returns:
+        R (B x 3 x 3), t (B x 3) numpy arrays.
+    '''
+    if weights is None:
+        weights = np.ones(source.shape[:2])
+    J = np.concatenate([np.cross(source, normals), normals], axis=2)
+    r = np.einsum('bnd,bnd->bn', target - source, normals)
+    A = np.einsum('bn,bni,bnj->bij', weights, J, J) + 10e-10 * np.eye(6)
+    b = np.einsum('bn,bni,bn->bi', weights, J, r)
+    x = np.linalg.solve(A, b[:, :, np.newaxis])[:, :, 0]
+    return _rotation_of_vectors(x[:, :3]), x[:, 3:]
+
+
+def robust_weights(residuals, mask, trim=None, robust=None, robust_scale=None):
+    '''Weights of the correspondences of each cloud given their (B x N) residuals (distances).
+    Args:
+        mask (B x N boolean numpy array) False for the padded points.
+        trim (float, optional) in (0, 1]: only this fraction of the correspondences (the closest ones) is kept.
+        robust (String, optional) 'huber' or 'tukey' M-estimator weights.
+        robust_scale (float, optional) the scale of the M-estimator. If None, it is estimated from the median
+            residual of each cloud.
+    '''
+    weights = mask.astype(np.float64)
+    if trim is not None:
+        if not 0 < trim <= 1:
+            raise ValueError('trim must be in (0, 1].')
+        masked = np.where(mask, residuals, np.inf)
+        n_keep = np.maximum(np.floor(trim * np.sum(mask, axis=1)).astype(np.int64), 1)
+        thres = np.take_along_axis(np.sort(masked, axis=1), n_keep[:, np.newaxis] - 1, axis=1)
+        weights[masked > thres] = 0
+
+    if robust is not None:
+        if robust_scale is None:
+            masked = np.where(weights > 0, residuals, np.nan)
+            scale = 1.4826 * np.nanmedian(masked, axis=1)[:, np.newaxis]
+            scale = np.maximum(scale, 10e-12)
+        else:
+            scale = robust_scale
+        u = residuals / scale
+        if robust == 'huber':
+            c = 1.345
+            weights *= np.minimum(1, c / np.maximum(np.abs(u), 10e-12))
+        elif robust == 'tukey':
+            c = 4.685
+            weights *= np.square(np.maximum(1 - np.square(u / c), 0))
+        else:
+            raise ValueError('robust must be None, \'huber\' or \'tukey\'.')
+    return weights
+
+
+def _stack(sources):
+    '''Pads a list of (N_i x 3) clouds to a (B x max(N_i) x 3) array, by repeating their first point, and returns
+    the mask of the real points.
+    '''
+    if isinstance(sources, np.ndarray) and sources.ndim == 3:
+        return sources, np.ones(sources.shape[:2], dtype=np.bool_)
+    sizes = np.array([len(s) for s in sources])
+    padded = np.empty((len(sources), np.max(sizes), 3))
+    mask = np.arange(np.max(sizes))[np.newaxis, :] < sizes[:, np.newaxis]
+    for i, s in enumerate(sources):
+        padded[i, :len(s)] = s
+        padded[i, len(s):] = s[0]
+    return padded, mask
+
+
+def icp(sources, target, method='point_to_point', schedule=((None, 50), ), R=None, t=None, target_normals=None,
+        trim=None, robust=None, robust_scale=None, max_distance=None, tol=10e-7, n_normal_neighbors=10, workers=-1):
+    '''Registers one or many source clouds to a target cloud with ICP.
+
+    Args:
+        sources (N x 3 numpy array, B x N x 3 numpy array, or list of (N_i x 3) numpy arrays / Point_Clouds).
+        target (Point_Cloud or M x 3 numpy array). The KD-tree of a Point_Cloud is cached and reused across calls.
+        method (String) 'point_to_point' or 'point_to_plane'.
+        schedule (tuple of (n_points, max_iter) pairs) coarse-to-fine levels. At each level the sources are
+            represented by n_points of them picked via farthest point sampling (None for all the points) and at most
+            max_iter iterations are performed. E.g., ((256, 30), (2048, 20), (None, 10)).
+        R (3 x 3 or B x 3 x 3), t (3 or B x 3) numpy arrays, optional: the initial motions. Identity if None.
+        target_normals (M x 3 numpy array, optional) used by point_to_plane. If None, they are estimated with
+            Point_Cloud.normals_lsq.
+        trim, robust, robust_scale: the weighting of the correspondences, see robust_weights.
+        max_distance (float, optional) correspondences farther than this are ignored.
+        tol (float) a level ends when the mean residual of no cloud changes more than tol.
+
+    Returns:
+        R (B x 3 x 3), t (B x 3) numpy arrays and the (B) root mean squared (weighted) residuals of the final
+        correspondences. If sources is a single cloud, the batch axis is dropped.
+    '''
+    if method not in ('point_to_point', 'point_to_plane'):
+        raise ValueError('method must be either \'point_to_point\', or \'point_to_plane\'.')
+
+    single = isinstance(sources, Point_Cloud) or (isinstance(sources, np.ndarray) and sources.ndim == 2)
+    if single:
+        sources = [sources]
+    if not isinstance(sources, np.ndarray):
+        sources = [s.points if isinstance(s, Point_Cloud) else s for s in sources]
+    sources, mask = _stack(sources)
+    n_clouds, n_points = sources.shape[:2]
+
+    if not isinstance(target, Point_Cloud):
+        target = Point_Cloud(points=target)
+    index = target.spatial_index()
+    if method == 'point_to_plane' and target_normals is None:
+        target_normals = target.normals_lsq(n_normal_neighbors, unit_norm=True)
+
+    R = np.tile(np.eye(3), (n_clouds, 1, 1)) if R is None else np.broadcast_to(R, (n_clouds, 3, 3)).copy()
+    t = np.zeros((n_clouds, 3)) if t is None else np.broadcast_to(t, (n_clouds, 3)).copy()
+
+    for level_points, max_iter in schedule:
+        if level_points is None or level_points >= n_points:
+            src, src_mask = sources, mask
+        else:
+            # The padding repeats the first point, thus it is never picked after it.
+            picked = batched_farthest_point_sampling(sources, level_points, first_index=0)[0]
+            src = np.take_along_axis(sources, picked[:, :, np.newaxis], axis=1)
+            src_mask = np.take_along_axis(mask, picked, axis=1)
+
+        prev_error = np.full(n_clouds, np.inf)
+        for _ in range(max_iter):
+            moved = transform_points(src, R, t)
+            distances, matches = index.query(moved.reshape(-1, 3), k=1, workers=workers)
+            distances = distances.reshape(moved.shape[:2])
+            matches = matches.reshape(moved.shape[:2])
+            valid = src_mask if max_distance is None else src_mask & (distances <= max_distance)
+            weights = robust_weights(distances, valid, trim, robust, robust_scale)
+
+            dst = target.points[matches]
+            if method == 'point_to_point':
+                dR, dt = rigid_transform(moved, dst, weights)
+            else:
+                dR, dt = point_to_plane_transform(moved, dst, target_normals[matches], weights)
+            R = np.matmul(dR, R)
+            t = np.einsum('bij,bj->bi', dR, t) + dt
+
+            error = np.sum(weights * distances, axis=1) / np.maximum(np.sum(weights, axis=1), 10e-12)
+            if np.all(np.abs(prev_error - error) < tol):
+                break
+            prev_error = error
+
+    moved = transform_points(sources, R, t)
+    distances = index.query(moved.reshape(-1, 3), k=1, workers=workers)[0].reshape(moved.shape[:2])
+    valid = mask if max_distance is None else mask & (distances <= max_distance)
+    weights = robust_weights(distances, valid, trim, robust, robust_scale)
+    rmse = np.sqrt(np.sum(weights * np.square(distances), axis=1) / np.maximum(np.sum(weights, axis=1), 10e-12))
+
+    if single:
+        return R[0], t[0], rmse[0]
+    return R, t, rmse
@@ -0,0 +1,109 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Farthest point sampling (FPS) of point-clouds and of graphs (e.g., the edge graph of a mesh).
+'''
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import dijkstra
+
+
+def _first_indices(n_points, n_clouds, first_index, seed):
+    if first_index is not None:
+        return np.broadcast_to(np.asarray(first_index, dtype=np.int64), (n_clouds, )).copy()
+    return np.random.RandomState(seed).randint(n_points, size=n_clouds)
+
+
+def farthest_point_sampling(points, n_samples, first_index=None, seed=None):
+    '''Greedily picks n_samples points, each of which is the farthest (in euclidean distance) from the points that
+    were picked before it. The distance of every point to the picked set is kept in an array that is updated
+    incrementally, thus the cost is O(N * n_samples).
+
+    Args:
+        points (N x D numpy array).
+        n_samples (int) number of points to pick, at most N.
+        first_index (int, optional) the first picked point. If None, it is picked at random.
+        seed (int, optional) seed of the random choice of the first point.
+
+    Returns:
+        indices (n_samples numpy array) of the picked points, in the order they were picked.
+        min_dist (N numpy array) the euclidean distance of every point to the picked set.
+    '''
+    indices, min_dist = batched_farthest_point_sampling(points[np.newaxis], n_samples, first_index, seed)
+    return indices[0], min_dist[0]
+
+
+def batched_farthest_point_sampling(points, n_samples, first_index=None, seed=None):
+    '''Farthest point sampling of a batch of point-clouds of the same size. Every iteration updates all the clouds
+    at once.
+
+    Args:
+        points (B x N x D numpy array).
+        first_index (int or B numpy array, optional) the first picked point of each cloud. If None, it is picked
+            at random.
+
+    Returns:
+        indices (B x n_samples numpy array) of the picked points of each cloud.
+        min_dist (B x N numpy array) the euclidean distance of every point to the picked set of its cloud.
+    '''
+    n_clouds, n_points = points.shape[:2]
+    if n_samples > n_points or n_samples < 1:
+        raise ValueError('The number of samples must be in [1, %d].' % (n_points, ))
+
+    batch = np.arange(n_clouds)
+    indices = np.empty((n_clouds, n_samples), dtype=np.int64)
+    indices[:, 0] = _first_indices(n_points, n_clouds, first_index, seed)
+
+    # Every coordinate is kept in a contiguous (B x N) array: the distance updates then avoid reductions along
+    # the (short) last axis, which are an order of magnitude slower.
+    coords = [np.ascontiguousarray(points[:, :, d]) for d in range(points.shape[2])]
+    min_dist = np.full((n_clouds, n_points), np.inf, dtype=np.result_type(points.dtype, np.float32))
+    dist = np.empty_like(min_dist)
+    temp = np.empty_like(min_dist)
+    for i in range(n_samples):
+        last = points[batch, indices[:, i]]
+        dist.fill(0)
+        for d, c in enumerate(coords):
+            np.subtract(c, last[:, d, np.newaxis], out=temp)
+            np.multiply(temp, temp, out=temp)
+            dist += temp
+        np.minimum(min_dist, dist, out=min_dist)
+        if i + 1 < n_samples:
+            indices[:, i + 1] = np.argmax(min_dist, axis=1)
+    return indices, np.sqrt(min_dist)
+
+
+def geodesic_farthest_point_sampling(graph, n_samples, first_index=None, seed=None):
+    '''Farthest point sampling with respect to the shortest-path distances of a weighted graph, e.g., of the edge
+    graph of a mesh (see Mesh.edge_length_graph). After a node is picked, a Dijkstra search from it updates the
+    distances to the picked set. The search is limited to the distance of the picked node from the rest of the
+    set, since no node farther than that can get closer to the set. Thus, it shrinks as the sampling progresses.
+
+    Args:
+        graph (N x N sparse matrix) symmetric, with non-negative edge weights.
+
+    Returns:
+        indices (n_samples numpy array) of the picked nodes.
+        min_dist (N numpy array) the shortest-path distance of every node to the picked set. Nodes that are not
+            connected with any picked node have infinite distance, thus they are picked first, i.e., every
+            connected component gets a sample before any component gets a second one.
+    '''
+    n_nodes = graph.shape[0]
+    if n_samples > n_nodes or n_samples < 1:
+        raise ValueError('The number of samples must be in [1, %d].' % (n_nodes, ))
+
+    graph = sparse.csr_matrix(graph, dtype=np.float64)  # Convert once, not in every search.
+    indices = np.empty(n_samples, dtype=np.int64)
+    indices[0] = _first_indices(n_nodes, 1, first_index, seed)[0]
+    min_dist = np.full(n_nodes, np.inf)
+    limit = np.inf
+    for i in range(n_samples):
+        if i > 0:
+            indices[i] = np.argmax(min_dist)
+            limit = min_dist[indices[i]]
+        dist = dijkstra(graph, directed=False, indices=indices[i], limit=limit)
+        np.minimum(min_dist, dist, out=min_dist)
+    return indices, min_dist
@@ -0,0 +1,160 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Spectra of the k-nearest-neighbor graphs of point-clouds. The exact solver works on each connected component of
+the graph separately (in parallel), thus disconnected clouds are supported. For very large clouds, the Nystrom
+(landmark) approximation reduces the eigen-problem to the size of a small set of landmark points.
+'''
+
+import numpy as np
+from scipy import sparse
+from multiprocessing.pool import ThreadPool
+
+from .. fundamentals import Graph
+from . point_cloud import Point_Cloud
+
+
+def knn_adjacency(pc, k, weighting='distance', sigma=None):
+    '''Symmetric (sparse) adjacency matrix of the k-nearest-neighbor graph of a Point_Cloud. The neighbors are found
+    with the cached spatial index of the cloud.
+    Args:
+        weighting (String) 'distance' (the weight of an edge is its length), 'binary' or 'gaussian'
+            (exp(-d^2 / sigma^2), with sigma equal to the mean distance of the k-th neighbors if it is None).
+    '''
+    neighbors, distances = pc.k_nearest_neighbors(k)
+    if weighting == 'distance':
+        weights = distances
+    elif weighting == 'binary':
+        weights = np.ones_like(distances)
+    elif weighting == 'gaussian':
+        if sigma is None:
+            sigma = max(np.mean(distances[:, -1]), 10e-12)
+        weights = np.exp(-np.square(distances / sigma))
+    else:
+        raise ValueError('weighting must be one of \'distance\', \'binary\' or \'gaussian\'.')
+    A = Graph.knn_to_adjacency(neighbors, weights)
+    return (A + A.T) / 2.0
+
+
+def _component_spectrum(L, degrees, n_evecs, laplacian_type, tol, max_iter):
+    '''Smallest n_evecs eigen-pairs of the laplacian of a connected graph (including the trivial one).
+    The normalized laplacian D^-1/2 L D^-1/2 is solved as the generalized problem L x = lambda D x.
+    '''
+    n = L.shape[0]
+    if laplacian_type == 'norm':
+        trivial = np.sqrt(degrees / np.sum(degrees))
+    else:
+        trivial = np.ones(n) / np.sqrt(n)
+    if n == 1 or n_evecs == 1:
+        return np.zeros(1), trivial.reshape(n, 1)
+
+    M = sparse.diags(degrees) if laplacian_type == 'norm' else None
+    evals, evecs = Graph.fiedler_of_laplacian(L, M, n_vecs=n_evecs - 1, tol=tol, max_iter=max_iter)
+    if laplacian_type == 'norm':
+        evecs = evecs * np.sqrt(degrees)[:, np.newaxis]
+    return np.hstack([0, evals]), np.column_stack([trivial, evecs])
+
+
+def laplacian_spectrum(pc, n_evecs, k=6, laplacian_type='norm', weighting='distance', n_workers=1, tol=10e-6,
+                       max_iter=200):
+    '''Computes the smallest eigen-pairs of the laplacian of the k-nearest-neighbor graph of a Point_Cloud.
+    Args:
+        n_evecs (int) number of non-trivial eigen-pairs. n_evecs + 1 pairs are returned.
+        laplacian_type (String) 'norm' (symmetric normalized) or 'comb' (combinatorial).
+        weighting (String) see knn_adjacency.
+        n_workers (int) number of threads over which the connected components are distributed.
+    Returns:
+        evals (n_evecs + 1 numpy array) in increasing order, and the corresponding orthonormal evecs
+        (num_points x n_evecs + 1 numpy array). A graph with c connected components has c zero eigenvalues, whose
+        eigenvectors are supported on a single component each.
+    Notes: every component is solved with LOBPCG (see Graph.fiedler_of_laplacian) for (at most) n_evecs + 1 pairs.
+    The pairs of all the components are then merged, since the spectrum of a disconnected graph is the union of
+    the spectra of its components.
+    '''
+    if laplacian_type not in ('norm', 'comb'):
+        raise ValueError('laplacian_type must be either \'norm\', or \'comb\'.')
+    A = knn_adjacency(pc, k, weighting)
+    n_comps, labels = Graph.connected_components(A)
+    L = sparse.csr_matrix(Graph.adjacency_to_laplacian(A, 'comb'))
+    degrees = np.asarray(A.sum(axis=1)).ravel()
+
+    order = np.argsort(labels, kind='stable')
+    bounds = np.searchsorted(labels[order], np.arange(n_comps + 1))
+    members = [order[bounds[c]: bounds[c + 1]] for c in range(n_comps)]
+    members.sort(key=len, reverse=True)    # The large components are scheduled first.
+
+    def job(nodes):
+        n_pairs = min(n_evecs + 1, len(nodes))
+        return _component_spectrum(Graph.sub_laplacian(L, nodes), degrees[nodes], n_pairs, laplacian_type, tol,
+                                   max_iter)
+
+    if n_workers > 1 and n_comps > 1:
+        pool = ThreadPool(n_workers)
+        try:
+            spectra = pool.map(job, members)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        spectra = [job(nodes) for nodes in members]
+
+    all_evals = np.hstack([s[0] for s in spectra])
+    owners = np.hstack([np.full(len(s[0]), c) for c, s in enumerate(spectra)])
+    columns = np.hstack([np.arange(len(s[0])) for s in spectra])
+    picked = np.argsort(all_evals, kind='stable')[:n_evecs + 1]
+
+    evecs = np.zeros((pc.num_points, len(picked)))
+    for i, p in enumerate(picked):
+        evecs[members[owners[p]], i] = spectra[owners[p]][1][:, columns[p]]
+    return all_evals[picked], evecs
+
+
+def nystrom_spectrum(pc, n_evecs, n_landmarks=1000, k=8, sigma=None, landmarks='random', seed=None):
+    '''Approximates the smallest eigen-pairs of the normalized laplacian of a point-cloud's graph with landmarks.
+    Every point is connected with its k nearest landmarks (gaussian weights, normalized to sum to one) via the
+    (N x m) sparse matrix Z. The affinities are then W = Z D^-1 Z^T, with D the column sums of Z, which is
+    normalized by construction. Thus, the eigenvectors of the normalized laplacian I - W are the left singular
+    vectors of Z D^-1/2, which are found from the eigen-decomposition of an (m x m) matrix. The cost is linear in
+    the number of points.
+
+    Args:
+        pc (Point_Cloud).
+        n_landmarks (int) m, the size of the reduced problem.
+        sigma (float, optional) the bandwidth of the gaussian weights. If None, it is the mean distance of the k-th
+            nearest landmark.
+        landmarks (String) 'random' or 'fps' (farthest point sampling, which covers the cloud more evenly but costs
+            O(N m)).
+    Returns:
+        evals (n_evecs + 1 numpy array), evecs (num_points x n_evecs + 1 numpy array), as in laplacian_spectrum.
+
+    DOI: X. Chen, D. Cai. Large Scale Spectral Clustering with Landmark-Based Representation. AAAI, 2011.
+    '''
+    n = pc.num_points
+    n_landmarks = min(n_landmarks, n)
+    if landmarks == 'random':
+        ids = np.random.RandomState(seed).choice(n, n_landmarks, replace=False)
+    elif landmarks == 'fps':
+        ids = pc.farthest_point_sample(n_landmarks, seed=seed)[1]
+    else:
+        raise ValueError('landmarks must be either \'random\', or \'fps\'.')
+
+    k = min(k, n_landmarks)
+    landmark_pc = Point_Cloud(points=pc.points[ids])
+    neighbors, distances = landmark_pc.query_nearest_neighbors(pc.points, k=k)
+    if sigma is None:
+        sigma = max(np.mean(distances[:, -1]), 10e-12)
+    weights = np.exp(-np.square(distances / sigma))
+    weights /= np.maximum(np.sum(weights, axis=1, keepdims=True), 10e-300)
+
+    rows = np.repeat(np.arange(n), k)
+    Z = sparse.csr_matrix((weights.ravel(), (rows, neighbors.ravel())), shape=(n, n_landmarks))
+    col_sums = np.asarray(Z.sum(axis=0)).ravel()
+    Z = Z.dot(sparse.diags(1.0 / np.sqrt(np.maximum(col_sums, 10e-300))))
+    G = (Z.T.dot(Z)).toarray()
+    s2, V = np.linalg.eigh(G)
+    index = np.argsort(s2)[::-1][:n_evecs + 1]
+    s2 = np.maximum(s2[index], 10e-300)
+    U = Z.dot(V[:, index]) / np.sqrt(s2)
+    return np.maximum(1 - s2, 0), U
@@ -0,0 +1,219 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Voxel grids of point-clouds and meshes. A grid has resolution^3 cubic cells that tile the axis aligned cube
+[lo, hi]^3 (by default the unit cube centered at the origin, see Point_Cloud.center_points). Cells are addressed
+either by their integer (i, j, k) coordinates or by their linear index i * resolution^2 + j * resolution + k, which
+is what the dense grids use when they are flattened (C order). All the accumulations hash the points to linear
+indices and reduce them with np.bincount, i.e., there are no python loops over points, cells or triangles.
+'''
+
+import numpy as np
+
+
+def cell_size(resolution, lo=-0.5, hi=0.5):
+    return (hi - lo) / float(resolution)
+
+
+def grid_centers(resolution, lo=-0.5, hi=0.5, flatten=False):
+    '''Returns the (resolution x resolution x resolution x 3) coordinates of the centers of the cells, or their
+    (resolution^3 x 3) flattened version, which is ordered by the linear index of the cells.
+    '''
+    axis = (lo + (np.arange(resolution) + 0.5) * cell_size(resolution, lo, hi)).astype(np.float32)
+    grid = np.empty((resolution, resolution, resolution, 3), dtype=np.float32)
+    grid[..., 0] = axis[:, np.newaxis, np.newaxis]
+    grid[..., 1] = axis[np.newaxis, :, np.newaxis]
+    grid[..., 2] = axis[np.newaxis, np.newaxis, :]
+    if flatten:
+        grid = grid.reshape(-1, 3)
+    return grid
+
+
+def voxel_coordinates(points, resolution, lo=-0.5, hi=0.5):
+    '''Returns the (N x 3) integer coordinates of the cells containing the points and a (N) boolean mask which is
+    False for the points outside [lo, hi]^3. The coordinates of the latter are clipped in [0, resolution - 1].
+    '''
+    coords = np.floor((points - lo) / cell_size(resolution, lo, hi)).astype(np.int64)
+    inside = np.all((points >= lo) & (points <= hi), axis=1)
+    coords[points == hi] = resolution - 1     # The upper boundary belongs to the last cell.
+    np.clip(coords, 0, resolution - 1, out=coords)
+    return coords, inside
+
+
+def linear_index(coords, resolution):
+    return (coords[:, 0] * resolution + coords[:, 1]) * resolution + coords[:, 2]
+
+
+def coordinates_of_index(index, resolution):
+    return np.column_stack(np.unravel_index(index, (resolution, resolution, resolution)))
+
+
+def coordinates_to_points(coords, resolution, lo=-0.5, hi=0.5):
+    '''Returns the (N x 3) centers of the cells with the given integer coordinates.
+    '''
+    return (lo + (coords + 0.5) * cell_size(resolution, lo, hi)).astype(np.float32)
+
+
+def voxelize_point_cloud(points, resolution, mode='occupancy', features=None, lo=-0.5, hi=0.5):
+    '''Dense voxel grid of a point-cloud. Points outside [lo, hi]^3 are ignored.
+    Args:
+        points (N x 3 numpy array).
+        mode (String): 'occupancy' (boolean grid), 'counts' (number of points per cell) or 'mean' (the average of
+            the features of the points of each cell, zero for the empty cells).
+        features (N x F numpy array, optional) used by 'mean'. If None, the points themselves are averaged.
+    Returns:
+        (resolution x resolution x resolution) numpy array, or (resolution x resolution x resolution x F) for 'mean'.
+    '''
+    coords, inside = voxel_coordinates(points, resolution, lo, hi)
+    index = linear_index(coords[inside], resolution)
+    n_cells = resolution ** 3
+    shape = (resolution, resolution, resolution)
+
+    if mode == 'occupancy':
+        grid = np.zeros(n_cells, dtype=np.bool_)
+        grid[index] = True
+        return grid.reshape(shape)
+
+    counts = np.bincount(index, minlength=n_cells)
+    if mode == 'counts':
+        return counts.reshape(shape)
+    elif mode == 'mean':
+        if features is None:
+            features = points
+        features = features[inside].reshape(len(index), -1)
+        denom = np.maximum(counts, 1).astype(np.float64)
+        grid = np.empty((n_cells, features.shape[1]), dtype=np.result_type(features.dtype, np.float32))
+        for f in range(features.shape[1]):
+            grid[:, f] = np.bincount(index, weights=features[:, f], minlength=n_cells) / denom
+        return grid.reshape(shape + (features.shape[1], ))
+    else:
+        raise ValueError('mode must be one of \'occupancy\', \'counts\' or \'mean\'.')
+
+
+def sparse_voxelize_point_cloud(points, resolution, features=None, lo=-0.5, hi=0.5):
+    '''Sparse voxelization, i.e., only the occupied cells are returned. Its memory grows with the number of points
+    instead of resolution^3.
+    Returns:
+        coords (M x 3 numpy array) the integer coordinates of the M occupied cells, sorted by their linear index.
+        counts (M numpy array) the number of points in each of them.
+        means (M x F numpy array) the average features of their points, if features are given.
+    '''
+    coords, inside = voxel_coordinates(points, resolution, lo, hi)
+    index = linear_index(coords[inside], resolution)
+    occupied, inverse, counts = np.unique(index, return_inverse=True, return_counts=True)
+    coords = coordinates_of_index(occupied, resolution)
+    if features is None:
+        return coords, counts
+
+    features = features[inside].reshape(len(index), -1)
+    means = np.empty((len(occupied), features.shape[1]), dtype=np.result_type(features.dtype, np.float32))
+    for f in range(features.shape[1]):
+        means[:, f] = np.bincount(inverse, weights=features[:, f], minlength=len(occupied)) / counts
+    return coords, counts, means
+
+
+def grid_to_sparse(grid):
+    '''Returns the (M x 3) integer coordinates of the non-zero cells of a dense grid and their (M) values (or
+    (M x F) for a grid with features, in which case a cell is kept if any of its features is non-zero).
+    '''
+    if grid.ndim == 4:
+        coords = np.argwhere(np.any(grid != 0, axis=3))
+    else:
+        coords = np.argwhere(grid)
+    return coords, grid[coords[:, 0], coords[:, 1], coords[:, 2]]
+
+
+def sparse_to_grid(coords, resolution, values=None):
+    '''Inverse of grid_to_sparse. If values is None a boolean occupancy grid is returned.
+    '''
+    if values is None:
+        grid = np.zeros((resolution, resolution, resolution), dtype=np.bool_)
+        grid[coords[:, 0], coords[:, 1], coords[:, 2]] = True
+    else:
+        grid = np.zeros((resolution, resolution, resolution) + values.shape[1:], dtype=values.dtype)
+        grid[coords[:, 0], coords[:, 1], coords[:, 2]] = values
+    return grid
+
+
+def sample_triangles(vertices, triangles, n_samples, seed=None):
+    '''Uniform (area weighted) samples of the surface of a triangle mesh. See also Mesh.sample_faces.
+    '''
+    A = vertices[triangles[:, 0]]
+    B = vertices[triangles[:, 1]]
+    C = vertices[triangles[:, 2]]
+    areas = np.sqrt(np.sum(np.square(np.cross(B - A, C - A)), axis=1))
+    cdf = np.cumsum(areas)
+    rng = np.random.RandomState(seed)
+    faces = np.searchsorted(cdf, rng.rand(n_samples) * cdf[-1], side='right')
+    faces = np.minimum(faces, len(triangles) - 1)
+    r = rng.rand(n_samples, 2)
+    m = np.sqrt(r[:, 0:1])
+    n = r[:, 1:]
+    return (1 - m) * A[faces] + m * (1 - n) * B[faces] + m * n * C[faces]
+
+
+def voxelize_mesh_surface(vertices, triangles, resolution, samples_per_cell=8, lo=-0.5, hi=0.5, seed=None):
+    '''Occupancy grid of the cells that the surface of a mesh passes through, found by densely sampling the
+    surface. The number of samples is such that every cell crossed by an (almost flat) piece of surface of area
+    equal to a cell's face gets on average samples_per_cell of them.
+    Returns:
+        (resolution x resolution x resolution) boolean numpy array.
+    '''
+    A = vertices[triangles[:, 0]]
+    area = 0.5 * np.sum(np.sqrt(np.sum(np.square(np.cross(vertices[triangles[:, 1]] - A,
+                                                              vertices[triangles[:, 2]] - A)), axis=1)))
+    n_samples = int(np.ceil(samples_per_cell * area / cell_size(resolution, lo, hi) ** 2))
+    n_samples = max(n_samples, samples_per_cell * len(triangles))
+    points = np.vstack([sample_triangles(vertices, triangles, n_samples, seed), vertices])
+    return voxelize_point_cloud(points, resolution, 'occupancy', lo=lo, hi=hi)
+
+
+def voxelize_mesh_interior(vertices, triangles, resolution, lo=-0.5, hi=0.5):
+    '''Occupancy grid of the cells whose center is inside a closed (watertight) mesh, found by the parity of the
+    number of times the surface crosses the line parallel to the z axis that passes from the center.
+    The crossings of all (triangle, line) pairs are found at once: the lines that fall in the xy-bounding box of
+    every triangle are enumerated with np.repeat, they are tested with (2D) barycentric coordinates, and each
+    crossing adds one to the first cell above it. A cumulative sum along z then gives the parity of every cell.
+    Returns:
+        (resolution x resolution x resolution) boolean numpy array.
+    Notes: a line passing exactly through an edge shared by two triangles would hit both of them at the same
+    height; such duplicates are counted once.
+    '''
+    size = cell_size(resolution, lo, hi)
+    V = (vertices - lo) / size - 0.5   # In this frame the cell centers are on the integer lattice.
+    T = V[triangles]
+
+    xy_min = np.clip(np.ceil(np.min(T[:, :, :2], axis=1)), 0, resolution).astype(np.int64)
+    xy_max = np.clip(np.floor(np.max(T[:, :, :2], axis=1)), -1, resolution - 1).astype(np.int64)
+    extent = np.maximum(xy_max - xy_min + 1, 0)
+    n_lines = extent[:, 0] * extent[:, 1]
+
+    tri = np.repeat(np.arange(len(T)), n_lines)
+    offsets = np.cumsum(n_lines) - n_lines
+    local = np.arange(len(tri)) - np.repeat(offsets, n_lines)
+    px = xy_min[tri, 0] + local // extent[tri, 1]
+    py = xy_min[tri, 1] + local % extent[tri, 1]
+
+    a = T[tri, 0]
+    b = T[tri, 1]
+    c = T[tri, 2]
+    det = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (b[:, 1] - a[:, 1])
+    valid = det != 0      # Triangles parallel to the lines are never crossed.
+    det[~valid] = 1
+    w1 = ((px - a[:, 0]) * (c[:, 1] - a[:, 1]) - (c[:, 0] - a[:, 0]) * (py - a[:, 1])) / det
+    w2 = ((b[:, 0] - a[:, 0]) * (py - a[:, 1]) - (px - a[:, 0]) * (b[:, 1] - a[:, 1])) / det
+    w0 = 1 - w1 - w2
+    hit = valid & (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+
+    z = (w0 * a[:, 2] + w1 * b[:, 2] + w2 * c[:, 2])[hit]
+    column = (px * resolution + py)[hit]
+    first_above = np.clip(np.floor(z).astype(np.int64) + 1, 0, resolution)
+
+    crossings = np.column_stack([column, np.round(z, 6)])
+    _, unique = np.unique(crossings, axis=0, return_index=True)
+    flips = np.bincount(column[unique] * (resolution + 1) + first_above[unique],
+                        minlength=resolution * resolution * (resolution + 1))
+    flips = flips.reshape(resolution, resolution, resolution + 1)[:, :, :resolution]
+    return (np.cumsum(flips, axis=2) % 2).astype(np.bool_)
@@ -10,9 +10,11 @@ you want for non-commercial purposes.
 import glob
 import os
 import os.path as osp
+import numpy as np
 from subprocess import call as sys_call
 
 from .. in_out import soup as io
+from . ray_casting import cast_views
 
 
 class Back_Tracer():
@@ -20,22 +22,65 @@ class Back_Tracer():
     A class providing the basic functionality for converting information
     regarding 2D rendered output of Fythumb into back into thr 3D space
     of the Mesh models.
+
+    The pixel to triangle maps of all the views are kept in one (n_views x height x width) int32 array, with -1 for
+    the pixels that do not see the mesh. The views are indexed via view_index, a dictionary from (vertex_id, twist_id).
     '''
 
     fythumb_bin = '/Users/optas/Documents/Eclipse_Projects/3d/thumb3d/build/thumb3d'
 
-    def __init__(self, triangle_folder, in_mesh):
+    def __init__(self, triangle_folder, in_mesh, views=None, image_size=(256, 256)):
         '''
         Constructor.
+            If triangle_folder is None, the pixel to triangle maps are computed in-process by ray casting the given
+            (vertex_id, twist_id) views (all of them if views is None), see ray_casting.cast_views. Otherwise, they
+            are read from the files of the folder, whose images are assumed to have (height, width) = image_size.
         '''
         self.mesh = in_mesh
-        self.map = Back_Tracer.generate_pixels_to_triangles_map(triangle_folder, in_mesh)
+        if triangle_folder is None:
+            res = Back_Tracer.generate_pixels_to_triangles_map_by_ray_casting(in_mesh, views, image_size)
+        else:
+            res = Back_Tracer.generate_pixels_to_triangles_map(triangle_folder, in_mesh, image_size)
+        self.views, self.map = res
+        self.view_index = {v: i for i, v in enumerate(self.views)}
 
     def from_2D_to_3D(self, pixels, vertex_id, twist_id):
-        return self.map[vertex_id, twist_id][pixels]
+        '''Returns the triangles seen by the given pixels of a view: for an (x, y) tuple the triangle id (a KeyError
+        is raised if the pixel does not see the mesh), and for an (M x 2) numpy array of (x, y) pixels an (M) numpy
+        array with -1 for the pixels that do not see the mesh.
+        '''
+        view_map = self.map[self.view_index[(vertex_id, twist_id)]]
+        if isinstance(pixels, tuple):
+            triangle = view_map[pixels[1], pixels[0]]
+            if triangle < 0:
+                raise KeyError(pixels)
+            return triangle
+        pixels = np.asarray(pixels)
+        return view_map[pixels[:, 1], pixels[:, 0]]
 
     def is_legit_view_and_twist(self, vertex_id, twist_id):
-        return (vertex_id, twist_id) in self.map
+        return (vertex_id, twist_id) in self.view_index
+
+    def maps_of_views(self, cam_positions):
+        '''Returns the (len(cam_positions) x height x width) pixel to triangle maps of the given (vertex_id, twist_id)
+        views, in their order.
+        '''
+        try:
+            index = [self.view_index[(v, t)] for v, t in cam_positions]
+        except KeyError:
+            raise ValueError('The Back_Tracer does not have a map for every requested view.')
+        return self.map[index]
+
+    @staticmethod
+    def _pixel_maps(view_data, image_size):
+        '''Scatters the (pixels, triangle ids) of every view into the (n_views x height x width) array.
+        '''
+        views = sorted(view_data.keys())
+        res = np.full((len(views), ) + tuple(image_size), -1, dtype=np.int32)
+        for i, view in enumerate(views):
+            pixels, triangles = view_data[view]
+            res[i, pixels[:, 1], pixels[:, 0]] = triangles
+        return views, res
 
     @staticmethod
     def render_views_of_shapes(top_dir, output_dir, regex):
@@ -73,19 +118,26 @@ class Back_Tracer():
         print 'Computed the triangles for %d files.' % (c)
 
     @staticmethod
-    def generate_pixels_to_triangles_map(triangle_folder, in_mesh):
+    def generate_pixels_to_triangles_map(triangle_folder, in_mesh, image_size=(256, 256)):
         searh_pattern = osp.join(triangle_folder, '*.txt')
-        inv_dict = in_mesh.inverse_triangle_dictionary()
-        res = dict()
+        view_data = dict()
         for triangle_file in glob.glob(searh_pattern):
             camera_vertex, camera_twist = io.name_to_cam_position(triangle_file, cam_delim='_')
-            res[(camera_vertex, camera_twist)] = dict()
             pixels, triangles, _ = io.read_triangle_file(triangle_file)
-            triangles = map(tuple, triangles)
-            triangles = [inv_dict[tr] for tr in triangles]
-            pixels = map(tuple, pixels)
-            res[(camera_vertex, camera_twist)] = {key: val for key, val in zip(pixels, triangles)}
-        return res
+            triangle_ids = in_mesh.find_triangles(triangles)
+            missing = np.sum(triangle_ids < 0)
+            if missing > 0:
+                raise ValueError('%d of the %d triangles of %s are not triangles of the mesh.'
+                                 % (missing, len(triangle_ids), triangle_file))
+            view_data[(camera_vertex, camera_twist)] = (pixels, triangle_ids)
+        return Back_Tracer._pixel_maps(view_data, image_size)
+
+    @staticmethod
+    def generate_pixels_to_triangles_map_by_ray_casting(in_mesh, views=None, image_size=(256, 256)):
+        view_data = dict()
+        for view, (pixels, triangles, _) in cast_views(in_mesh, views, image_size=image_size).items():
+            view_data[view] = (pixels, triangles)
+        return Back_Tracer._pixel_maps(view_data, image_size)
 
 if __name__ == '__main__':    
     from geo_tool.solids.mesh import Mesh
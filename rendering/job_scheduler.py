@@ -0,0 +1,164 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+A scheduler of (external) rendering jobs, e.g., the mitsuba + mtsutil tonemap commands of Mitsuba_Rendering. Every
+job is a sequence of commands that run one after the other, and the jobs run concurrently over a pool of workers
+(threads, each waiting on its own sub-process). Jobs whose outputs are up to date are skipped and failed jobs are
+retried.
+'''
+
+import os
+import json
+import time
+import hashlib
+import threading
+import subprocess
+from multiprocessing.pool import ThreadPool
+
+
+class Render_Job(object):
+    '''A named sequence of commands (lists of arguments) that make the outputs files from the inputs files.
+    Its status is one of 'pending', 'skipped', 'running', 'done' or 'failed'.
+    '''
+
+    def __init__(self, name, commands, inputs=(), outputs=()):
+        self.name = name
+        self.commands = [list(c) for c in commands]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.status = 'pending'
+        self.attempts = 0
+        self.elapsed = None     # Seconds of the last attempt.
+        self.error = None
+
+    def __str__(self):
+        return 'Render Job %s (%s, %d attempts).' % (self.name, self.status, self.attempts)
+
+    def inputs_digest(self):
+        '''md5 of the contents of the input files.
+        '''
+        md5 = hashlib.md5()
+        for f in self.inputs:
+            with open(f, 'rb') as f_in:
+                for block in iter(lambda: f_in.read(2 ** 20), b''):
+                    md5.update(block)
+        return md5.hexdigest()
+
+
+class Job_Scheduler(object):
+    '''
+    Runs Render_Jobs concurrently.
+    '''
+
+    def __init__(self, n_workers=4, max_retries=1, skip='mtime', manifest_file=None, verbose=False):
+        '''
+        Constructor.
+            n_workers (int): the number of jobs that run at the same time.
+            max_retries (int): a failed job is run again up to this many times.
+            skip (String or None): 'mtime' skips the jobs whose outputs exist and are newer than their inputs. 'hash'
+                skips the jobs whose outputs exist and whose inputs have the same (md5) contents as when the outputs
+                were made, which are kept in the manifest_file (json). None runs all the jobs.
+        '''
+        if skip not in (None, 'mtime', 'hash'):
+            raise ValueError('skip must be None, \'mtime\' or \'hash\'.')
+        if skip == 'hash' and manifest_file is None:
+            raise ValueError('The \'hash\' skip policy needs a manifest_file.')
+        self.n_workers = n_workers
+        self.max_retries = max_retries
+        self.skip = skip
+        self.manifest_file = manifest_file
+        self.verbose = verbose
+        self._lock = threading.Lock()
+        self._manifest = dict()
+        if manifest_file is not None and os.path.isfile(manifest_file):
+            with open(manifest_file) as f_in:
+                self._manifest = json.load(f_in)
+
+    def is_up_to_date(self, job):
+        if self.skip is None or not all(os.path.isfile(f) for f in job.outputs):
+            return False
+        if self.skip == 'mtime':
+            if len(job.inputs) == 0:
+                return True
+            newest_input = max(os.path.getmtime(f) for f in job.inputs)
+            return min(os.path.getmtime(f) for f in job.outputs) >= newest_input
+        return self._manifest.get(job.name) == job.inputs_digest()
+
+    def _run_commands(self, job):
+        for command in job.commands:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            out = process.communicate()[0]
+            if process.returncode != 0:
+                return 'Command %s returned %d: %s' % (' '.join(command), process.returncode,
+                                                       out.decode('utf-8', 'replace')[-1000:])
+        missing = [f for f in job.outputs if not os.path.isfile(f)]
+        if len(missing) > 0:
+            return 'Missing outputs: %s' % (', '.join(missing), )
+        return None
+
+    def _run_job(self, job):
+        if self.is_up_to_date(job):
+            job.status = 'skipped'
+            return job
+        digest = job.inputs_digest() if self.skip == 'hash' else None   # Of the inputs the outputs are made from.
+
+        job.status = 'running'
+        while job.status == 'running':
+            job.attempts += 1
+            start = time.time()
+            try:
+                job.error = self._run_commands(job)
+            except OSError as e:
+                job.error = str(e)
+            job.elapsed = time.time() - start
+            if job.error is None:
+                job.status = 'done'
+            elif job.attempts > self.max_retries:
+                job.status = 'failed'
+
+        if self.verbose:
+            print(str(job) if job.error is None else str(job) + ' ' + job.error)
+        if job.status == 'done' and digest is not None:
+            with self._lock:
+                self._manifest[job.name] = digest
+        return job
+
+    def run(self, jobs):
+        '''Runs the jobs and returns the statistics of the run, see statistics.
+        '''
+        start = time.time()
+        if self.n_workers > 1 and len(jobs) > 1:
+            pool = ThreadPool(min(self.n_workers, len(jobs)))
+            try:
+                pool.map(self._run_job, jobs, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for job in jobs:
+                self._run_job(job)
+
+        if self.manifest_file is not None:
+            with open(self.manifest_file, 'w') as f_out:
+                json.dump(self._manifest, f_out)
+        return Job_Scheduler.statistics(jobs, time.time() - start)
+
+    @staticmethod
+    def statistics(jobs, wall_time=None):
+        '''Returns a dictionary with the number of jobs per status, the retries, the total, mean and max seconds that
+        the (last attempts of the) jobs that ran took, and (if wall_time is given) the jobs done per second.
+        '''
+        res = {status: 0 for status in ('pending', 'skipped', 'running', 'done', 'failed')}
+        for job in jobs:
+            res[job.status] += 1
+        elapsed = [job.elapsed for job in jobs if job.elapsed is not None]
+        res['retries'] = sum(max(job.attempts - 1, 0) for job in jobs)
+        res['total_seconds'] = sum(elapsed)
+        res['mean_seconds'] = res['total_seconds'] / len(elapsed) if len(elapsed) > 0 else 0
+        res['max_seconds'] = max(elapsed) if len(elapsed) > 0 else 0
+        if wall_time is not None:
+            res['wall_seconds'] = wall_time
+            res['jobs_per_second'] = res['done'] / wall_time if wall_time > 0 else 0
+        return res
@@ -3,16 +3,135 @@ __author__ = "Panos Achlioptas, Lin Shao, 2017."
 import os
 import numpy as np
 import shutil
+import filecmp
 import os.path as osp
 import matplotlib.pyplot as plt
+from multiprocessing import Pool
 
 from geo_tool.in_out.soup import load_wavefront_obj, load_ply
 from geo_tool import Point_Cloud
+from geo_tool.rendering.job_scheduler import Render_Job, Job_Scheduler
 
 from general_tools.in_out import create_dir
 from general_tools.strings import trim_content_after_last_dot
 from general_tools.plotting.colors import rgb_to_hex_string
 
+default_sphere_color = '#6d7185'
+
+
+_hex_digits = np.frombuffer(''.join('%02x' % i for i in range(256)).encode('ascii'), dtype=np.uint8).reshape(256, 2)
+
+
+def _fixed_point_bytes(values, decimals=6):
+    '''Formats (N) floats as the (N x width) ascii codes of fixed width decimals: a sign, as many integer digits as
+    the largest value needs (zero padded) and the given number of decimals, e.g., '+0.125000' and '-1.500000'.
+    '''
+    q = np.round(np.abs(values) * 10 ** decimals).astype(np.int64)
+    n_int = len(str(int(np.max(q, initial=0)) // 10 ** decimals))
+    res = np.empty((len(values), n_int + decimals + 2), dtype=np.uint8)
+    res[:, 0] = np.where(values < 0, ord('-'), ord('+'))
+    res[:, n_int + 1] = ord('.')
+    for col in list(range(n_int + decimals + 1, n_int + 1, -1)) + list(range(n_int, 0, -1)):
+        res[:, col] = ord('0') + q % 10
+        q //= 10
+    return res
+
+
+def _integer_bytes(values, width):
+    res = np.empty((len(values), width), dtype=np.uint8)
+    q = np.array(values, dtype=np.int64)
+    for col in range(width - 1, -1, -1):
+        res[:, col] = ord('0') + q % 10
+        q //= 10
+    return res
+
+
+def _format_rows(pieces, chunk_size):
+    '''Concatenates row-wise a list of pieces, which are constant strings or (N x w) arrays with the ascii codes of a
+    field of every row, i.e., formats all the rows in one vectorized pass (per chunk of rows).
+    Returns:
+        a list of strings (chunks) whose concatenation is the N formatted rows.
+    '''
+    n = max(len(p) for p in pieces if not isinstance(p, str))
+    res = []
+    for start in range(0, n, chunk_size):
+        m = min(chunk_size, n - start)
+        columns = []
+        for p in pieces:
+            if isinstance(p, str):
+                p = np.frombuffer(p.encode('ascii'), dtype=np.uint8)[np.newaxis, :]
+                columns.append(np.broadcast_to(p, (m, p.shape[1])))
+            else:
+                columns.append(p[start:start + m])
+        res.append(np.concatenate(columns, axis=1).tobytes().decode('ascii'))
+    return res
+
+
+def _sphere_pieces(sphere_radius, translation, color):
+    return ['<shape type="sphere">\n'
+            '\t<float name="radius" value="%f"/>\n'
+            '\t<transform name="toWorld">\n'
+            '\t\t<translate x="' % (sphere_radius, ), translation[0], '" y="', translation[1], '" z="', translation[2],
+            '"/>\n'
+            '\t</transform>\n'
+            '\t<bsdf type="diffuse">\n'
+            '\t\t<srgb name="diffuseReflectance" value="', color, '"/>\n'
+            '\t</bsdf>\n'
+            '</shape>\n\n']
+
+
+def xml_spheres(points, sphere_radius, colors=None, instanced=False, chunk_size=8192):
+    '''The Mitsuba XML of (one sphere per point of) a point-cloud. Unlike xml_point_string, all the points are
+    formatted at once, by writing the digits of their (fixed width) coordinates straight into a byte buffer.
+    Args:
+        points (N x 3 numpy array).
+        colors (N x 3 numpy array, optional) integer RGB values in [0, 255]. If None, all the spheres have the
+            default color.
+        instanced (boolean): if True, one shapegroup is declared per distinct color and every point is an instance
+            of it, translated to the point. This reduces the size of the XML by about 40%.
+    Returns:
+        a list of strings (chunks) whose concatenation is the XML.
+    '''
+    points = np.asarray(points, dtype=np.float64)
+    translation = [_fixed_point_bytes(points[:, i]) for i in range(3)]
+    if colors is not None:
+        colors = np.asarray(colors)
+        if np.any(colors < 0) or np.any(colors > 255) or np.any(colors != np.round(colors)):
+            raise ValueError('The colors must be integers in [0, 255].')
+        colors = colors.astype(np.int64)
+
+    if not instanced:
+        if colors is None:
+            return _format_rows(_sphere_pieces(sphere_radius, translation, default_sphere_color), chunk_size)
+        hex_colors = np.column_stack([np.full(len(colors), ord('#'), dtype=np.uint8),
+                                      _hex_digits[colors].reshape(len(colors), 6)])
+        return _format_rows(_sphere_pieces(sphere_radius, translation, hex_colors), chunk_size)
+
+    if colors is None:
+        unique_colors = [default_sphere_color]
+        group_of_point = np.zeros(len(points), dtype=np.int64)
+    else:
+        unique, group_of_point = np.unique(colors.dot([65536, 256, 1]), return_inverse=True)  # Packed as 0xRRGGBB.
+        unique_colors = ['#%06x' % c for c in unique.tolist()]
+
+    width = len(str(len(unique_colors) - 1))
+    res = []
+    for i, color_value in enumerate(unique_colors):
+        shape = ''.join(_sphere_pieces(sphere_radius, ['+0.000000'] * 3, color_value))
+        res.append('<shape type="shapegroup" id="point_%0*d">\n%s</shape>\n\n' % (width, i, shape))
+    pieces = ['<shape type="instance">\n'
+              '\t<ref id="point_', _integer_bytes(np.ravel(group_of_point), width), '"/>\n'
+              '\t<transform name="toWorld">\n'
+              '\t\t<translate x="', translation[0], '" y="', translation[1], '" z="', translation[2], '"/>\n'
+              '\t</transform>\n'
+              '</shape>\n\n']
+    return res + _format_rows(pieces, chunk_size)
+
+
+def _write_point_cloud_scene(args):
+    renderer, model_file, color_per_point, instanced = args
+    return renderer.write_point_cloud_scene(model_file, color_per_point, instanced)
+
 
 class Mitsuba_Rendering(object):
 
@@ -76,31 +195,57 @@ class Mitsuba_Rendering(object):
 
         return pc, color
 
-    def generate_commands_for_point_cloud_rendering(self, color_per_point=False):
-        command = ''
-        for model_file in self.model_list:
-            pcloud, colors = self.pc_loader(model_file, load_color=color_per_point)
-            pc_z_min = np.min(pcloud.points[:, 2])
-
-            model_name = trim_content_after_last_dot(osp.basename(model_file))
-            xml_file = os.path.join(self.temp_dir, model_name + '.xml')
-
-            with open(xml_file, 'w') as xml_out:
-                xml_out.write(self.xml_string(pc_z_min))
-                if colors is not None:
-                    for i, point in enumerate(pcloud.points):
-                        xml_out.write(self.xml_point_string(self.sphere_radius, point, colors[i]))
-                else:
-                    for point in pcloud.points:
-                        xml_out.write(self.xml_point_string(self.sphere_radius, point))
+    def scene_files(self, model_file):
+        '''The xml, exr (rendered) and png (tone-mapped) files of a model.
+        '''
+        model_name = trim_content_after_last_dot(osp.basename(model_file))
+        xml_file = os.path.join(self.temp_dir, model_name + '.xml')
+        exr_file = os.path.join(self.temp_dir, model_name + '.exr')
+        img_file = os.path.join(self.img_out_dir, model_name + '.png')
+        return xml_file, exr_file, img_file
+
+    def write_point_cloud_scene(self, model_file, color_per_point=False, instanced=False):
+        '''Writes the XML scene of a point-cloud model and returns the commands that render it. An existing scene
+        with the same content is left untouched (thus, so is its modification time).
+        '''
+        pcloud, colors = self.pc_loader(model_file, load_color=color_per_point)
+        pc_z_min = np.min(pcloud.points[:, 2])
+        xml_file, exr_file, img_file = self.scene_files(model_file)
+
+        temp_file = xml_file + '.tmp'
+        with open(temp_file, 'w') as xml_out:
+            xml_out.write(self.xml_string(pc_z_min))
+            xml_out.writelines(xml_spheres(pcloud.points, self.sphere_radius, colors, instanced))
+            xml_out.write(self.xml_closure())
+        if osp.isfile(xml_file) and filecmp.cmp(temp_file, xml_file, shallow=False):
+            os.remove(temp_file)
+        else:
+            os.rename(temp_file, xml_file)
 
-                xml_out.write(self.xml_closure())
+        command = 'mitsuba %s\n' % xml_file
+        command += 'mtsutil tonemap -o %s %s\n\n' % (img_file, exr_file)
+        return command
 
-            img_file = os.path.join(self.img_out_dir, model_name + '.png')
-            exr_file = os.path.join(self.temp_dir, model_name + '.exr')
+    def write_point_cloud_scenes(self, color_per_point=False, instanced=False, n_workers=1):
+        '''Writes the XML scenes of all the models (in parallel over n_workers processes) and returns the commands
+        that render them. See xml_spheres for instanced.
+        '''
+        jobs = [(self, model_file, color_per_point, instanced) for model_file in self.model_list]
+        if n_workers > 1 and len(jobs) > 1:
+            pool = Pool(n_workers)
+            try:
+                commands = pool.map(_write_point_cloud_scene, jobs)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            commands = [_write_point_cloud_scene(job) for job in jobs]
+        return ''.join(commands)
 
-            command += 'mitsuba %s\n' % xml_file
-            command += 'mtsutil tonemap -o %s %s\n\n' % (img_file, exr_file)
+    def generate_commands_for_point_cloud_rendering(self, color_per_point=False, instanced=False, n_workers=1):
+        '''Writes the XML scenes of all the models and the command file that renders them.
+        '''
+        command = self.write_point_cloud_scenes(color_per_point, instanced, n_workers)
 
         with open(self.command_file, 'w') as fout:
             fout.write(command)
@@ -114,6 +259,36 @@ class Mitsuba_Rendering(object):
         except:
             pass
 
+    def render_jobs(self, mitsuba_bin='mitsuba', mtsutil_bin='mtsutil'):
+        '''The Render_Jobs (render and tone-map) of the models, whose scenes are already written.
+        Args:
+            mitsuba_bin, mtsutil_bin (String or list of Strings): the commands that stand for mitsuba and mtsutil,
+                e.g., a local script when testing.
+        '''
+        mitsuba_bin = [mitsuba_bin] if isinstance(mitsuba_bin, str) else list(mitsuba_bin)
+        mtsutil_bin = [mtsutil_bin] if isinstance(mtsutil_bin, str) else list(mtsutil_bin)
+        jobs = []
+        for model_file in self.model_list:
+            xml_file, exr_file, img_file = self.scene_files(model_file)
+            commands = [mitsuba_bin + [xml_file], mtsutil_bin + ['tonemap', '-o', img_file, exr_file]]
+            jobs.append(Render_Job(osp.basename(xml_file), commands, inputs=[xml_file], outputs=[img_file]))
+        return jobs
+
+    def render_point_clouds(self, color_per_point=False, instanced=False, n_workers=4, max_retries=1, skip='hash',
+                            mitsuba_bin='mitsuba', mtsutil_bin='mtsutil', verbose=False):
+        '''Writes the scenes of the models and renders them, n_workers at a time (instead of via the command file).
+        With the (default) 'hash' skip policy, the models whose scenes did not change since they were last rendered
+        are not rendered again. The same holds with 'mtime', since the scenes that did not change are not rewritten.
+        See Job_Scheduler for the rest of the arguments.
+        Returns:
+            the Render_Jobs (with their status) and the statistics of the run.
+        '''
+        self.write_point_cloud_scenes(color_per_point, instanced, n_workers)
+        jobs = self.render_jobs(mitsuba_bin, mtsutil_bin)
+        manifest = osp.join(self.temp_dir, 'render_manifest.json') if skip == 'hash' else None
+        scheduler = Job_Scheduler(n_workers, max_retries, skip, manifest, verbose)
+        return jobs, scheduler.run(jobs)
+
     def xml_string(self, pc_z_min):
         return self.xml_preamble() + self.xml_sensor() + self.xml_emitter() + self.xml_backdrop(pc_z_min)
 
@@ -122,7 +297,7 @@ class Mitsuba_Rendering(object):
             r, g, b = color
             color_value = rgb_to_hex_string(r, g, b)
         else:
-            color_value = '#6d7185'
+            color_value = default_sphere_color
 
         out_str = '<shape type="sphere">\n'
         out_str += '\t<float name="radius" value="%f"/>\n' % (sphere_radius, )
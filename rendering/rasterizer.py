@@ -0,0 +1,232 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+A (numpy vectorized) triangle rasterizer that renders the depth maps, silhouettes, triangle-id buffers and normal
+maps of a mesh from many (orthographic) cameras, without external binaries. The triangles are expanded to the
+pixels they cover (fragments) by intersecting every row of their screen-space bounding boxes with them, and the
+z-buffering is done by scattering the minimum depth of every pixel (np.minimum.at), which is several times faster
+than sorting the fragments on (pixel, depth). The views follow the (vertex_id, twist_id) convention of ray_casting,
+thus the rendered triangle ids agree with those found by casting the rays of the pixel centers.
+'''
+
+import os
+import warnings
+import numpy as np
+
+from . ray_casting import Orthographic_Camera, dodecahedron_vertices
+from .. solids.mesh import Mesh
+
+try:
+    import cv2
+except:
+    warnings.warn('OpenCV library is not installed.')
+
+
+def project(points, camera):
+    '''Returns the (continuous) pixel coordinates x, y and the depths (distance along the viewing axis from the
+    camera) of (N x 3) points. Pixel (x, y) has its center at the integer coordinates (x, y).
+    '''
+    h, w = camera.image_size
+    p = points - camera.position
+    x = (np.dot(p, camera.right) / camera.extent + 1) * (w / 2.0) - 0.5
+    y = (1 - np.dot(p, camera.up) / camera.extent) * (h / 2.0) - 0.5
+    return x, y, np.dot(p, camera.forward)
+
+
+def _affine_coefficients(x, y, values):
+    '''The (T x 3) coefficients (a, b, c) of the affine functions a x + b y + c of the pixel coordinates that are
+    equal to the (T x 3) values at the (T x 3) screen-space vertices x, y of triangles.
+    '''
+    ex1, ey1 = x[:, 1] - x[:, 0], y[:, 1] - y[:, 0]
+    ex2, ey2 = x[:, 2] - x[:, 0], y[:, 2] - y[:, 0]
+    area = ex1 * ey2 - ex2 * ey1
+    dv1 = values[:, 1] - values[:, 0]
+    dv2 = values[:, 2] - values[:, 0]
+    a = (dv1 * ey2 - dv2 * ey1) / area
+    b = (dv2 * ex1 - dv1 * ex2) / area
+    return np.column_stack([a, b, values[:, 0] - a * x[:, 0] - b * y[:, 0]])
+
+
+def _fragments(triangles, x, y, y0, ny, width):
+    '''Scan-converts the given triangles: every row of their bounding boxes is intersected with the triangle and
+    expanded to the pixels between the intersections. Returns the triangle, x and y of every fragment.
+    '''
+    c = ny[triangles]
+    tri = np.repeat(triangles, c)
+    row_y = (y0[tri] + np.arange(len(tri)) - np.repeat(np.cumsum(c) - c, c)).astype(np.float64)
+    left = np.full(len(tri), np.inf)
+    right = np.full(len(tri), -np.inf)
+    for i, j in ((0, 1), (1, 2), (2, 0)):
+        xa, ya, xb, yb = x[tri, i], y[tri, i], x[tri, j], y[tri, j]
+        crossing = (np.minimum(ya, yb) <= row_y) & (row_y <= np.maximum(ya, yb)) & (ya != yb)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            at = np.where(crossing, xa + (row_y - ya) * (xb - xa) / (yb - ya), np.nan)
+        left = np.fmin(left, at)
+        right = np.fmax(right, at)
+    eps = 10e-9     # The pixels on the edges are drawn.
+    left = np.maximum(np.ceil(left - eps), 0).astype(np.int64)
+    right = np.minimum(np.floor(right + eps), width - 1).astype(np.int64)
+    c = np.maximum(right - left + 1, 0)
+    row = np.repeat(np.arange(len(tri)), c)
+    px = left[row] + np.arange(len(row)) - np.repeat(np.cumsum(c) - c, c)
+    return tri[row], px, row_y[row].astype(np.int64)
+
+
+def rasterize(in_mesh, camera, cull_back_faces=False, max_fragments=2 ** 22):
+    '''Renders a mesh from one camera.
+    Args:
+        cull_back_faces (boolean): if True, the triangles whose (outward) normals point away from the camera are not
+            rendered.
+        max_fragments (int): the triangles are rasterized in chunks of (at most) this many bounding-box pixels.
+    Returns:
+        depth (height x width float32 numpy array) with np.inf for the pixels that do not see the mesh.
+        face_ids (height x width int32 numpy array) the triangle seen by every pixel, -1 for the background.
+        barycentric (height x width x 3 float32 numpy array) the barycentric coordinates of the seen points.
+    '''
+    h, w = camera.image_size
+    V = in_mesh.vertices
+    T = in_mesh.triangles
+    vx, vy, vz = project(V, camera)
+    x = vx[T]
+    y = vy[T]
+
+    area = (x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0]) - (x[:, 2] - x[:, 0]) * (y[:, 1] - y[:, 0])
+    drawn = np.abs(area) > 10e-12        # Triangles seen edge-on cover no pixel centers.
+    if cull_back_faces:
+        normals = Mesh.normals_of_triangles(V, T)
+        drawn &= np.dot(normals, camera.forward) < 0
+
+    y0 = np.maximum(np.ceil(np.min(y, axis=1)), 0).astype(np.int64)
+    ny = np.maximum(np.minimum(np.floor(np.max(y, axis=1)), h - 1).astype(np.int64) - y0 + 1, 0)
+    nx = np.maximum(np.minimum(np.floor(np.max(x, axis=1)), w - 1) - np.maximum(np.ceil(np.min(x, axis=1)), 0) + 1, 0)
+    counts = ny * nx.astype(np.int64)
+    drawn = np.where(drawn & (counts > 0))[0]
+
+    z_plane = np.zeros((len(T), 3))
+    bary_planes = np.zeros((len(T), 2, 3))
+    z_plane[drawn] = _affine_coefficients(x[drawn], y[drawn], vz[T[drawn]])
+    bary_planes[drawn, 0] = _affine_coefficients(x[drawn], y[drawn], np.tile([0.0, 1.0, 0.0], (len(drawn), 1)))
+    bary_planes[drawn, 1] = _affine_coefficients(x[drawn], y[drawn], np.tile([0.0, 0.0, 1.0], (len(drawn), 1)))
+
+    depth = np.full(h * w, np.inf)
+    face_ids = np.full(h * w, -1, dtype=np.int32)
+    barycentric = np.zeros((h * w, 3), dtype=np.float32)
+
+    total = np.cumsum(counts[drawn])
+    start = 0
+    while start < len(drawn):
+        done = total[start - 1] if start > 0 else 0
+        end = max(np.searchsorted(total, done + max_fragments, side='right'), start + 1)
+        tri, px, py = _fragments(drawn[start:end], x, y, y0, ny, w)
+        start = end
+
+        plane = z_plane[tri]
+        fz = plane[:, 0] * px + plane[:, 1] * py + plane[:, 2]
+        pixel = py * w + px
+        previous = depth[pixel]     # What the previous chunks drew.
+        np.minimum.at(depth, pixel, fz)
+        front = np.where((fz == depth[pixel]) & (fz < previous))[0]
+        smallest = np.full(h * w, len(T), dtype=np.int64)   # Ties in depth are won by the smallest triangle id.
+        np.minimum.at(smallest, pixel[front], tri[front])
+        front = front[tri[front] == smallest[pixel[front]]]
+
+        tri, px, py, pixel = tri[front], px[front], py[front], pixel[front]
+        planes = bary_planes[tri]
+        l12 = planes[:, :, 0] * px[:, np.newaxis] + planes[:, :, 1] * py[:, np.newaxis] + planes[:, :, 2]
+        face_ids[pixel] = tri
+        barycentric[pixel] = np.column_stack([1 - np.sum(l12, axis=1), l12])
+
+    return depth.astype(np.float32).reshape(h, w), face_ids.reshape(h, w), barycentric.reshape(h, w, 3)
+
+
+def normal_map(in_mesh, face_ids, barycentric, smooth=False):
+    '''The (... x 3) unit normals of the rendered points, given their face_ids and barycentric coordinates (see
+    rasterize). They are zero for the background pixels.
+    Args:
+        smooth (boolean): if True, the normals are interpolated from the (cached) vertex normals, otherwise they are
+            the normals of the triangles.
+    '''
+    res = np.zeros(face_ids.shape + (3, ), dtype=np.float32)
+    seen = face_ids >= 0
+    faces = face_ids[seen]
+    if smooth:
+        vn = in_mesh.unit_normals_of_vertices()[in_mesh.triangles[faces]]
+        n = np.sum(vn * barycentric[seen][:, :, np.newaxis], axis=1)
+    else:
+        n = Mesh.normals_of_triangles(in_mesh.vertices, in_mesh.triangles)[faces]
+    res[seen] = n / np.maximum(np.sqrt(np.sum(np.square(n), axis=1, keepdims=True)), 10e-12)
+    return res
+
+
+def rasterize_views(in_mesh, views=None, cameras=None, n_twists=4, image_size=(256, 256), extent=0.55, distance=2.0,
+                    smooth_normals=False, cull_back_faces=False):
+    '''Renders a mesh from a set of (vertex_id, twist_id) views (all the 20 x n_twists of them by default), or from a
+    list of given cameras.
+    Returns:
+        dictionary with the lists of the 'views' and the 'cameras', and the (n_views x height x width) buffers
+        'depth' (float32, np.inf for the background), 'face_ids' (int32, -1 for the background), 'silhouettes'
+        (boolean) and 'normals' (n_views x height x width x 3 float32).
+    '''
+    if cameras is None:
+        if views is None:
+            views = [(v, t) for v in range(len(dodecahedron_vertices())) for t in range(n_twists)]
+        cameras = [Orthographic_Camera.of_view(v, t, n_twists, distance, image_size, extent) for v, t in views]
+    else:
+        image_size = cameras[0].image_size
+        if views is None:
+            views = [(i, 0) for i in range(len(cameras))]
+
+    n_views = len(cameras)
+    depth = np.empty((n_views, ) + tuple(image_size), dtype=np.float32)
+    face_ids = np.empty((n_views, ) + tuple(image_size), dtype=np.int32)
+    normals = np.empty((n_views, ) + tuple(image_size) + (3, ), dtype=np.float32)
+    for i, cam in enumerate(cameras):
+        depth[i], face_ids[i], barycentric = rasterize(in_mesh, cam, cull_back_faces)
+        normals[i] = normal_map(in_mesh, face_ids[i], barycentric, smooth_normals)
+
+    return {'views': list(views), 'cameras': cameras, 'depth': depth, 'face_ids': face_ids,
+            'silhouettes': face_ids >= 0, 'normals': normals}
+
+
+def shaded_images(renders):
+    '''Gray-scale (uint8) images of the renders, lit from the cameras. The mesh is drawn with values in [1, 255],
+    thus the non-zero pixels of the images are exactly the silhouettes.
+    '''
+    res = np.zeros(renders['face_ids'].shape, dtype=np.uint8)
+    for i, cam in enumerate(renders['cameras']):
+        seen = renders['silhouettes'][i]
+        light = np.abs(np.dot(renders['normals'][i][seen], cam.forward))
+        res[i][seen] = np.round(1 + 254 * light).astype(np.uint8)
+    return res
+
+
+def write_views(renders, out_dir, prefix='view', file_format='png'):
+    '''Saves the shaded images of the renders as out_dir/prefix-vertex_id-twist_id.file_format, which can be loaded
+    with Shape_Views (see in_out.soup.name_to_cam_position). The prefix should not end with a digit.
+    '''
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    for (vertex_id, twist_id), image in zip(renders['views'], shaded_images(renders)):
+        out_file = os.path.join(out_dir, '%s-%d-%d.%s' % (prefix, vertex_id, twist_id, file_format))
+        cv2.imwrite(out_file, image)
+
+
+def write_triangle_files(renders, in_mesh, out_dir):
+    '''Saves the pixel to triangle maps of the renders as out_dir/vertex_id_twist_id.txt, in the format read by
+    Back_Tracer: every line has the x, y of a pixel, the three vertices of the triangle it sees and the 3D point
+    it sees.
+    '''
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    for i, (vertex_id, twist_id) in enumerate(renders['views']):
+        cam = renders['cameras'][i]
+        y, x = np.where(renders['silhouettes'][i])
+        pixels = np.column_stack([x, y])
+        origins, direction = cam.rays(pixels)
+        hit_coords = origins + renders['depth'][i][y, x, np.newaxis] * direction
+        triangles = in_mesh.triangles[renders['face_ids'][i][y, x]]
+        data = np.hstack([pixels, triangles, hit_coords])
+        out_file = os.path.join(out_dir, '%d_%d.txt' % (vertex_id, twist_id))
+        np.savetxt(out_file, data, fmt=['%d'] * 5 + ['%f'] * 3)
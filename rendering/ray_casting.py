@@ -0,0 +1,111 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+In-process ray casting of meshes from a fixed set of views, producing (for every view) the map from the pixels to
+the triangles they see. The views follow the (vertex_id, twist_id) convention of the rendered images: the camera sits
+on a vertex of a regular dodecahedron that surrounds the (unit sphere normalized) shape, looks at its center and is
+rotated about its viewing axis by one of n_twists equal angles. I.e., 20 x 4 = 80 views by default.
+'''
+
+import numpy as np
+
+
+def dodecahedron_vertices():
+    '''Returns the (20 x 3) unit length vertices of a regular dodecahedron centered at the origin.
+    '''
+    phi = (1 + np.sqrt(5)) / 2.0
+    cube = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)], dtype=np.float64)
+    a = 1 / phi
+    others = []
+    for s1 in (-1, 1):
+        for s2 in (-1, 1):
+            others.append([0, s1 * a, s2 * phi])
+            others.append([s1 * a, s2 * phi, 0])
+            others.append([s1 * phi, 0, s2 * a])
+    V = np.vstack([cube, np.array(others)])
+    return V / np.sqrt(np.sum(np.square(V), axis=1, keepdims=True))
+
+
+class Orthographic_Camera(object):
+    '''A camera with parallel rays. Pixel (x, y) of a (height x width) image is x columns to the right and y rows
+    below the top-left corner, and the image covers a square of side 2 * extent centered on the viewing axis.
+    '''
+
+    def __init__(self, position, look_at=(0, 0, 0), up=(0, 0, 1), image_size=(256, 256), extent=0.55):
+        self.position = np.asarray(position, dtype=np.float64)
+        forward = np.asarray(look_at, dtype=np.float64) - self.position
+        self.forward = forward / np.linalg.norm(forward)
+        up = np.asarray(up, dtype=np.float64)
+        if abs(np.dot(up, self.forward)) > 1 - 10e-6:  # Up is parallel to the viewing axis, pick another.
+            up = np.roll(up, 1)
+        right = np.cross(self.forward, up)
+        self.right = right / np.linalg.norm(right)
+        self.up = np.cross(self.right, self.forward)
+        self.image_size = image_size
+        self.extent = extent
+
+    def __str__(self):
+        return 'Orthographic Camera at %s looking towards %s.' % (str(self.position), str(self.forward))
+
+    def pixel_grid(self):
+        '''Returns the (height * width x 2) integer (x, y) coordinates of all the pixels, in row-major order.
+        '''
+        h, w = self.image_size
+        y, x = np.mgrid[0:h, 0:w]
+        return np.column_stack([x.ravel(), y.ravel()])
+
+    def rays(self, pixels=None):
+        '''Returns the origins (M x 3) and the (common) direction (3) of the rays through the centers of the given
+        (M x 2) pixels, or of all the pixels if None.
+        '''
+        if pixels is None:
+            pixels = self.pixel_grid()
+        h, w = self.image_size
+        u = ((pixels[:, 0] + 0.5) / w * 2 - 1) * self.extent
+        v = (1 - (pixels[:, 1] + 0.5) / h * 2) * self.extent
+        origins = self.position + u[:, np.newaxis] * self.right + v[:, np.newaxis] * self.up
+        return origins, self.forward
+
+    @staticmethod
+    def of_view(vertex_id, twist_id, n_twists=4, distance=2.0, image_size=(256, 256), extent=0.55):
+        '''The camera of view (vertex_id, twist_id): at the vertex_id-th vertex of the dodecahedron (scaled to the
+        given distance from the origin), looking at the origin, and rotated by 2 * pi * twist_id / n_twists about
+        its viewing axis.
+        '''
+        position = dodecahedron_vertices()[vertex_id] * distance
+        cam = Orthographic_Camera(position, image_size=image_size, extent=extent)
+        angle = 2 * np.pi * twist_id / float(n_twists)
+        right = np.cos(angle) * cam.right + np.sin(angle) * cam.up
+        cam.up = np.cos(angle) * cam.up - np.sin(angle) * cam.right
+        cam.right = right
+        return cam
+
+
+def cast_view(in_mesh, camera, chunk_size=4096):
+    '''Casts the rays of all the pixels of a camera on a mesh (its BVH is built once and cached on the mesh).
+    Returns:
+        pixels (M x 2) the (x, y) coordinates of the M pixels that see the mesh.
+        triangle_ids (M) the triangle seen by each of them.
+        hit_coords (M x 3) the 3D points they see.
+    '''
+    origins, direction = camera.rays()
+    triangle_ids, t, _ = in_mesh.bvh().intersect_rays(origins, direction, chunk_size=chunk_size)
+    hit = triangle_ids >= 0
+    hit_coords = origins[hit] + t[hit, np.newaxis] * direction
+    return camera.pixel_grid()[hit], triangle_ids[hit], hit_coords
+
+
+def cast_views(in_mesh, views=None, n_twists=4, image_size=(256, 256), extent=0.55, distance=2.0):
+    '''Casts a set of (vertex_id, twist_id) views of a mesh, all of them by default.
+    Returns:
+        dictionary from every view to the (pixels, triangle_ids, hit_coords) of cast_view.
+    '''
+    if views is None:
+        views = [(v, t) for v in range(len(dodecahedron_vertices())) for t in range(n_twists)]
+    res = dict()
+    for vertex_id, twist_id in views:
+        cam = Orthographic_Camera.of_view(vertex_id, twist_id, n_twists, distance, image_size, extent)
+        res[(vertex_id, twist_id)] = cast_view(in_mesh, cam)
+    return res
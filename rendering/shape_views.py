@@ -18,11 +18,12 @@ class Shape_Views():
     classdocs
     '''
 
-    def __init__(self, view_folder, file_format):
+    def __init__(self, view_folder, file_format, reshape_to=None, n_threads=4, cache_file=None):
         '''
-        Constructor
+        Constructor. See in_out.views.load_views for the arguments.
         '''
-        data = nn_io.load_views_of_shape(view_folder, file_format)
+        data = nn_io.load_views_of_shape(view_folder, file_format, reshape_to=reshape_to, n_threads=n_threads,
+                                         cache_file=cache_file)
         self.views = data[0]
         self.cam_pos = data[1]
         self.masks = data[2]
@@ -57,18 +58,15 @@ class Shape_Views():
             nn_io.write_pixel_list_to_txt(x_coord, y_coord, out_file)
 
     def paint_masks_to_triangle_color(self, bt, tr_color):
+        '''Paints every pixel of the masks with the color (scalar value) of the triangle it sees. The pixels that are
+        outside the masks, or do not see the mesh, are zero.
+        '''
+        maps = bt.maps_of_views(self.cam_pos)
+        if maps.shape != self.masks.shape:
+            raise ValueError('The masks and the Back_Tracer\'s maps have different image sizes.')
+        hit = (self.masks != 0) & (maps >= 0)
         res = np.zeros(self.masks.shape)
-        for i, mask in enumerate(self.masks):
-            vertex_id, twist_id = self.cam_pos[i]
-            if not bt.is_legit_view_and_twist(vertex_id, twist_id):                
-                raise ValueError('Back_Tracer and View_Gradients don\'t agree on the set of views.')            
-            y_coord, x_coord = np.where(mask != 0)
-            for x, y in zip(x_coord, y_coord):
-                try:
-                    triangle = bt.from_2D_to_3D((x,y), vertex_id, twist_id)
-                    res[i,y,x] = tr_color[triangle]
-                except:
-                    pass
+        res[hit] = np.ravel(np.asarray(tr_color)[maps[hit]])
         return res
 
 if __name__ == '__main__':
@@ -5,17 +5,16 @@ Created on Jul 25, 2016
 @contact: pachlioptas@gmail.com
 @copyright: You are free to use, change, or redistribute this code in any way you want for non-commercial purposes. 
 '''
-import cv2
 import copy
 import os.path as osp
 import numpy as np
 import matplotlib.pylab as plt
 
-from . collections import defaultdict
 from . shape_views import Shape_Views
 from . back_tracer import Back_Tracer
 from .. in_out import soup as nn_io
-from .. mesh import Mesh
+from .. in_out.views import resize_views
+from .. solids.mesh import Mesh
 
 
 class View_Gradients(object):
@@ -45,10 +44,7 @@ class View_Gradients(object):
         return self.shape_views.cam_pos[grad_id]
     
     def resize(self, new_size):
-        new_grads = np.empty(shape=((self.size(),)  + new_size), dtype=self.grads.dtype)        
-        for i, old_grad in enumerate(self):
-            new_grads[i] = cv2.resize(old_grad, new_size)                                              
-        self.grads = new_grads
+        self.grads = resize_views(self.grads, new_size)
         
     def clean_grad_outside_shape_mask(self, inline=True):
         if inline:
@@ -83,24 +79,24 @@ class View_Gradients(object):
         return new_self
         
     def push_on_triangles(self, bt):
-        aggregates = np.zeros((bt.mesh.num_triangles, 1))             
-        missed     = defaultdict(list)
-        triangles_hit = defaultdict(list) 
-        for i, g in enumerate(self):
-            vertex_id, twist_id = self.camera_position(i)
-            y_coord, x_coord = np.where(g != 0)
-            if not bt.is_legit_view_and_twist(vertex_id, twist_id):                
-                raise ValueError('Back_Tracer and View_Gradients don\'t agree on the set of views.')                  
-            for x,y in zip(x_coord, y_coord):
-                try:
-                    triangle = bt.from_2D_to_3D((x,y), vertex_id, twist_id)
-                    aggregates[triangle] += g[y, x]
-                    triangles_hit[(vertex_id, twist_id)].append((triangle))
-                                                        
-                except:              
-                    missed[(vertex_id, twist_id)].append((x,y))                                        
-        return aggregates, triangles_hit, missed   # TODO-Trim.
-    
+        '''Sums the gradients of every triangle over the pixels (of all the views) that see it.
+        Returns:
+            aggregates (num_triangles x 1 numpy array) the summed gradients.
+            triangles_hit (num_views x height x width boolean numpy array) the non-zero gradients that landed on a
+                triangle.
+            missed (num_views x height x width boolean numpy array) the non-zero gradients of pixels that do not
+                see the mesh.
+        '''
+        maps = bt.maps_of_views(self.shape_views.cam_pos)
+        if maps.shape != self.grads.shape:
+            raise ValueError('The gradients and the Back_Tracer\'s maps have different image sizes.')
+        non_zero = self.grads != 0
+        triangles_hit = non_zero & (maps >= 0)
+        missed = non_zero & (maps < 0)
+        aggregates = np.bincount(maps[triangles_hit], weights=self.grads[triangles_hit],
+                                 minlength=bt.mesh.num_triangles)
+        return aggregates.reshape(-1, 1), triangles_hit, missed
+
     def export_grads_to_txt(self, save_dir):
         '''
         Exports the grads attribute into .txt files. Each file corresponds to one view (vertex_id, twist_id)
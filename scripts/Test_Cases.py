@@ -7,4 +7,217 @@ Created on Jun 14, 2016
             way you want for non-commercial purposes. 
 '''
 
+import warnings
 import numpy as np
+import unittest
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial import ConvexHull
+
+from geo_tool.point_clouds.distances import sinkhorn_emd
+from geo_tool.point_clouds import normalizations
+from geo_tool.fundamentals import Cuboid_Set, Oriented_Box_Set, pca_boxes, min_volume_boxes
+from geo_tool.fundamentals.oriented_box import pairwise_intersections
+from geo_tool.solids.mesh import Mesh
+from geo_tool.rendering.rasterizer import rasterize
+from geo_tool.rendering.ray_casting import Orthographic_Camera
+from geo_tool.solids.bvh import Triangle_BVH, closest_points_on_triangles, intersect_rays_with_triangles
+
+
+class Test_Sinkhorn_EMD(unittest.TestCase):
+
+    def test_against_exact_assignment(self):
+        # For clouds of equal sizes the EMD is the mean distance of the optimal one-to-one assignment.
+        rng = np.random.RandomState(0)
+        clouds_a = rng.rand(6, 64, 3)
+        clouds_b = rng.rand(6, 64, 3) + 0.1
+        exact = []
+        for a, b in zip(clouds_a, clouds_b):
+            C = np.sqrt(np.sum(np.square(a[:, np.newaxis] - b[np.newaxis]), axis=2))
+            rows, cols = linear_sum_assignment(C)
+            exact.append(np.mean(C[rows, cols]))
+        exact = np.array(exact)
+
+        for epsilon, slack in [(10e-3, 0.05), (3e-3, 0.01)]:
+            approx = sinkhorn_emd(clouds_a, clouds_b, epsilon=epsilon, n_iter=5000)
+            self.assertTrue(np.all(approx >= exact * (1 - 10e-6)))   # A feasible plan costs at least the EMD.
+            self.assertTrue(np.all(approx <= exact * (1 + slack)))
+
+    def test_warns_when_not_converged(self):
+        rng = np.random.RandomState(1)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            sinkhorn_emd(rng.rand(2, 32, 3), rng.rand(2, 32, 3), epsilon=3e-3, n_iter=5)
+        self.assertEqual(len(caught), 1)
+
+
+class Test_Normalizations(unittest.TestCase):
+
+    def test_fully_padded_cloud(self):
+        rng = np.random.RandomState(0)
+        pclouds = rng.rand(3, 10, 3)
+        mask = np.ones((3, 10), dtype=np.bool_)
+        mask[1] = False     # A cloud with no real point.
+        mask[2, 5:] = False
+        lo, hi = normalizations.bounding_box_extrema(pclouds, mask)
+        self.assertTrue(np.all(lo[1] == 0) and np.all(hi[1] == 0))
+        self.assertTrue(np.allclose(lo[2], np.min(pclouds[2, :5], axis=0)))
+
+        for normalize in (normalizations.center_in_unit_sphere, normalizations.center_in_unit_cube,
+                          normalizations.zero_mean_in_unit_sphere):
+            res = normalize(pclouds.copy(), mask)
+            self.assertTrue(np.all(np.isfinite(res)))
+
+
+def _blob_surface(n_points, rng):
+    '''The triangles of the convex hull of points on a bumpy sphere.
+    '''
+    points = rng.randn(n_points, 3)
+    points /= np.sqrt(np.sum(np.square(points), axis=1))[:, np.newaxis]
+    points *= 0.4 * (1 + 0.2 * np.sin(3 * points[:, :1]))
+    return points, ConvexHull(points).simplices
+
+
+class Test_Triangle_BVH(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        hull_vertices, hull_triangles = _blob_surface(300, rng)
+        soup = rng.rand(60, 3) - 0.5       # Plus a soup of (intersecting) random triangles.
+        self.vertices = np.vstack([hull_vertices, soup])
+        self.triangles = np.vstack([hull_triangles, len(hull_vertices) + rng.randint(0, 60, (40, 3))])
+        self.triangles = self.triangles[np.all(self.triangles != self.triangles[:, [1, 2, 0]], axis=1)]
+        self.bvh = Triangle_BVH(self.vertices, self.triangles)
+        self.rng = rng
+
+    def corners(self, n_repeats):
+        V, T = self.vertices, self.triangles
+        return [np.tile(V[T[:, k]], (n_repeats, 1)) for k in range(3)]
+
+    def test_closest_point_of_triangle(self):
+        # No point of a triangle is closer to the query than the closest one.
+        rng = self.rng
+        A, B, C = rng.randn(3, 500, 3)
+        points = 2 * rng.randn(500, 3)
+        squared, barycentric = closest_points_on_triangles(points, A, B, C)
+        self.assertTrue(np.all(barycentric >= -10e-12) and np.allclose(np.sum(barycentric, axis=1), 1))
+        closest = barycentric[:, :1] * A + barycentric[:, 1:2] * B + barycentric[:, 2:] * C
+        self.assertTrue(np.allclose(np.sum(np.square(points - closest), axis=1), squared))
+        w = rng.dirichlet(np.ones(3), 2000)
+        samples = w[:, 0, np.newaxis] * A[:, np.newaxis] + w[:, 1, np.newaxis] * B[:, np.newaxis] + \
+            w[:, 2, np.newaxis] * C[:, np.newaxis]
+        sampled = np.min(np.sum(np.square(points[:, np.newaxis] - samples), axis=2), axis=1)
+        self.assertTrue(np.all(sampled >= squared - 10e-9))
+
+    def test_closest_points_against_all_triangles(self):
+        queries = 0.6 * self.rng.randn(200, 3)
+        distances, triangle_ids, _, closest = self.bvh.closest_points(queries)
+        n = len(self.triangles)
+        A, B, C = self.corners(len(queries))
+        squared, _ = closest_points_on_triangles(np.repeat(queries, n, axis=0), A, B, C)
+        exact = np.sqrt(np.min(squared.reshape(-1, n), axis=1))
+        self.assertTrue(np.allclose(distances, exact))
+        self.assertTrue(np.allclose(np.sqrt(np.sum(np.square(closest - queries), axis=1)), distances))
+        self.assertTrue(np.allclose(np.sqrt(squared.reshape(-1, n)[np.arange(len(queries)), triangle_ids]), exact))
+
+    def test_rays_against_all_triangles(self):
+        origins = 2 * self.rng.randn(300, 3)
+        directions = -origins + 0.5 * self.rng.randn(300, 3)     # Mostly towards the surface.
+        triangle_ids, t, _ = self.bvh.intersect_rays(origins, directions)
+        n = len(self.triangles)
+        A, B, C = self.corners(len(origins))
+        all_t, _ = intersect_rays_with_triangles(np.repeat(origins, n, axis=0), np.repeat(directions, n, axis=0),
+                                                 A, B, C)
+        all_t = all_t.reshape(-1, n)
+        exact = np.min(all_t, axis=1)
+        self.assertTrue(np.array_equal(np.isinf(t), np.isinf(exact)))
+        hit = np.isfinite(exact)
+        self.assertTrue(np.sum(hit) > 100 and np.allclose(t[hit], exact[hit]))
+        self.assertTrue(np.allclose(all_t[hit, triangle_ids[hit]], exact[hit]))
+
+
+class Test_Rasterizer(unittest.TestCase):
+
+    def test_against_ray_casting(self):
+        # Every pixel sees the first triangle hit by its ray (all the triangles are intersected with all the rays).
+        rng = np.random.RandomState(1)
+        vertices, triangles = _blob_surface(150, rng)
+        in_mesh = Mesh(vertices=vertices, triangles=triangles)
+        n = len(triangles)
+        A, B, C = [np.tile(vertices[triangles[:, k]], (48 * 40, 1)) for k in range(3)]
+        for vertex_id, twist_id in [(0, 0), (7, 1), (13, 3)]:
+            camera = Orthographic_Camera.of_view(vertex_id, twist_id, image_size=(48, 40))
+            depth, face_ids, barycentric = rasterize(in_mesh, camera)
+            origins, direction = camera.rays()
+            t, _ = intersect_rays_with_triangles(np.repeat(origins, n, axis=0), np.tile(direction, (len(A), 1)),
+                                                 A, B, C)
+            t = t.reshape(-1, n)
+            exact_ids = np.where(np.isfinite(np.min(t, axis=1)), np.argmin(t, axis=1), -1).reshape(48, 40)
+            exact_depth = np.min(t, axis=1).reshape(48, 40)
+
+            hit = exact_ids >= 0
+            self.assertTrue(np.mean(hit) > 0.2)
+            self.assertTrue(np.mean(face_ids == exact_ids) > 0.99)     # Pixels on shared edges may differ.
+            both = hit & (face_ids >= 0)
+            self.assertTrue(np.allclose(depth[both], exact_depth[both], atol=10e-5))
+            self.assertTrue(np.all(np.isinf(depth[face_ids < 0])))
+            self.assertTrue(np.allclose(np.sum(barycentric[both], axis=1), 1, atol=10e-5))
+
+
+def _random_rotations(n, rng):
+    q, r = np.linalg.qr(rng.randn(n, 3, 3))
+    q *= np.sign(np.diagonal(r, axis1=1, axis2=2))[:, np.newaxis, :]
+    q[:, :, 2] *= np.sign(np.linalg.det(q))[:, np.newaxis]
+    return q.transpose(0, 2, 1)
+
+
+class Test_Oriented_Boxes(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def random_boxes(self, n, spread=0.3):
+        rng = self.rng
+        return Oriented_Box_Set(rng.uniform(-spread, spread, (n, 3)), _random_rotations(n, rng),
+                                rng.uniform(0.1, 0.5, (n, 3)))
+
+    def test_intersections_against_monte_carlo(self):
+        a, b = self.random_boxes(20), self.random_boxes(20)
+        samples = self.rng.uniform(-1.2, 1.2, (200000, 3))
+        exact = pairwise_intersections(a, b)
+        for i in range(len(a)):
+            inside = a[i].is_point_inside(samples) & b[i].is_point_inside(samples)
+            estimate = np.mean(inside) * 2.4 ** 3
+            self.assertTrue(abs(estimate - exact[i]) < 0.01)
+
+    def test_separating_axes(self):
+        boxes = self.random_boxes(50, spread=1.0)
+        self.assertTrue(np.array_equal(boxes.intersects(boxes), boxes.intersection_with(boxes) > 0))
+        self.assertTrue(np.allclose(np.diag(boxes.iou_with(boxes)), 1))
+
+    def test_axis_aligned_boxes(self):
+        extrema = np.sort(self.rng.rand(2, 15, 2, 3), axis=2).reshape(2, 15, 6)
+        a, b = Cuboid_Set(extrema[0]), Cuboid_Set(extrema[1])
+        iou = Oriented_Box_Set.from_cuboid_set(a).iou_with(Oriented_Box_Set.from_cuboid_set(b))
+        self.assertTrue(np.allclose(iou, a.iou_with(b)))
+
+    def test_fitting(self):
+        # The points of a box (with its corners) are fitted by the box itself.
+        boxes = self.random_boxes(10)
+        clouds = []
+        for box in (boxes[i] for i in range(len(boxes))):
+            local = self.rng.uniform(-1, 1, (300, 3)) * box.half_sizes
+            clouds.append(np.vstack([box.center + local.dot(box.rotation), box.corners]))
+        fitted = min_volume_boxes(clouds)
+        self.assertTrue(np.allclose(fitted.volumes(), boxes.volumes()))
+
+        clouds = [self.rng.randn(self.rng.randint(20, 300), 3) * [3, 1, 0.3] for _ in range(20)]
+        for fitted in (pca_boxes(clouds), min_volume_boxes(clouds)):
+            for i, points in enumerate(clouds):
+                local = (points - fitted.centers[i]).dot(fitted.rotations[i].T)
+                self.assertTrue(np.all(np.abs(local) <= fitted.half_sizes[i] + 10e-9))
+                self.assertTrue(np.allclose(np.linalg.det(fitted.rotations[i]), 1))
+        self.assertTrue(np.all(min_volume_boxes(clouds).volumes() <= pca_boxes(clouds).volumes() + 10e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Throughput of the emission of the Mitsuba XML of point-clouds: the per point xml_point_string versus the bulk
+xml_spheres (plain, with per point colors, and instanced).
+
+Usage: python -m geo_tool.scripts.benchmark_mitsuba_xml [n_points]
+'''
+
+import sys
+import time
+import numpy as np
+
+from geo_tool.rendering.mitsuba_rendering import Mitsuba_Rendering, xml_spheres
+
+
+def per_point(points, radius, colors=None):
+    renderer = object.__new__(Mitsuba_Rendering)    # Only the XML helpers are used.
+    if colors is None:
+        return [renderer.xml_point_string(radius, p) for p in points]
+    return [renderer.xml_point_string(radius, p, c) for p, c in zip(points, colors)]
+
+
+def bench(name, emitter, n_points, n_repeats=3):
+    best = np.inf
+    for _ in range(n_repeats):
+        start = time.time()
+        chunks = emitter()
+        best = min(best, time.time() - start)
+    n_bytes = sum(len(c) for c in chunks)
+    print('%-24s %8.3f sec %12.0f points/sec %8.1f MB' % (name, best, n_points / best, n_bytes / 2.0 ** 20))
+
+
+if __name__ == '__main__':
+    n_points = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    radius = 0.015
+    rng = np.random.RandomState(0)
+    points = rng.uniform(-0.5, 0.5, (n_points, 3))
+    colors = rng.randint(0, 256, (n_points, 3))
+    palette = rng.randint(0, 256, (16, 3))[rng.randint(0, 16, n_points)]
+
+    bench('per point', lambda: per_point(points, radius), n_points)
+    bench('per point, colors', lambda: per_point(points, radius, colors), n_points)
+    bench('bulk', lambda: xml_spheres(points, radius), n_points)
+    bench('bulk, colors', lambda: xml_spheres(points, radius, colors), n_points)
+    bench('instanced', lambda: xml_spheres(points, radius, instanced=True), n_points)
+    bench('instanced, 16 colors', lambda: xml_spheres(points, radius, palette, instanced=True), n_points)
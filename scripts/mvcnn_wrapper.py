@@ -1,4 +1,6 @@
+import os
 import sys
+import os.path as osp
 import tensorflow as tf
 import numpy as np
 
@@ -6,7 +8,7 @@ git_path = '/Users/t_achlp/Documents/Git_Repos/'
 sys.path.insert(0, git_path)
 
 from autotensor import autograph
-import nn_saliency.src.nn_io as nn_io
+from geo_tool.in_out import soup as geo_io
 
 
 IMG_SIZE    = (224, 224)
@@ -108,15 +110,14 @@ def compute_gradients(views_folder, grad_model=None, in_sess=None):
     if in_sess is None:
         in_sess =  initialize_session()
                                                                         
-    view_tensor, _, _ = nn_io.load_views_of_shape(views_folder, file_format='png', shape_views=PART_VIEWS, reshape_to=IMG_SIZE)
-    view_tensor = nn_io.format_image_tensor_for_tf(view_tensor, whiten=True)    
+    view_tensor, _, _ = geo_io.load_views_of_shape(views_folder, file_format='png', shape_views=PART_VIEWS, reshape_to=IMG_SIZE,
+                                                   n_threads=8, cache_file=osp.join(views_folder, 'views_%d_%d.npz' % IMG_SIZE))
+    view_tensor = geo_io.format_image_tensor_for_tf(view_tensor, whiten=True)    
     feed = {image_pl: view_tensor, keep_prob: 1}
     
     return in_sess.run([grad_model[0]], feed_dict=feed), grad_model, in_sess
 
 
-import os.path as osp
-import os
 if __name__ == '__main__':    
     top_view_dir = sys.argv[1]
     sub_dirs = [f for f in os.listdir(top_view_dir) if osp.isdir(osp.join(top_view_dir,f))] # expected to be folders of the views.
@@ -18,13 +18,13 @@ from .. utils import linalg_utils as utils
 
 
 def fiedler_of_component_spectra(in_mesh, in_lb, thres):
-    spectra, multi_cc = in_lb.multi_component_spectra(2, thres)
+    fiedlers, multi_cc = in_lb.fiedler_vectors(thres=thres)
     n_cc = len(multi_cc)
     aggregate_color = np.zeros((in_mesh.num_vertices, 1))
     for i in xrange(n_cc):
         nodes = multi_cc[i]
-        if spectra[i]:
-            magic_color = scale(spectra[i][1][:, -1]**2)
+        if fiedlers[i]:
+            magic_color = scale(fiedlers[i][1]**2)
             aggregate_color[nodes] = magic_color.reshape(len(nodes), 1)
     return aggregate_color[:, 0]
 
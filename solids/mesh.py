@@ -21,8 +21,13 @@ from . mesh_cleaning import filter_vertices
 from .. utils import linalg_utils as utils
 from .. utils.linalg_utils import accumarray
 from .. in_out import soup as io
-from .. fundamentals import Graph, Cuboid
+from .. fundamentals import Graph, Cuboid, Oriented_Box
+from .. fundamentals.oriented_box import pca_boxes, min_volume_box
 from .. point_clouds import Point_Cloud
+from .. point_clouds.sampling import farthest_point_sampling, geodesic_farthest_point_sampling
+from .. point_clouds import voxels
+from . sampling import poisson_disk_surface_sample
+from . bvh import Triangle_BVH
 
 # try:
 #     from mayavi import mlab as mayalab
@@ -68,16 +73,23 @@ class Mesh(object):
     def vertices(self, value):
         self._vertices = value
         self.num_vertices = len(self._vertices)
+        self._cache = None
 
     @triangles.setter
     def triangles(self, value):
         self._triangles = value
         self.num_triangles = len(self._triangles)
+        self._cache = None
         if not all([len(set(tr)) == 3 for tr in self._triangles]):
             warnings.warn('Not real triangles (but lines or points) exist in the triangle list.')
         if np.max(self._triangles) > self.num_vertices - 1 or np.min(self._triangles) < 0:
             raise ValueError('Triangles referencing non-vertices.')
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_cache'] = None  # Cheap to recompute, thus it is not saved.
+        return state
+
     def copy(self):
         return copy.deepcopy(self)
 
@@ -116,11 +128,9 @@ class Mesh(object):
         mayalab.show()
 
     def undirected_edges(self):
-        perm_gen = lambda x: list(itertools.permutations(x, 2))
-        edges = np.zeros(shape=(self.num_triangles, 6, 2), dtype=np.int32)  # Each triangle produces 6 undirected edges.
-        for i, t in enumerate(self.triangles):
-            edges[i, :] = perm_gen(t)
-        edges.resize(self.num_triangles * 6, 2)
+        perms = list(itertools.permutations(range(3), 2))
+        edges = self.triangles[:, perms].astype(np.int32)  # Each triangle produces 6 undirected edges.
+        edges = edges.reshape(self.num_triangles * 6, 2)
         return unique_rows(edges)
 
     def directed_edges(self):
@@ -147,6 +157,26 @@ class Mesh(object):
         vals = np.squeeze(np.ones((len(E), 1)))
         return sp.csr_matrix((vals, (E[:, 0], E[:, 1])), shape=(self.num_vertices, self.num_vertices))
 
+    def edge_length_graph(self):
+        '''Returns the (sparse, symmetric) adjacency matrix of the mesh edges, weighted by the length of each edge.
+        '''
+        E = self.undirected_edges()
+        V = self.vertices
+        vals = l2_norm(V[E[:, 0]] - V[E[:, 1]], axis=1)
+        return sp.csr_matrix((vals, (E[:, 0], E[:, 1])), shape=(self.num_vertices, self.num_vertices))
+
+    def farthest_point_sample(self, n_samples, geodesic=True, first_index=None, seed=None):
+        '''Picks n_samples vertices via farthest point sampling. If geodesic is True, the distances are the shortest
+        paths along the edges of the mesh, otherwise they are euclidean.
+        Returns:
+            indices (n_samples numpy array) of the picked vertices.
+            min_dist (num_vertices numpy array) the distance of every vertex to the picked ones.
+        '''
+        if geodesic:
+            return geodesic_farthest_point_sampling(self.edge_length_graph(), n_samples, first_index, seed)
+        else:
+            return farthest_point_sampling(self.vertices, n_samples, first_index, seed)
+
     def connected_components(self):
         return Graph.connected_components(self.adjacency_matrix())
 
@@ -186,6 +216,39 @@ class Mesh(object):
         keys = map(tuple, self.triangles)
         return dict(zip(keys, range(len(keys))))
 
+    def find_triangles(self, triplets):
+        '''Vectorized version of inverse_triangle_dictionary: returns the position of every (ordered) triplet of
+        vertices (a M x 3 numpy array) in the array of triangles, or -1 if it is not a triangle of the mesh (which
+        includes the triplets with vertex ids outside [0, num_vertices)). The triangles are sorted (lexicographically)
+        once and cached, and all the triplets are searched at once, with a binary search on the rows.
+        '''
+        cache = self._caches()
+        if 'sorted_triangles' not in cache:
+            T = self.triangles
+            order = np.lexsort((T[:, 2], T[:, 1], T[:, 0]))
+            cache['sorted_triangles'] = (T[order].astype(np.int64), order)
+        sorted_triangles, order = cache['sorted_triangles']
+        triplets = np.asarray(triplets, dtype=np.int64).reshape(-1, 3)
+
+        # lo converges to the first sorted triangle that is not (lexicographically) smaller than the triplet.
+        lo = np.zeros(len(triplets), dtype=np.int64)
+        hi = np.full(len(triplets), len(sorted_triangles), dtype=np.int64)
+        active = lo < hi
+        while np.any(active):
+            mid = (lo + hi) // 2
+            row = sorted_triangles[np.minimum(mid, len(sorted_triangles) - 1)]
+            smaller = row[:, 2] < triplets[:, 2]
+            for k in (1, 0):
+                smaller = (row[:, k] < triplets[:, k]) | ((row[:, k] == triplets[:, k]) & smaller)
+            lo = np.where(active & smaller, mid + 1, lo)
+            hi = np.where(active & ~smaller, mid, hi)
+            active = lo < hi
+
+        pos = np.minimum(lo, len(sorted_triangles) - 1)
+        found = (lo < len(sorted_triangles)) & np.all(sorted_triangles[pos] == triplets, axis=1)
+        found &= np.all((triplets >= 0) & (triplets < self.num_vertices), axis=1)
+        return np.where(found, order[pos], -1)
+
     def angles_of_triangles(self):
         # TODO: Consider compute via way mentioned in Meyer's
         L = self.edge_length_of_triangles()
@@ -292,6 +355,27 @@ class Mesh(object):
         res = (c_0 * vf_0) + (c_1 * vf_1) + (c_2 * vf_2)
         return res
 
+    def bvh(self, leaf_size=1):
+        '''Returns the bounding volume hierarchy of the triangles, built on the first call and cached (see
+        area_cdf for when the cache is reset).
+        '''
+        cache = self._caches()
+        if 'bvh' not in cache or cache['bvh'].leaf_size != leaf_size:
+            cache['bvh'] = Triangle_BVH(self.vertices, self.triangles, leaf_size)
+        return cache['bvh']
+
+    def closest_points(self, points, chunk_size=4096):
+        '''Finds the closest point of the surface of the mesh to each of the (N x 3) query points.
+        Returns:
+            distances (N), faces (N), barycentric (N x 3) and closest (N x 3) numpy arrays, see
+            Triangle_BVH.closest_points. E.g., barycentric_interpolation_of_vertex_function(v_func, closest, faces)
+            transfers a vertex function to the query points.
+        '''
+        return self.bvh().closest_points(points, chunk_size)
+
+    def distance_to_surface(self, points):
+        return self.closest_points(points)[0]
+
     def normals_of_vertices(self, weight='areas', normalize=False):
         '''Computes the outward normal at each vertex by adding the weighted normals of each triangle a
         vertex is adjacent to. The weights that are used to combine the normals are the areas of the triangles
@@ -323,8 +407,20 @@ class Mesh(object):
 
         return normals
 
-    def bounding_box(self):
-        return Cuboid.bounding_box_of_3d_points(self.vertices)
+    def bounding_box(self, oriented=None):
+        '''The bounding box of the vertices.
+        Args:
+            oriented (String, optional): None for the axis aligned Cuboid, 'pca' or 'min_volume' for the
+                Oriented_Box fitted with pca_boxes or min_volume_box, respectively.
+        '''
+        if oriented is None:
+            return Cuboid.bounding_box_of_3d_points(self.vertices)
+        elif oriented == 'pca':
+            return pca_boxes(self.vertices[np.newaxis])[0]
+        elif oriented == 'min_volume':
+            return Oriented_Box(*min_volume_box(self.vertices))
+        else:
+            raise ValueError('oriented must be None, \'pca\' or \'min_volume\'.')
 
     def center_in_unit_sphere(self, force_scaling=False):
         self.vertices = Point_Cloud.center_points(self.vertices, center='unit_sphere', force_scaling=force_scaling)
@@ -336,10 +432,11 @@ class Mesh(object):
         Args:
             n_samples (int) : number of points to be sampled in total
             vertex_weights ():
+            seed (int or np.random.Generator, optional): the source of randomness. The global numpy RNG is not used.
             compute_normals (boolean):
         Returns:
             numpy array (n_samples, 3) containing the [x,y,z] coordinates of the samples.
-            If compute_normals is True: 
+            If compute_normals is True: (n_samples, 6) where the last 3 columns are the (interpolated) normals.
 
         Reference :
           http://chrischoy.github.in_out/research/barycentric-coordinate-for-mesh-sampling/
@@ -349,42 +446,101 @@ class Mesh(object):
             P = (1 - \sqrt{r_1})A + \sqrt{r_1} (1 - r_2) B + \sqrt{r_1} r_2 C
           \end{align}
         """
+        return self.sample_surface(n_samples, rng=seed, vertex_weights=vertex_weights, compute_normals=compute_normals)
+
+    def area_cdf(self):
+        '''Returns the cumulative sum of the areas of the triangles. It is computed once and cached until the vertices
+        or the triangles are set again. If the vertices array is modified in place, call invalidate_caches().
+        '''
+        cache = self._caches()
+        if 'area_cdf' not in cache:
+            cache['area_cdf'] = np.cumsum(self.area_of_triangles(), dtype=np.float64)
+        return cache['area_cdf']
+
+    def unit_normals_of_vertices(self):
+        '''Cached version of normals_of_vertices(normalize=True).
+        '''
+        cache = self._caches()
+        if 'normals' not in cache:
+            cache['normals'] = self.normals_of_vertices(normalize=True)
+        return cache['normals']
 
-        face_areas = self.area_of_triangles()
+    def invalidate_caches(self):
+        self._cache = None
 
-        if vertex_weights is not None:
+    def _caches(self):
+        if getattr(self, '_cache', None) is None:
+            self._cache = dict()
+        return self._cache
+
+    def sample_surface(self, n_samples, n_sets=None, rng=None, vertex_weights=None, compute_normals=False):
+        '''Samples points uniformly (i.e., proportionally to the area of each triangle) on the surface of the mesh.
+        The triangles are drawn by binary searches of uniform numbers in the (cached) cumulative areas, thus every
+        call costs O(n_samples * log(num_triangles)).
+
+        Args:
+            n_samples (int): number of points of each set.
+            n_sets (int, optional): if given, that many independent sets of points are drawn at once.
+            rng (np.random.Generator, or int seed, optional): the source of randomness.
+            vertex_weights (num_vertices numpy array, optional): non-negative weights that multiply the areas of the
+                triangles (via the sum of the weights of their vertices). The resulting distribution is not cached.
+            compute_normals (boolean): if True, the normals of the vertices are (barycentrically) interpolated on the
+                samples and are appended as 3 extra columns.
+
+        Returns:
+            points ((n_samples x 3) or (n_sets x n_samples x 3) numpy array, with 6 columns if compute_normals).
+            faces ((n_samples) or (n_sets x n_samples) numpy array) the triangle of every sample.
+        '''
+        rng = np.random.default_rng(rng)
+        if vertex_weights is None:
+            cdf = self.area_cdf()
+        else:
             if np.any(vertex_weights < 0):
                 raise ValueError('Negative vertex weights detected.')
             face_weights = self.sum_vertex_function_on_triangles(vertex_weights)
-            face_areas = np.multiply(face_areas, face_weights)
-
-        face_areas = face_areas / np.sum(face_areas)    # Convert to probability.
+            cdf = np.cumsum(np.multiply(self.area_of_triangles(), face_weights), dtype=np.float64)
 
-        if seed is not None:
-            np.random.seed(seed)
+        shape = (n_samples, ) if n_sets is None else (n_sets, n_samples)
+        faces = np.searchsorted(cdf, rng.random(shape) * cdf[-1], side='right')
+        np.minimum(faces, self.num_triangles - 1, out=faces)   # Guards against rounding at the end of the cdf.
 
-        sample_face_idx = np.random.choice(self.num_triangles, n_samples, p=face_areas)
+        return self.random_points_on_faces(faces, rng, compute_normals), faces
 
-        r = np.random.rand(n_samples, 2)
-        A = self.vertices[self.triangles[sample_face_idx, 0], :]
-        B = self.vertices[self.triangles[sample_face_idx, 1], :]
-        C = self.vertices[self.triangles[sample_face_idx, 2], :]
-        m = np.sqrt(r[:, 0:1])
-        n = r[:, 1:]
-        P = (1 - m) * A + m * (1 - n) * B + m * n * C
+    def random_points_on_faces(self, faces, rng=None, compute_normals=False):
+        '''Returns a uniformly random point inside each of the given triangles (an array of any shape), with the
+        interpolated vertex normals appended if compute_normals is True.
+        '''
+        rng = np.random.default_rng(rng)
+        r = rng.random(np.shape(faces) + (2, ))
+        m = np.sqrt(r[..., 0:1])
+        n = r[..., 1:]
+        T = self.triangles[faces]
+        V = self.vertices
+        P = (1 - m) * V[T[..., 0]] + m * (1 - n) * V[T[..., 1]] + m * n * V[T[..., 2]]
 
-        # If normals are computed, returns Nx6 matrices where last 3 are the normals.
         if compute_normals:
-            nV = self.normals_of_vertices(normalize=True)            
-            #nV = self.normals_of_triangles(self.vertices, self.triangles, normalize=True)
-            
-            nA = nV[self.triangles[sample_face_idx, 0], :]
-            nB = nV[self.triangles[sample_face_idx, 1], :]
-            nC = nV[self.triangles[sample_face_idx, 2], :]
-            nP = (1 - m) * nA + m * (1 - n) * nB + m * n * nC
-            P = np.append(P, nP, axis=1)
-
-        return P, sample_face_idx
+            nV = self.unit_normals_of_vertices()
+            nP = (1 - m) * nV[T[..., 0]] + m * (1 - n) * nV[T[..., 1]] + m * n * nV[T[..., 2]]
+            P = np.concatenate([P, nP], axis=-1)
+        return P
+
+    def sample_surface_blue_noise(self, n_samples, oversampling=8, tolerance=0.05, rng=None, compute_normals=False):
+        '''Samples n_samples points on the surface that are evenly spread, i.e., no two of them are closer than a
+        radius which is as large as possible. See solids.sampling.poisson_disk_surface_sample.
+        Returns:
+            points (n_samples x 3 numpy array, or x 6 if compute_normals), faces (n_samples numpy array), radius.
+        '''
+        return poisson_disk_surface_sample(self, n_samples, oversampling, tolerance, rng, compute_normals)
+
+    def voxelize(self, resolution, fill=False, samples_per_cell=8, lo=-0.5, hi=0.5, seed=None):
+        '''Returns a (resolution^3) boolean occupancy grid of the mesh over the cube [lo, hi]^3. The cells touched by
+        the surface are found by sampling it. If fill is True, the cells whose center is inside the mesh are also
+        occupied (the mesh should then be watertight). See point_clouds.voxels.
+        '''
+        grid = voxels.voxelize_mesh_surface(self.vertices, self.triangles, resolution, samples_per_cell, lo, hi, seed)
+        if fill:
+            grid |= voxels.voxelize_mesh_interior(self.vertices, self.triangles, resolution, lo, hi)
+        return grid
 
     def swap_axes_of_vertices(self, permutation):
         v = self.vertices
@@ -0,0 +1,145 @@
+'''
+Created on October 19, 2026
+
+@author: optas
+
+Surface sampling of meshes: i.i.d., stratified and blue-noise (Poisson-disk), and of collections of meshes, e.g., to
+create point-cloud datasets.
+'''
+
+import warnings
+import numpy as np
+from multiprocessing import Pool
+from scipy.spatial import cKDTree
+
+
+def _sample_surface(args):
+    in_mesh, n_samples, n_sets, seed, compute_normals = args
+    return in_mesh.sample_surface(n_samples, n_sets=n_sets, rng=np.random.default_rng(seed),
+                                  compute_normals=compute_normals)
+
+
+def sample_surfaces(meshes, n_samples, n_sets=None, seed=None, compute_normals=False, n_workers=1):
+    '''Samples points on the surface of every mesh of a list (see Mesh.sample_surface).
+    Args:
+        meshes (list of Mesh).
+        seed (int, optional): every mesh gets its own (independent) random stream that is derived from this seed and
+            from its position in the list. Thus, the samples do not depend on n_workers, and the samples of a mesh do
+            not change if other meshes are appended to the list.
+        n_workers (int): if larger than 1, the meshes are processed by a pool of processes.
+    Returns:
+        list with the (points, faces) of each mesh.
+    '''
+    seeds = np.random.SeedSequence(seed).spawn(len(meshes))
+    jobs = [(m, n_samples, n_sets, s, compute_normals) for m, s in zip(meshes, seeds)]
+    if n_workers > 1:
+        pool = Pool(n_workers)
+        try:
+            return pool.map(_sample_surface, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    return [_sample_surface(job) for job in jobs]
+
+
+def stratified_faces(in_mesh, n_samples, rng=None):
+    '''Allocates n_samples points to the triangles of a mesh proportionally to their areas, with systematic
+    sampling: a single uniform offset is shared by all the triangles, thus each one gets either the floor or the
+    ceiling of its expected number of samples. Compared to i.i.d. draws, the counts have (much) smaller variance.
+    Returns:
+        (n_samples numpy array) the triangle of every sample, sorted.
+    '''
+    rng = np.random.default_rng(rng)
+    cdf = in_mesh.area_cdf()
+    cuts = np.floor(cdf * (n_samples / cdf[-1]) + rng.random()).astype(np.int64)
+    np.minimum(cuts, n_samples, out=cuts)
+    counts = np.diff(np.hstack([0, cuts]))
+    return np.repeat(np.arange(len(cdf)), counts)
+
+
+def stratified_surface_sample(in_mesh, n_samples, rng=None, compute_normals=False):
+    '''Like Mesh.sample_surface, but with the number of samples of each triangle given by stratified_faces.
+    '''
+    rng = np.random.default_rng(rng)
+    faces = stratified_faces(in_mesh, n_samples, rng)
+    return in_mesh.random_points_on_faces(faces, rng, compute_normals), faces
+
+
+def _greedy_independent_set(n_nodes, edges, priority):
+    '''Maximal independent set of a graph, equal to the one of the greedy (sequential) algorithm that visits the
+    nodes in increasing priority. It is computed in rounds: every undecided node whose priority is lower than those
+    of all its undecided neighbors joins the set, and its neighbors are excluded. Each round is vectorized over the
+    edges and the number of rounds is (expected) logarithmic.
+    '''
+    undecided, selected, excluded = 0, 1, 2
+    state = np.zeros(n_nodes, dtype=np.int8)
+    while len(edges) > 0:
+        lowest = priority.copy()
+        np.minimum.at(lowest, edges[:, 0], priority[edges[:, 1]])
+        np.minimum.at(lowest, edges[:, 1], priority[edges[:, 0]])
+        winners = (state == undecided) & (lowest == priority)
+        state[winners] = selected
+        state[edges[winners[edges[:, 0]], 1]] = excluded
+        state[edges[winners[edges[:, 1]], 0]] = excluded
+        edges = edges[(state[edges[:, 0]] == undecided) & (state[edges[:, 1]] == undecided)]
+    state[state == undecided] = selected   # Isolated (in the remaining graph) nodes.
+    return np.where(state == selected)[0]
+
+
+def poisson_disk_surface_sample(in_mesh, n_samples, oversampling=8, tolerance=0.05, rng=None,
+                                compute_normals=False, max_iter=20):
+    '''Blue-noise sampling of the surface of a mesh. First, oversampling * n_samples candidates are drawn with
+    stratified_surface_sample. Then, the candidates are visited in random order and the ones that are closer than a
+    radius r to an accepted one are rejected (dart throwing), i.e., a maximal Poisson-disk subset of them is kept.
+    The radius is adapted (n ~ area / r^2) until the subset has between n_samples and (1 + tolerance) * n_samples
+    points, and the extra points are dropped at random, which keeps the minimum distance.
+
+    Args:
+        oversampling (int): the quality/speed trade-off. More candidates give a denser, more regular packing (a
+            larger radius for the same number of points), at a proportionally larger cost.
+        tolerance (float): the relative excess of points that is accepted before dropping the extra ones. Smaller
+            values need more adaptations of the radius.
+
+    Returns:
+        points (n_samples x 3 numpy array, or x 6 if compute_normals).
+        faces (n_samples numpy array) the triangle of every sample.
+        radius (float) the minimum (euclidean) distance between the samples.
+
+    Notes: the distances are euclidean, thus points on nearby, but geodesically far, parts of a surface also repel.
+    If no radius keeps at least n_samples candidates within max_iter adaptations, a random subset of the
+    (stratified) candidates is returned with radius 0, i.e., without the blue-noise property, and a warning is
+    issued.
+    '''
+    rng = np.random.default_rng(rng)
+    n_candidates = int(np.ceil(oversampling * n_samples))
+    if n_candidates < n_samples or n_samples < 1:
+        raise ValueError('oversampling must be at least 1 and n_samples positive.')
+    candidates, faces = stratified_surface_sample(in_mesh, n_candidates, rng, compute_normals)
+    tree = cKDTree(candidates[:, :3])
+    priority = rng.permutation(n_candidates)
+
+    # The jamming density of random sequential packing of disks in the plane (0.547) gives the initial radius.
+    area = in_mesh.area_cdf()[-1]
+    radius = np.sqrt(0.547 * 4.0 * area / (np.pi * n_samples))
+    pairs_radius = 0
+    best = np.arange(n_candidates)
+    best_radius = 0.0
+    for _ in range(max_iter):
+        if radius > pairs_radius:
+            pairs_radius = radius * 1.25    # Candidate pairs are recomputed only when the radius grows beyond them.
+            pairs = tree.query_pairs(pairs_radius, output_type='ndarray')
+            lengths = np.sqrt(np.sum(np.square(candidates[pairs[:, 0], :3] - candidates[pairs[:, 1], :3]), axis=1))
+        kept = _greedy_independent_set(n_candidates, pairs[lengths < radius], priority)
+        n_kept = len(kept)
+        if n_kept >= n_samples and radius > best_radius:
+            best, best_radius = kept, radius
+            if n_kept <= (1 + tolerance) * n_samples:
+                break
+        radius *= np.sqrt(float(n_kept) / n_samples) ** (1.0 if n_kept >= n_samples else 1.2)
+
+    if best_radius == 0:
+        warnings.warn('Poisson-disk sampling found no radius that keeps %d samples in %d iterations: a random '
+                      'subset of the stratified candidates is returned instead. Increase max_iter, or oversampling.'
+                      % (n_samples, max_iter))
+    kept = rng.choice(best, n_samples, replace=False)
+    return candidates[kept], faces[kept], best_radius